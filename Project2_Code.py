@@ -1,12 +1,9 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.gridspec import GridSpec
-from matplotlib import image as mpimg
 import math
 
+from plotting import FONT_FAMILY, render_batch
+
 #Constants
-plt.rcParams["font.family"] = "Times New Roman"
-plt.rcParams["font.size"] = 10
 
 # m constant for blood as a power law fluid (Pa*s^n / m^2)
 m = 0.01615
@@ -62,20 +59,16 @@ tau_NW = (np.abs(((p/l) - np.multiply(np.multiply(g,rho), sintheta)) * (r / 2)))
 # tau_nog = np.repeat(tau_nog, 4410)
 
 
-#Plotting
-plt.figure()
-gs = GridSpec(nrows=2, ncols=2)
-plt.subplot(gs[0,0])
-plt.xlabel("Acceleration due to Gravity (m/s^2)", fontsize = 11)
-plt.ylabel("Wall Shear Stress (Pa)", fontsize = 11)
-plt.title("Gravity-Induced Changes in Wall Shear Stress in Generalized Coronary Artery")
-plt.plot(g, tau_PL, linewidth=2.0, color='r', label='Power Law Fluid (Shear Thinning)')
-plt.plot(g, tau_NW, linewidth=2.0, color='b', label='Newtonian Fluid')
-plt.axhline(y = 0.60, color='k', linestyle='--')
-plt.grid()
-#plt.plot(g, tau_BP, linewidth=2.0, color='b', label='Bingham Plastic Fluid')
-#plt.plot(g, tau_nog, linewidth=2.0, color='y')
-plt.legend(loc='lower right')
+#Plotting: figures are rendered headless into figures/ (see plotting.py); the
+# first one is a 2 x 2 grid whose bottom panel spans both columns
+athero_line = [{"y": 0.60, "color": 'k', "linestyle": '--'}]
+gravity_panel = {"cell": 1, "xlabel": "Acceleration due to Gravity (m/s^2)", "ylabel": "Wall Shear Stress (Pa)",
+                 "title": "Gravity-Induced Changes in Wall Shear Stress in Generalized Coronary Artery",
+                 "series": [{"x": g, "y": tau_PL, "color": 'r', "label": 'Power Law Fluid (Shear Thinning)'},
+                            {"x": g, "y": tau_NW, "color": 'b', "label": 'Newtonian Fluid'}],
+                 "hlines": athero_line, "legend": 'lower right'}
+#gravity_panel["series"].append({"x": g, "y": tau_BP, "color": 'b', "label": 'Bingham Plastic Fluid'})
+#gravity_panel["series"].append({"x": g, "y": tau_nog, "color": 'y'})
 
 
 
@@ -98,11 +91,9 @@ tau_earth = m * np.abs(((p/l) - np.multiply(np.multiply(g_earth,rho), sintheta))
 tau_takeoff = m * np.abs(((p/l) - np.multiply(np.multiply(g_takeoff,rho), sintheta)) * (r_variable / 2 * mu)) ** n
 tau_space = m * np.abs(((p/l) - np.multiply(np.multiply(g_space,rho), sintheta)) * (r_variable / 2 * mu)) ** n
 
-#plt.figure()
-plt.subplot(gs[1,:])
-plt.xlabel("Vessel Radius (mm)", fontsize = 11)
-plt.ylabel("Wall Shear Stress (Pa)", fontsize = 11)
-plt.title("Gravity-Induced Changes in Wall Shear Stress along Vessel Radius in Shear-Thinning Blood Model")
+radius_panel = {"cell": (3, 4), "xlabel": "Vessel Radius (mm)", "ylabel": "Wall Shear Stress (Pa)",
+                "title": "Gravity-Induced Changes in Wall Shear Stress along Vessel Radius in Shear-Thinning Blood Model",
+                "series": [], "hlines": athero_line, "legend": True}
     
 gravity_comp = [9.8e-6, 3.3, 6.6, 9.8]
 colors = ['r', 'b', 'g', 'y']
@@ -111,13 +102,8 @@ for i in range(4):
     grav_label = "g = " + str(grav_value) + " m/s^2"
     colu = colors[i]
     testPL = m * np.abs(((p/l) - np.multiply(np.multiply(grav_value,rho), sintheta)) * ((r_array /1000)/ 2)) ** n
-    plt.plot(r_array, testPL, linewidth=2.0, color=colu, label=grav_label)
+    radius_panel["series"].append({"x": r_array, "y": testPL, "color": colu, "label": grav_label})
 
-plt.axhline(y = 0.60, color='k', linestyle='--')
-plt.grid()
-#plt.set_xlim(2.3,2.5)
-#plt.set_ylim(0.7,0.8)
-plt.legend()
 # plt.plot(r_variable, tau_earth, linewidth=2.0, color= 'r', label='earth, g=9.8')
 # plt.plot(r_variable, tau_takeoff, linewidth=2.0, color='g', label='takeoff, g=9.8 * 4')
 # plt.plot(r_variable, tau_space, linewidth=2.0, color='b', label='space, g=9.8/1000000')
@@ -141,11 +127,9 @@ sintheta_variable = np.sin(theta_variable * np.pi/180.)
 # tau_space = m * np.abs(((p/l) - np.multiply(np.multiply(g_space,rho), sintheta_variable)) * (r / 2 * mu)) ** n
 
 
-#plt.figure()
-plt.subplot(gs[0,1])
-plt.xlabel("Angle \u03F4 (Redians)", fontsize = 11)
-plt.ylabel("Wall Shear Stress (Pa)", fontsize = 11)
-plt.title("Gravity-Induced Changes in Wall Shear Stress at Different Angles in Shear-Thinning Blood Model")
+angle_panel = {"cell": 2, "xlabel": "Angle \u03F4 (Redians)", "ylabel": "Wall Shear Stress (Pa)",
+               "title": "Gravity-Induced Changes in Wall Shear Stress at Different Angles in Shear-Thinning Blood Model",
+               "series": [], "hlines": athero_line, "legend": 'lower right'}
 
 gravity_comp = [9.8e-6, 3.3, 6.6, 9.8]
 colors = ['r', 'b', 'g', 'y']
@@ -155,18 +139,13 @@ for i in range(4):
     grav_label = "g = " + str(grav_value) + " m/s^2"
     colu = colors[i]
     testPL = m * np.abs(((p/l) - np.multiply(np.multiply(grav_value,rho), sintheta_variable)) * (r_const/ 2)) ** n
-    plt.plot(sintheta_variable, testPL, linewidth=2.0, color=colu, label=grav_label)
+    angle_panel["series"].append({"x": sintheta_variable, "y": testPL, "color": colu, "label": grav_label})
 
-plt.axhline(y = 0.60, color='k', linestyle='--')
-plt.grid()
 # plt.plot(theta_variable, tau_earth, linewidth=2.0, color= 'r', label='earth, ge=9.8')
 # plt.plot(theta_variable, tau_takeoff, linewidth=2.0, color='g', label='takeoff, g=4*ge')
 # plt.plot(theta_variable, tau_space, linewidth=2.0, color='b', label='space, g=ge/100000')
-plt.legend(loc = 'lower right')
-position = plt.subplot(gs[1,:]).get_position()
-new_position = [position.x0, position.y0-0.04, position.width, position.height]
-plt.subplot(gs[1,:]).set_position(new_position)
-plt.show()
+figures = {"Project2_gravity_effects.png": {"nrows": 2, "ncols": 2, "font_family": FONT_FAMILY, "font_size": 10,
+                                            "panels": [gravity_panel, angle_panel, radius_panel]}}
 
 # Controls Analysis
 g_control_start = 10
@@ -178,13 +157,12 @@ g_control = np.arange(g_control_start, g_control_step, g_control_step)
 tau_PL_control = (m * np.abs(((p/l) - np.multiply(np.multiply(g_control,rho), sintheta)) * (r / 2)) ** n) # Power Law Shear Stress Control Analysis
 tau_NW_control = (np.abs(((p/l) - np.multiply(np.multiply(g_control,rho), sintheta)) * (r / 2)))/280 # Newtonian Shear Stress Analysis
 
-plt.figure()
-plt.xlabel("Acceleration due to Gravity (m/s^2)", fontsize = 11)
-plt.ylabel("Wall Shear Stress (Pa)", fontsize = 11)
-plt.title("Gravity-Induced Changes in Wall Shear Stress in Generalized Coronary Artery: Control Analysis")
-plt.plot(g_control, tau_PL_control, linewidth=2.0, color='r', label='Power Law Fluid (Shear Thinning)')
-plt.plot(g_control, tau_NW_control, linewidth=2.0, color='b', label='Newtonian Fluid')
-plt.axhline(y = 0.60, color='k', linestyle='--')
-plt.grid()
-plt.legend(loc='lower right')
-plt.show()
+figures["Project2_control.png"] = {"font_family": FONT_FAMILY, "font_size": 10, "panels": [{
+    "xlabel": "Acceleration due to Gravity (m/s^2)", "ylabel": "Wall Shear Stress (Pa)",
+    "title": "Gravity-Induced Changes in Wall Shear Stress in Generalized Coronary Artery: Control Analysis",
+    "series": [{"x": g_control, "y": tau_PL_control, "color": 'r', "label": 'Power Law Fluid (Shear Thinning)'},
+               {"x": g_control, "y": tau_NW_control, "color": 'b', "label": 'Newtonian Fluid'}],
+    "hlines": athero_line, "legend": 'lower right'}]}
+
+for path, rendered in render_batch(figures, "figures").items():
+    print(f"wrote {path}" if rendered else f"{path} is up to date")
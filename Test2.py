@@ -1,7 +1,9 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 
+from grid_engine import shear_surfaces
+from plotting import render_figure
+
 # Constants
 # yield stress of blood (Pa)
 # "Rheological properties of blood" by D.A. Fedosov and G.E. Karniadakis, published in Annual Review of Fluid Mechanics in 2014
@@ -42,40 +44,33 @@ gamma = np.logspace(np.log10(gamma_start), np.log10(gamma_stop), num=gamma_num)
 # Newtonain Model
 tau = m * np.abs(((p/l) - np.multiply(np.multiply(g,rho), sintheta)) * (r / 2 * mu)) ** n
 
-# Bingham plastic model
-tau_bp = np.zeros((len(g), len(gamma)))
-
-for i, gi in enumerate(g):
-    for j in range(len(gamma)):
-        if gamma[j] > tau_yield / mu_bp + gi * sintheta * r * rho / mu:
-            tau_bp[i, j] = tau_yield + mu_bp * (gamma[j] - tau_yield / mu_bp) + gi * sintheta * r * rho
-        else:
-            tau_bp[i, j] = mu_bp * gamma[j] + gi * sintheta * r * rho
-
-# Power law model
-tau_pl = np.zeros((len(g), len(gamma)))
-
-for i, gi in enumerate(g):
-    for j in range(len(gamma)):
-        tau_pl[i, j] = k * gamma[j] ** n_pl + gi * sintheta * r * rho / (2 * mu) * gamma[j] ** (n_pl + 1) * r ** 2 / l
+# Bingham plastic and power law models, evaluated over the whole (g x gamma) grid at once
+tau_bp, tau_pl = shear_surfaces(g, gamma, tau_yield, mu_bp, k, n_pl, mu, r, sintheta, l, rho)
 
 # Effects of gravity on Newtonain, Bingham plastic, and power law models
-fig, ax = plt.subplots(ncols=2, nrows=2, figsize=(12, 8))
-
-for i, gi in enumerate(g):
-    ax[0, 0].plot(gamma, tau_bp[i, :], label=f'g={gi:.2f} m/s^2')
-    ax[1, 0].plot(gamma, (tau_bp[i, :] - tau_bp[0, :]) / tau_bp[0, :] * 100, label=f'g={gi:.2f} m/s^2')
-
-    ax[0, 1].plot(gamma, tau_pl[i, :], label=f'g={gi:.2f} m/s^2')
-    ax[1, 1].plot(gamma, (tau_pl[i, :] - tau_pl[0, :]) / tau_pl[0, :] * 100, label=f'g={gi:.2f} m/s^2')
-
-# ax[1].xlabel('Shear rate (1/s)')
-# ax[1].ylabel('Shear stress (Pa)')
-# ax[1].set_xscale('log')
-# ax[1].set_yscale('log')
-# ax[1].set_title('Power law model')
-# ax[1].legend()
-
-plt.show()
-
-
+# One LineCollection per panel (one curve per g value), rendered headless to a file
+relative_bp = (tau_bp - tau_bp[0, :]) / tau_bp[0, :] * 100
+relative_pl = (tau_pl - tau_pl[0, :]) / tau_pl[0, :] * 100
+
+figure = {
+    "nrows": 2,
+    "ncols": 2,
+    "figsize": (12, 8),
+    "panels": [
+        {"title": "Bingham plastic model", "xlabel": "Shear rate (1/s)", "ylabel": "Shear stress (Pa)",
+         "series": [{"x": gamma, "y": tau_bp, "linewidth": 1.0}]},
+        {"title": "Power law model", "xlabel": "Shear rate (1/s)", "ylabel": "Shear stress (Pa)",
+         "series": [{"x": gamma, "y": tau_pl, "linewidth": 1.0}]},
+        {"xlabel": "Shear rate (1/s)", "ylabel": "Change from g = 0 (%)",
+         "series": [{"x": gamma, "y": relative_bp, "linewidth": 1.0}]},
+        {"xlabel": "Shear rate (1/s)", "ylabel": "Change from g = 0 (%)",
+         "series": [{"x": gamma, "y": relative_pl, "linewidth": 1.0}]},
+    ],
+    "suptitle": f"Effects of gravity, g = {g[0]:.2f} to {g[-1]:.2f} m/s^2",
+}
+
+output = "figures/Test2_gravity_effects.png"
+if render_figure(figure, output):
+    print(f"wrote {output}")
+else:
+    print(f"{output} is up to date")
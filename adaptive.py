@@ -0,0 +1,91 @@
+import numpy as np
+
+from rheology import MODEL_PY_PARAMS, wall_shear_stress
+from sweep import DEFAULT_FIXED, GEOMETRY
+
+# Adaptive 1D sampling for the single-variable sweeps of model.py and
+# Project2_Code.py. Instead of a uniform np.arange grid, an interval is split
+# at its midpoint only while linear interpolation across it misses the
+# midpoint value by more than tol (which catches curvature and the kink where
+# (p/l) - g*rho*sin(theta) changes sign inside the absolute value), or while
+# it still contains a threshold crossing wider than xtol. Every pass evaluates
+# all midpoints of the current pass in one vectorized call.
+
+
+# Samples f (vectorized over x) on [lo, hi]; returns sorted x and f(x).
+# breakpoints are known non-smooth points to sample exactly.
+def refine(f, lo, hi, tol, threshold=None, xtol=None, n_initial=17, breakpoints=(), max_passes=60):
+    if xtol is None:
+        xtol = (hi - lo) * 1e-9
+    x = np.linspace(lo, hi, n_initial)
+    extra = np.asarray(breakpoints, dtype=float).ravel()
+    x = np.unique(np.concatenate([x, extra[(extra > lo) & (extra < hi)]]))
+    y = np.asarray(f(x), dtype=float)
+
+    # intervals still to check, by left and right edge
+    left, right = x[:-1], x[1:]
+    y_left, y_right = y[:-1], y[1:]
+    for _ in range(max_passes):
+        if not len(left):
+            break
+        mid = 0.5 * (left + right)
+        y_mid = np.asarray(f(mid), dtype=float)
+        x = np.concatenate([x, mid])
+        y = np.concatenate([y, y_mid])
+
+        split = np.abs(y_mid - 0.5 * (y_left + y_right)) > tol
+        if threshold is not None:
+            crossing = (y_left - threshold) * (y_right - threshold) <= 0
+            split |= crossing & (right - left > 2 * xtol)
+        split &= right - left > xtol
+
+        left, right = np.concatenate([left[split], mid[split]]), np.concatenate([mid[split], right[split]])
+        y_left, y_right = (np.concatenate([y_left[split], y_mid[split]]),
+                           np.concatenate([y_mid[split], y_right[split]]))
+
+    order = np.argsort(x)
+    return x[order], y[order]
+
+
+# Linearly interpolated x values where y crosses threshold
+def crossings(x, y, threshold):
+    d = y - threshold
+    i = np.flatnonzero((d[:-1] * d[1:] < 0) | (d[:-1] == 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(d[i] == 0, 0.0, d[i] / (d[i] - d[i + 1]))
+    return x[i] + t * (x[i + 1] - x[i])
+
+
+# Value of axis (g, theta in degrees, p or l) at which
+# (p/l) - g*rho*sin(theta) is zero, the kink of every model
+def kink(axis, geometry, rho):
+    g, theta, r, p, l = (geometry[name] for name in GEOMETRY)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if axis == "g":
+            return [p / (l * rho * np.sin(np.radians(theta)))]
+        if axis == "theta":
+            s = np.divide(p, l * rho * g)
+            return [np.degrees(np.arcsin(s))] if abs(s) <= 1 else []
+        if axis == "p":
+            return [l * g * rho * np.sin(np.radians(theta))]
+        if axis == "l":
+            return [p / (g * rho * np.sin(np.radians(theta)))]
+    return []
+
+
+# Adaptive version of a model.py sweep: WSS for model along one geometry axis
+# over [lo, hi], with the other geometry taken from fixed
+def adaptive_sweep(model, axis, lo, hi, tol=1e-4, threshold=0.6, params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED,
+                   **options):
+    if axis not in GEOMETRY:
+        raise ValueError(f"unknown axis {axis!r}, expected one of {GEOMETRY}")
+    geometry = {name: fixed[name] for name in GEOMETRY if name != axis}
+
+    def f(values):
+        args = dict(geometry, **{axis: values})
+        return wall_shear_stress(model, args["g"], args["theta"], args["r"], args["p"], args["l"], params)
+
+    breakpoints = options.pop("breakpoints", None)
+    if breakpoints is None:
+        breakpoints = kink(axis, dict(geometry, **{axis: None}), params["rho"])
+    return refine(f, lo, hi, tol, threshold, breakpoints=breakpoints, **options)
@@ -0,0 +1,160 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from cases import TEST2, loop_surfaces, surface_axes
+from flow1d import REGULARIZED, explicit_euler, stable_dt
+from grid_engine import shear_surfaces
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+from sensitivity import factor_bounds, morris_indices, sobol_indices
+
+# Timed benchmark suite with regression tracking. Each case times one model
+# path at several problem sizes (best of `repeat` runs, each run looping until
+# it takes at least min_time) and the results are written as JSON. Given a
+# baseline file from an earlier run, any case slower than the baseline by more
+# than the tolerance is reported and the run exits non-zero:
+#
+#   python bench_suite.py --out baseline.json
+#   python bench_suite.py --baseline baseline.json --tolerance 0.25
+#
+# benchmarks.py holds the exploratory timings and test_*.py the correctness
+# checks (python -m pytest).
+
+DEFAULT_TOLERANCE = 0.25
+
+
+def _random_geometry(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 40, size), rng.uniform(-90, 90, size), rng.uniform(.001, .003, size)
+
+
+# model.py's vectorized expressions over `size` scenarios
+def _model_case(model):
+    def setup(size):
+        g, theta, r = _random_geometry(size)
+        return lambda: wall_shear_stress(model, g, theta, r, CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+    return setup
+
+
+# Test2.py surfaces on a size x size (g, gamma) grid
+def _surfaces_case(size):
+    g, gamma = surface_axes(size, size)
+    return lambda: shear_surfaces(g, gamma, backend="numpy", **TEST2)
+
+
+def _loops_case(size):
+    g, gamma = surface_axes(size, size)
+    return lambda: loop_surfaces(g, gamma, **TEST2)
+
+
+# Test.py's explicit loop, 10000 steps on `size` nodes
+def _flow_case(size):
+    return lambda: explicit_euler(N=size, dt=stable_dt(size, REGULARIZED), steps=10000, c=REGULARIZED)
+
+
+def _sobol_case(size):
+    g = np.arange(0, 10, .01)
+    bounds = factor_bounds(["m", "n", "rho", "p", "l"])
+    return lambda: sobol_indices("power_law", bounds, g, n_samples=size)
+
+
+def _morris_case(size):
+    g = np.arange(0, 10, .01)
+    bounds = factor_bounds(["m", "n", "rho", "p", "l"])
+    return lambda: morris_indices("power_law", bounds, g, n_trajectories=size)
+
+
+# name: (sizes, setup(size) -> zero-argument callable)
+CASES = {
+    "model.power_law": ((10**4, 10**6), _model_case("power_law")),
+    "model.newtonian": ((10**4, 10**6), _model_case("newtonian")),
+    "model.bingham": ((10**4, 10**6), _model_case("bingham")),
+    "test2.surfaces": ((100, 1000, 2000), _surfaces_case),
+    "test2.loops": ((50, 100), _loops_case),
+    "test.explicit_loop": ((100, 1000), _flow_case),
+    "sensitivity.sobol": ((2**10, 2**12), _sobol_case),
+    "sensitivity.morris": ((10, 50), _morris_case),
+}
+
+
+# Best wall time per call of fn over `repeat` runs
+def time_call(fn, repeat=5, min_time=0.05):
+    fn()
+    best = np.inf
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def run_suite(cases=CASES, pattern=None, repeat=5, min_time=0.05, quick=False):
+    results = {}
+    for name, (sizes, setup) in cases.items():
+        if pattern and pattern not in name:
+            continue
+        for size in sizes[:1] if quick else sizes:
+            seconds = time_call(setup(size), repeat, min_time)
+            results[f"{name}[{size}]"] = {"case": name, "size": size, "seconds": seconds, "per_second": size / seconds}
+            print(f"{name}[{size}]: {seconds * 1e3:.3f} ms")
+    return {"meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                     "processor": platform.processor(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "results": results}
+
+
+# Cases slower than the baseline by more than tolerance (0.25 = 25%), as
+# (key, baseline seconds, seconds, ratio); cases missing from either side are
+# skipped
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    regressions = []
+    for key, entry in report["results"].items():
+        if key not in baseline["results"]:
+            continue
+        reference = baseline["results"][key]["seconds"]
+        ratio = entry["seconds"] / reference
+        if ratio > 1 + tolerance:
+            regressions.append((key, reference, entry["seconds"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every model path and compare against a baseline.")
+    parser.add_argument("--out", help="write the results as JSON here")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown as a fraction of the baseline time")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--quick", action="store_true", help="only the smallest size of each case")
+    args = parser.parse_args(argv)
+
+    report = run_suite(CASES, args.pattern, args.repeat, args.min_time, args.quick)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for key, reference, seconds, ratio in regressions:
+            print(f"REGRESSION {key}: {reference * 1e3:.3f} ms -> {seconds * 1e3:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
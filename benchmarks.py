@@ -0,0 +1,444 @@
+import time
+
+import numpy as np
+
+from adaptive import adaptive_sweep
+from cases import (TEST2, cohort_table, flow_state, interpolation_error, loop_surfaces, rheometer_curves, surface_axes,
+                   surface_figure, sweep_axes, sweep_reducers, write_cohort_csv)
+from cohort import run_cohort
+from fitting import LOG_MODELS, fit_curves
+from flow1d import REGULARIZED, FlowStepper, explicit_euler, initial_state, rates, solve as solve_flow, stable_dt
+from grid_engine import shear_surfaces
+from inverse import critical_g
+from kernels import HAVE_NUMBA
+from lookup import LookupTable, build_table
+from monte_carlo import monte_carlo
+from network import VesselNetwork
+from parallel import parallel_reduce
+from plotting import render_figure
+from profiles import PROFILES, radial_profiles
+from pulsatile import fourier_waveform, pulsatile_wss
+from result_cache import ResultCache
+from results_store import write_sweep
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+from sensitivity import factor_bounds, sobol_indices
+from service import load_test
+from sweep import MinMax, ThresholdCount, run_sweep
+from timeseries import WssStream, launch_profile, run_stream
+
+
+def bench_grid_engine(sizes=((100, 100), (1000, 1000), (4000, 4000))):
+    for n_g, n_gamma in sizes:
+        g, gamma = surface_axes(n_g, n_gamma)
+        for dtype in (np.float64, np.float32):
+            start = time.perf_counter()
+            shear_surfaces(g, gamma, dtype=dtype, backend="numpy", **TEST2)
+            elapsed = time.perf_counter() - start
+            print(f"grid engine {n_g}x{n_gamma} {np.dtype(dtype).name}: {elapsed * 1e3:.1f} ms")
+
+    g, gamma = surface_axes(100, 100)
+    start = time.perf_counter()
+    loop_surfaces(g, gamma, **TEST2)
+    elapsed = time.perf_counter() - start
+    print(f"nested loops 100x100: {elapsed * 1e3:.1f} ms")
+
+
+def bench_rheology(sizes=(10**4, 10**6, 10**7)):
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        g = rng.uniform(0, 40, size)
+        theta = rng.uniform(-90, 90, size)
+        r = rng.uniform(.001, .003, size)
+        for model in ("power_law", "newtonian", "bingham"):
+            start = time.perf_counter()
+            wall_shear_stress(model, g, theta, r, CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+            elapsed = time.perf_counter() - start
+            print(f"{model} {size} scenarios: {elapsed * 1e3:.1f} ms")
+
+
+def bench_sweep(sizes=((100, 36, 20, 5, 4), (200, 180, 20, 10, 4))):
+    for size in sizes:
+        axes = sweep_axes(*size)
+        start = time.perf_counter()
+        run_sweep("power_law", axes, [MinMax(), ThresholdCount(0.6)])
+        elapsed = time.perf_counter() - start
+        points = int(np.prod(size))
+        print(f"sweep {points} points: {elapsed * 1e3:.1f} ms ({points / elapsed:.3g} points/s)")
+
+
+# Speedup of a fixed grid from 1 worker up to every core
+def bench_parallel(size=(200, 180, 20, 10, 4)):
+    import os
+
+    axes = sweep_axes(*size)
+    counts = sorted({1, 2, 4, 8, 16, 32, 64, os.cpu_count() or 1})
+    counts = [c for c in counts if c <= (os.cpu_count() or 1)] or [1]
+    base = None
+    for workers in counts:
+        start = time.perf_counter()
+        parallel_reduce("power_law", axes, sweep_reducers, workers=workers)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print(f"parallel sweep {workers} workers: {elapsed * 1e3:.1f} ms (speedup {base / elapsed:.2f}x)")
+
+
+def bench_sensitivity(sizes=(2**12, 2**14, 2**16)):
+    g = np.arange(0, 10, .01)
+    bounds = factor_bounds(["m", "n", "rho", "p", "l"])
+    for n_samples in sizes:
+        start = time.perf_counter()
+        sobol_indices("power_law", bounds, g, n_samples=n_samples)
+        elapsed = time.perf_counter() - start
+        print(f"sobol {n_samples} samples x {len(g)} g: {elapsed * 1e3:.1f} ms")
+
+
+def bench_monte_carlo(sizes=(10**4, 10**5, 10**6)):
+    g = np.arange(0, 10, .1)
+    for n_samples in sizes:
+        start = time.perf_counter()
+        monte_carlo("power_law", g, n_samples=n_samples)
+        elapsed = time.perf_counter() - start
+        print(f"monte carlo {n_samples} samples x {len(g)} g: {elapsed * 1e3:.1f} ms")
+
+
+def bench_flow1d(sizes=(100, 1000, 10000, 100000)):
+    start = time.perf_counter()
+    explicit_euler(N=100, dt=1e-5, steps=100000, c=REGULARIZED)
+    elapsed = time.perf_counter() - start
+    print(f"explicit flow N=100: {elapsed:.3f} s per simulated second")
+    for N in sizes:
+        result = solve_flow(N=N, t_end=1.0, c=REGULARIZED)
+        print(f"implicit flow N={N}: {result['steps']} steps, {result['wall_per_sim_second']:.3f} s per simulated second")
+
+
+def bench_kernels(flow_sizes=(100, 10000, 1000000), grid_sizes=((1000, 1000), (4000, 4000))):
+    backends = ["numpy", "numba"] if HAVE_NUMBA else ["numpy"]
+    for N in flow_sizes:
+        u, p = flow_state(N)
+        dx = 0.02 / N
+        for backend in backends:
+            rates(u, p, dx, backend=backend)
+            repeats = max(1, 10**6 // N)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                rates(u, p, dx, backend=backend)
+            elapsed = (time.perf_counter() - start) / repeats
+            print(f"flow rates N={N} {backend}: {elapsed * 1e6:.1f} us")
+
+    for n_g, n_gamma in grid_sizes:
+        g, gamma = surface_axes(n_g, n_gamma)
+        for backend in backends:
+            shear_surfaces(g[:2], gamma[:2], backend=backend, **TEST2)
+            start = time.perf_counter()
+            shear_surfaces(g, gamma, backend=backend, **TEST2)
+            elapsed = time.perf_counter() - start
+            print(f"shear surfaces {n_g}x{n_gamma} {backend}: {elapsed * 1e3:.1f} ms")
+
+
+def bench_stepper(sizes=(100, 10000, 1000000), steps=100):
+    for N in sizes:
+        dx, dt = 0.02 / N, stable_dt(N, REGULARIZED)
+        u, p = initial_state(N)
+        start = time.perf_counter()
+        for _ in range(steps):
+            dudt, dpdt = rates(u, p, dx, REGULARIZED)
+            u += dt * dudt
+            p += dt * dpdt
+        allocating = (time.perf_counter() - start) / steps
+
+        stepper = FlowStepper(N, dt=dt, c=REGULARIZED)
+        start = time.perf_counter()
+        stepper.step(steps)
+        in_place = (time.perf_counter() - start) / steps
+        print(f"flow step N={N}: allocating {allocating * 1e6:.1f} us, preallocated {in_place * 1e6:.1f} us")
+
+
+# Test2.py's original one-Line2D-per-g plotting against the pipeline
+def bench_plotting(sizes=((100, 1000), (1000, 1000)), tmpdir="."):
+    import os
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    path = os.path.join(tmpdir, "bench_plotting.png")
+    try:
+        for n_g, n_gamma in sizes:
+            spec = surface_figure(n_g, n_gamma)
+            gamma = spec["panels"][0]["series"][0]["x"]
+
+            start = time.perf_counter()
+            fig = Figure(figsize=(12, 4))
+            FigureCanvasAgg(fig)
+            axes = fig.subplots(ncols=2)
+            for panel, ax in zip(spec["panels"], axes):
+                for row in panel["series"][0]["y"]:
+                    ax.plot(gamma, row, label="curve")
+            fig.savefig(path)
+            per_line = time.perf_counter() - start
+
+            start = time.perf_counter()
+            render_figure(spec, path, force=True)
+            pipeline = time.perf_counter() - start
+            start = time.perf_counter()
+            render_figure(spec, path)
+            cached = time.perf_counter() - start
+            print(f"plot {n_g} curves x {n_gamma} points: per-line {per_line * 1e3:.0f} ms, "
+                  f"pipeline {pipeline * 1e3:.0f} ms, cached {cached * 1e3:.1f} ms")
+    finally:
+        for name in (path, path + ".sha256"):
+            if os.path.exists(name):
+                os.remove(name)
+
+
+def bench_result_cache(size=(2000, 180, 20)):
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    axes = [("g", np.linspace(0, 40, size[0])), ("theta", np.linspace(-90, 90, size[1])),
+            ("r", np.linspace(.001, .003, size[2]))]
+    try:
+        cache = ResultCache(directory)
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            cache.sweep("power_law", axes)
+            elapsed = time.perf_counter() - start
+            print(f"cached sweep {int(np.prod(size))} points {label}: {elapsed * 1e3:.1f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_results_store(size=(400, 180, 20, 10, 4), chunk_rows=2**22):
+    import os
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    axes = sweep_axes(*size)
+    try:
+        start = time.perf_counter()
+        store = write_sweep(os.path.join(directory, "store"), ["power_law"], axes, chunk_rows=chunk_rows)
+        elapsed = time.perf_counter() - start
+        points = int(np.prod(size))
+        print(f"store write {points} points: {elapsed * 1e3:.1f} ms ({points * 8 / elapsed / 2**20:.0f} MiB/s)")
+        for label, selection in (("one g row", {"g": 200}), ("theta=0 plane", {"theta": 90}),
+                                 ("one scenario", {"g": 1, "theta": 2, "r": 3, "p": 4, "m": 0})):
+            start = time.perf_counter()
+            store.read("power_law", **selection)
+            print(f"store read {label}: {(time.perf_counter() - start) * 1e3:.2f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_inverse(sizes=(10**4, 10**6, 10**7), n_grid=4000):
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        theta, r = rng.uniform(-90, 90, n), rng.uniform(.001, .003, n)
+        start = time.perf_counter()
+        critical_g("power_law", 0.6, theta, r, CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+        elapsed = time.perf_counter() - start
+        print(f"critical g for {n} parameter sets: {elapsed * 1e3:.1f} ms ({n / elapsed:.3g} sets/s)")
+
+    rng = np.random.default_rng(0)
+    n = sizes[0]
+    theta, r = rng.uniform(-90, 90, n), rng.uniform(.001, .003, n)
+    grid = np.linspace(0, 2000, n_grid)
+    start = time.perf_counter()
+    tau = wall_shear_stress("power_law", grid[None, :], theta[:, None], r[:, None], CORONARY["p"], CORONARY["l"],
+                            MODEL_PY_PARAMS)
+    np.argmax(tau < 0.6, axis=1)
+    elapsed = time.perf_counter() - start
+    print(f"dense {n_grid}-point g grid for {n} parameter sets: {elapsed * 1e3:.1f} ms")
+
+
+def bench_adaptive(tols=(1e-3, 1e-4, 1e-5)):
+    fixed = dict(CORONARY, g=9.8, theta=45)
+    dense = np.linspace(0, 1000, 10**6)
+    for tol in tols:
+        start = time.perf_counter()
+        x, y = adaptive_sweep("power_law", "g", 0, 1000, tol=tol, fixed=fixed)
+        elapsed = time.perf_counter() - start
+        error = interpolation_error("power_law", x, y, dense, 45)
+        # smallest uniform grid (by doubling) with the same worst-case error
+        n = 64
+        while True:
+            g = np.linspace(0, 1000, n)
+            tau = wall_shear_stress("power_law", g, 45, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+            if interpolation_error("power_law", g, tau, dense, 45) <= error or n >= len(dense):
+                break
+            n *= 2
+        print(f"adaptive tol {tol:g}: {len(x)} points in {elapsed * 1e3:.1f} ms, max error {error:.2g} "
+              f"(uniform grid needs ~{n} points)")
+
+
+def bench_cohort(sizes=(10**4, 10**5, 4 * 10**5)):
+    import os
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    source, out = os.path.join(directory, "cohort.csv"), os.path.join(directory, "wss.csv")
+    try:
+        for n in sizes:
+            table = cohort_table(n)
+            write_cohort_csv(source, table)
+            for label, src in (("in memory", table), ("csv", source)):
+                start = time.perf_counter()
+                run_cohort(src, out)
+                elapsed = time.perf_counter() - start
+                print(f"cohort {n} segments ({label}): {elapsed * 1e3:.1f} ms ({n / elapsed:.3g} segments/s)")
+    finally:
+        for path in (source, out):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(directory)
+
+
+def bench_timeseries(hours=(0.1, 1.0), rate=1000.0, hops=(None, 0.1)):
+    for duration in hours:
+        n = int(duration * 3600 * rate)
+        for hop in hops:
+            stream = WssStream(geometry=dict(CORONARY, p=4000), window=1.0, hop=hop)
+            start = time.perf_counter()
+            result = run_stream(launch_profile(duration * 3600, rate), stream)
+            elapsed = time.perf_counter() - start
+            print(f"time series {duration:g} h at {rate:g} Hz ({n} samples), 1 s windows every {hop or 1.0:g} s: "
+                  f"{elapsed:.2f} s ({n / elapsed:.3g} samples/s), {len(result['windows'])} windows, "
+                  f"{len(result['intervals'])} intervals below threshold")
+
+
+def bench_network(depths=(6, 10, 14, 17)):
+    for depth in depths:
+        network = VesselNetwork.bifurcating(depth)
+        network.r *= np.random.default_rng(3).uniform(0.5, 1.5, network.n_segments)
+        start = time.perf_counter()
+        result = network.solve(network.terminal_pressures(16000, 0))
+        network.wall_shear_stress(result["drop"])
+        elapsed = time.perf_counter() - start
+        print(f"network {network.n_segments} segments: {elapsed * 1e3:.1f} ms ({result['iterations']} iterations)")
+
+
+def bench_profiles(sizes=(10**3, 10**4, 10**5), points=64):
+    for size in sizes:
+        g = np.linspace(0, 30, size)
+        for model in PROFILES:
+            start = time.perf_counter()
+            radial_profiles(model, g, CORONARY["theta"], CORONARY["r"], CORONARY["p"], CORONARY["l"], points=points)
+            elapsed = time.perf_counter() - start
+            print(f"profiles {model} {size} scenarios x {points} radii: {elapsed * 1e3:.1f} ms "
+                  f"({size * points / elapsed:.3g} points/s)")
+
+
+def bench_pulsatile(sizes=(10**3, 10**4, 10**5), samples=256):
+    waveform = fourier_waveform(samples=samples)
+    for size in sizes:
+        g = np.linspace(0, 30, size)
+        start = time.perf_counter()
+        result = pulsatile_wss(waveform, g, model="power_law")
+        elapsed = time.perf_counter() - start
+        print(f"pulsatile {size} scenarios x {samples} samples: {elapsed * 1e3:.1f} ms "
+              f"({size / elapsed:.3g} cycles/s), max OSI {result['osi'].max():.3f}")
+
+
+def bench_fitting(sizes=(10**3, 10**4), points=40):
+    gamma = np.logspace(-1, 3, points)
+    for model in ("power_law", "bingham") + tuple(LOG_MODELS):
+        for size in sizes:
+            _, tau = rheometer_curves(model, size, gamma, noise=0.02)
+            start = time.perf_counter()
+            fit = fit_curves(model, gamma, tau)
+            elapsed = time.perf_counter() - start
+            print(f"fitting {model} {size} curves x {points} points: {elapsed * 1e3:.1f} ms "
+                  f"({size / elapsed:.3g} curves/s, {fit['converged'].mean():.2%} converged, "
+                  f"max {fit['iterations'].max()} iterations)")
+
+
+def bench_lookup(sizes=(10**3, 10**5, 10**6)):
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        table = build_table(directory)
+        print(f"lookup table {'x'.join(map(str, table.shape))} x {len(table.models)} models: "
+              f"{time.perf_counter() - start:.2f} s to build")
+        rng = np.random.default_rng(0)
+        hi = table.lo + table.step * (np.array(table.shape) - 1)
+        for size in sizes:
+            points = [rng.uniform(lo, top, size) for lo, top in zip(table.lo, hi)]
+            for backend in ("numpy", "numba") if HAVE_NUMBA else ("numpy",):
+                reader = LookupTable(directory, backend=backend)
+                for method in ("linear", "cubic"):
+                    reader.query("power_law", *points, method=method)
+                    start = time.perf_counter()
+                    reader.query("power_law", *points, method=method)
+                    elapsed = time.perf_counter() - start
+                    print(f"lookup {method} {backend} {size} queries: {elapsed * 1e3:.2f} ms "
+                          f"({size / elapsed:.3g} queries/s)")
+
+        point = (9.8, CORONARY["theta"], CORONARY["r"], CORONARY["p"])
+        table.query_one("power_law", *point)
+        for label, fn in [("query_one", lambda: table.query_one("power_law", *point)),
+                          ("exact", lambda: wall_shear_stress("power_law", *point[:3], point[3], CORONARY["l"],
+                                                              MODEL_PY_PARAMS))]:
+            start = time.perf_counter()
+            for _ in range(10000):
+                fn()
+            print(f"lookup single {label}: {(time.perf_counter() - start) / 10000 * 1e6:.2f} us per query")
+        print(f"lookup power_law error: {table.errors['power_law']}")
+    finally:
+        shutil.rmtree(directory)
+
+
+# Load test against a service in its own process on a Unix socket
+def bench_service(clients=(1, 16, 64), points=(1, 100), requests=20000):
+    import asyncio
+    import os
+    import shutil
+    import subprocess
+    import sys
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    socket = os.path.join(directory, "wss.sock")
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "service.py"),
+                               "serve", "--unix", socket], stdout=subprocess.PIPE)
+    try:
+        server.stdout.readline()
+        for size in points:
+            for count in clients:
+                result = asyncio.run(load_test(unix=socket, clients=count, requests=min(requests, 1000 * count),
+                                               points=size))
+                latency = result["latency_ms"]
+                print(f"service {count} clients x {size} points: {result['requests_per_second']:.0f} requests/s, "
+                      f"latency p50 {latency['p50']:.2f} ms p99 {latency['p99']:.2f} ms, "
+                      f"{result['server']['requests_per_batch']:.1f} requests per batch so far")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    bench_grid_engine()
+    bench_rheology()
+    bench_sweep()
+    bench_parallel()
+    bench_sensitivity()
+    bench_monte_carlo()
+    bench_flow1d()
+    bench_kernels()
+    bench_stepper()
+    bench_plotting()
+    bench_result_cache()
+    bench_results_store()
+    bench_inverse()
+    bench_adaptive()
+    bench_cohort()
+    bench_timeseries()
+    bench_network()
+    bench_profiles()
+    bench_pulsatile()
+    bench_fitting()
+    bench_lookup()
+    bench_service()
@@ -0,0 +1,122 @@
+import csv
+import math
+
+import numpy as np
+
+from flow1d import initial_state
+from grid_engine import shear_surfaces
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+from sweep import MinMax, ThresholdCount
+
+# Problem setups and reference implementations shared by the test_*.py checks
+# (python -m pytest), the exploratory timings in benchmarks.py and the
+# regression suite in bench_suite.py.
+
+
+# Test2.py aorta constants
+TEST2 = dict(tau_yield=6.31, mu_bp=0.01, k=3.64, n_pl=0.36, mu=0.0035, r=0.025,
+             sintheta=math.sin(math.radians(45)), l=0.3, rho=1060)
+
+
+# Original nested loops from Test2.py, kept as the reference implementation
+def loop_surfaces(g, gamma, tau_yield, mu_bp, k, n_pl, mu, r, sintheta, l, rho):
+    tau_bp = np.zeros((len(g), len(gamma)))
+    for i, gi in enumerate(g):
+        for j in range(len(gamma)):
+            if gamma[j] > tau_yield / mu_bp + gi * sintheta * r * rho / mu:
+                tau_bp[i, j] = tau_yield + mu_bp * (gamma[j] - tau_yield / mu_bp) + gi * sintheta * r * rho
+            else:
+                tau_bp[i, j] = mu_bp * gamma[j] + gi * sintheta * r * rho
+
+    tau_pl = np.zeros((len(g), len(gamma)))
+    for i, gi in enumerate(g):
+        for j in range(len(gamma)):
+            tau_pl[i, j] = k * gamma[j] ** n_pl + gi * sintheta * r * rho / (2 * mu) * gamma[j] ** (n_pl + 1) * r ** 2 / l
+
+    return tau_bp, tau_pl
+
+
+def surface_axes(n_g, n_gamma):
+    g = np.linspace(0, 10, n_g, endpoint=False)
+    gamma = np.logspace(np.log10(0.1), np.log10(1000), num=n_gamma)
+    return g, gamma
+
+
+def sweep_axes(n_g=100, n_theta=36, n_r=20, n_p=5, n_m=4):
+    return [("g", np.linspace(0, 40, n_g)), ("theta", np.linspace(-90, 90, n_theta)),
+            ("r", np.linspace(.001, .003, n_r)), ("p", np.linspace(8000, 16000, n_p)),
+            ("m", np.linspace(.01, .03, n_m))]
+
+
+def sweep_reducers():
+    return [MinMax(), ThresholdCount(0.6)]
+
+
+def flow_state(N, seed=0):
+    rng = np.random.default_rng(seed)
+    u, p = initial_state(N)
+    u[1:-1] = rng.uniform(-0.5, 1.0, N - 1)
+    p[1:-1] = rng.uniform(-100, 100, N - 1)
+    return u, p
+
+
+def surface_figure(n_g, n_gamma):
+    g, gamma = surface_axes(n_g, n_gamma)
+    tau_bp, tau_pl = shear_surfaces(g, gamma, **TEST2)
+    return {"nrows": 1, "ncols": 2, "figsize": (12, 4),
+            "panels": [{"series": [{"x": gamma, "y": tau_bp, "linewidth": 1.0}]},
+                       {"series": [{"x": gamma, "y": tau_pl, "linewidth": 1.0}]}]}
+
+
+def interpolation_error(model, x, y, dense, theta):
+    exact = wall_shear_stress(model, dense, theta, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+    return np.abs(np.interp(dense, x, y) - exact).max()
+
+
+# Ids include commas and quotes, which the CSV files must quote
+def cohort_table(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {"id": np.array([f'LAD, "seg{i}"' if i % 7 == 0 else f"seg{i}" for i in range(n)]),
+            "r": rng.uniform(.001, .003, n), "l": rng.uniform(.01, .1, n), "theta": rng.uniform(-90, 90, n),
+            "p": rng.uniform(8000, 16000, n), "m": rng.uniform(.01, .03, n)}
+
+
+def write_cohort_csv(path, table):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(table)
+        writer.writerows(zip(*(np.asarray(values).astype(str) for values in table.values())))
+
+
+# A CSV file as {column: list of strings}
+def read_csv_columns(path):
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    return {name: list(values) for name, values in zip(rows[0], zip(*rows[1:]))}
+
+
+# Synthetic rheometer curves over Test2.py's shear-rate axis: true constants
+# and stresses with log-normal noise
+def rheometer_curves(model, n, gamma, noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    u = lambda lo, hi: rng.uniform(lo, hi, n)
+    true = {
+        "power_law": lambda: {"m": u(.01, 5), "n": u(.3, 1)},
+        "bingham": lambda: {"ys": u(0, 8), "mu": u(.003, .02)},
+        "cross": lambda: {"mu_0": u(.002, .005), "k_0": u(.05, .15), "k_inf": u(.005, .02), "g_c": u(20, 200),
+                          "a": u(.7, 1.5)},
+        "carreau_yasuda": lambda: {"eta_0": u(.05, .2), "eta_inf": u(.003, .005), "lam": u(2, 10), "n": u(.2, .5),
+                                   "a": u(1, 3)},
+    }[model]()
+    p = {name: value[:, None] for name, value in true.items()}
+    if model == "power_law":
+        tau = p["m"] * gamma ** p["n"]
+    elif model == "bingham":
+        tau = p["ys"] + p["mu"] * gamma
+    elif model == "cross":
+        k = p["k_inf"] + (p["k_0"] - p["k_inf"]) / (1 + (gamma / p["g_c"]) ** p["a"])
+        tau = p["mu_0"] * (gamma / 100) ** (k - 1) * gamma
+    else:
+        B = 1 + (p["lam"] * gamma) ** p["a"]
+        tau = (p["eta_inf"] + (p["eta_0"] - p["eta_inf"]) * B ** ((p["n"] - 1) / p["a"])) * gamma
+    return true, tau * np.exp(rng.normal(0, noise, tau.shape))
@@ -0,0 +1,173 @@
+import csv
+import itertools
+import os
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+from profiling import stage
+from rheology import MODEL_PY_PARAMS, MODELS, wall_shear_stress
+from sweep import DEFAULT_FIXED, GEOMETRY
+
+# Wall shear stress for cohorts of vessel segments, one table row per segment.
+# Tables are CSV (read and written with the csv module, so ids may be quoted
+# and hold commas) or Parquet (needs pyarrow) with a header naming the
+# columns: any of the geometry g, theta (degrees), r, p, l and the
+# rheology constants m, n, rho, ys, mu, scale, plus an optional non-numeric
+# "id" column that is copied through. Columns a table does not have take
+# their value from fixed / params. Tables are read, evaluated for every model
+# and written back chunk_rows rows at a time, so memory use is set by the
+# chunk size and the run time grows linearly with the number of segments.
+
+DEFAULT_CHUNK_ROWS = 2**16
+
+ID_COLUMN = "id"
+
+SEGMENT_COLUMNS = GEOMETRY + tuple(MODEL_PY_PARAMS)
+
+
+def _check_columns(names, path):
+    unknown = [name for name in names if name not in SEGMENT_COLUMNS and name != ID_COLUMN]
+    if unknown:
+        raise ValueError(f"unknown columns {unknown} in {path}, expected {ID_COLUMN!r} or any of {SEGMENT_COLUMNS}")
+
+
+def _read_csv(path, chunk_rows):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        _check_columns(header, path)
+        while True:
+            rows = []
+            for row in itertools.islice(reader, chunk_rows):
+                if not row:
+                    continue
+                if len(row) != len(header):
+                    raise ValueError(f"line {reader.line_num} of {path} has {len(row)} fields, "
+                                     f"its header has {len(header)}")
+                rows.append(row)
+            if not rows:
+                return
+            columns = list(zip(*rows))
+            yield {name: np.array(values, dtype=str if name == ID_COLUMN else float)
+                   for name, values in zip(header, columns)}
+
+
+def _read_parquet(path, chunk_rows):
+    if pyarrow is None:
+        raise ImportError("reading Parquet tables needs pyarrow, which is not installed")
+    table = pq.ParquetFile(path)
+    _check_columns(table.schema_arrow.names, path)
+    for batch in table.iter_batches(batch_size=chunk_rows):
+        yield {name: column.to_numpy(zero_copy_only=False) for name, column in zip(batch.schema.names, batch.columns)}
+
+
+# Chunks of a cohort table as {column: array}; source is a .csv or .parquet
+# path or an in-memory {column: array} table
+def iter_segments(source, chunk_rows=DEFAULT_CHUNK_ROWS):
+    if isinstance(source, dict):
+        _check_columns(source, "table")
+        columns = {name: np.asarray(values) for name, values in source.items()}
+        size = len(next(iter(columns.values())))
+        for start in range(0, size, chunk_rows):
+            yield {name: values[start:start + chunk_rows] for name, values in columns.items()}
+        return
+
+    extension = os.path.splitext(source)[1].lower()
+    if extension == ".csv":
+        yield from _read_csv(source, chunk_rows)
+    elif extension in (".parquet", ".pq"):
+        yield from _read_parquet(source, chunk_rows)
+    else:
+        raise ValueError(f"unsupported table format {extension!r}, expected .csv or .parquet")
+
+
+# WSS of every model for one chunk of segments, as {model: array}
+def evaluate_segments(chunk, models=tuple(MODELS), params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED):
+    size = len(next(iter(chunk.values())))
+    geometry = [chunk.get(name, fixed[name]) for name in GEOMETRY]
+    constants = {name: chunk.get(name, value) for name, value in params.items()}
+    with stage("evaluation", size * len(models)):
+        return {model: np.broadcast_to(wall_shear_stress(model, *geometry, constants), (size,)) for model in models}
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        self.writer.writerow(columns)
+
+    # numpy's str() of a float is its shortest round-tripping repr
+    def write(self, columns):
+        self.writer.writerows(zip(*(np.asarray(values).astype(str) for values in columns.values())))
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path, columns):
+        if pyarrow is None:
+            raise ImportError("writing Parquet tables needs pyarrow, which is not installed")
+        self.path = path
+        self.writer = None
+
+    def write(self, columns):
+        table = pyarrow.table({name: np.asarray(values) for name, values in columns.items()})
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _writer(path, columns):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return _CsvWriter(path, columns)
+    if extension in (".parquet", ".pq"):
+        return _ParquetWriter(path, columns)
+    raise ValueError(f"unsupported table format {extension!r}, expected .csv or .parquet")
+
+
+# Evaluates every segment of source for each model and writes one row per
+# segment to out (id if the source has one, then <model> and
+# <model>_below for each model). Returns cohort totals: segment count and,
+# per model, how many segments fall below threshold and the WSS range.
+def run_cohort(source, out, models=tuple(MODELS), params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED, threshold=0.6,
+               chunk_rows=DEFAULT_CHUNK_ROWS):
+    for model in models:
+        if model not in MODELS:
+            raise ValueError(f"unknown model {model!r}, expected one of {sorted(MODELS)}")
+    summary = {"segments": 0, "models": {model: {"below": 0, "min": np.inf, "max": -np.inf} for model in models}}
+    writer = None
+    try:
+        for chunk in iter_segments(source, chunk_rows):
+            tau = evaluate_segments(chunk, models, params, fixed)
+            columns = {ID_COLUMN: chunk[ID_COLUMN]} if ID_COLUMN in chunk else {}
+            for model in models:
+                below = tau[model] < threshold
+                columns[model] = tau[model]
+                columns[model + "_below"] = below.astype(np.int8)
+                totals = summary["models"][model]
+                totals["below"] += int(below.sum())
+                if len(below):
+                    totals["min"] = min(totals["min"], float(tau[model].min()))
+                    totals["max"] = max(totals["max"], float(tau[model].max()))
+            summary["segments"] += len(tau[models[0]])
+
+            with stage("io"):
+                if writer is None:
+                    writer = _writer(out, list(columns))
+                writer.write(columns)
+    finally:
+        if writer is not None:
+            writer.close()
+    return summary
@@ -0,0 +1,259 @@
+import numpy as np
+
+from cohort import ID_COLUMN
+from profiling import stage
+
+# Rheology constants fitted to rheometer curves (shear rate gamma in 1/s
+# against shear stress tau in Pa), many curves at once. tau is (curves,
+# points); gamma is one shared axis (points,) such as Test2.py's logspace
+# axis, or (curves, points). NaN marks a missing point, so curves of
+# different lengths can share one array; points with gamma or tau <= 0 are
+# ignored too.
+#
+#   power_law        tau = m gamma^n                 log-linear least squares
+#   bingham          tau = ys + mu gamma             linear least squares, ys >= 0
+#   cross            Test.py viscosity at the reference radius,
+#                    eta = mu_0 (gamma/100)^(k - 1),
+#                    k = k_inf + (k_0 - k_inf) / (1 + (gamma/g_c)^a)
+#   carreau_yasuda   eta = eta_inf + (eta_0 - eta_inf) (1 + (lam gamma)^a)^((n - 1)/a)
+#
+# The first two have closed forms. The viscosity models are fitted to log tau
+# (so every decade of shear rate counts alike) by Levenberg-Marquardt with
+# analytic Jacobians, stepping all unconverged curves together: each
+# iteration is one batched normal-equation solve. Positive constants are
+# fitted as logarithms. Measured shear rates are positive, so the cross model
+# is fitted as Test.py writes it; flow1d's opt-in gamma_min only applies
+# where flow1d consumes the fitted constants.
+#
+# Fitted constants are named as in rheology.MODEL_PY_PARAMS (m, n; ys, mu)
+# and flow1d.TEST_PY (cross). Only some of them feed the WSS expressions of
+# rheology.py: m and n of the power law, and ys of the Bingham plastic, whose
+# expression divides by the empirical scale and never reads mu. The cross and
+# Carreau-Yasuda constants have no WSS expression there at all.
+# parameter_table() turns power-law and Bingham fits into cohort.py tables of
+# just those columns, so run_cohort evaluates every curve's fluid.
+
+
+def _prepare(gamma, tau):
+    tau = np.atleast_2d(np.asarray(tau, dtype=float))
+    gamma = np.broadcast_to(np.asarray(gamma, dtype=float), tau.shape)
+    valid = np.isfinite(gamma) & np.isfinite(tau) & (gamma > 0) & (tau > 0)
+    if np.any(valid.sum(axis=1) < 2):
+        raise ValueError("every curve needs at least two points with positive shear rate and stress")
+    return gamma, tau, valid
+
+
+# Weighted straight-line fit y = a + b x per row
+def _line(x, y, w):
+    sw, sx, sy = w.sum(axis=1), (w * x).sum(axis=1), (w * y).sum(axis=1)
+    sxx, sxy = (w * x * x).sum(axis=1), (w * x * y).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        b = (sw * sxy - sx * sy) / (sw * sxx - sx ** 2)
+    return (sy - b * sx) / sw, b
+
+
+def _summary(residual, target, valid):
+    rss = np.where(valid, residual ** 2, 0).sum(axis=1)
+    count = valid.sum(axis=1)
+    mean = np.where(valid, target, 0).sum(axis=1) / count
+    tss = np.where(valid, (target - mean[:, None]) ** 2, 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = 1 - rss / tss
+    return {"rss": rss, "r2": r2, "points": count}
+
+
+def fit_power_law(gamma, tau):
+    gamma, tau, valid = _prepare(gamma, tau)
+    x = np.log(np.where(valid, gamma, 1.0))
+    y = np.log(np.where(valid, tau, 1.0))
+    log_m, n = _line(x, y, valid.astype(float))
+    fit = _summary(y - log_m[:, None] - n[:, None] * x, y, valid)
+    return dict(fit, params={"m": np.exp(log_m), "n": n}, iterations=np.zeros(len(n), dtype=np.int64),
+                converged=np.ones(len(n), dtype=bool))
+
+
+def fit_bingham(gamma, tau):
+    gamma, tau, valid = _prepare(gamma, tau)
+    w = valid.astype(float)
+    x, y = np.where(valid, gamma, 0.0), np.where(valid, tau, 0.0)
+    ys, mu = _line(x, y, w)
+    # a negative intercept means no yield stress: refit through the origin
+    through_origin = (w * x * y).sum(axis=1) / (w * x * x).sum(axis=1)
+    mu = np.where(ys < 0, through_origin, mu)
+    ys = np.maximum(ys, 0.0)
+    fit = _summary(y - ys[:, None] - mu[:, None] * x, y, valid)
+    return dict(fit, params={"ys": ys, "mu": mu}, iterations=np.zeros(len(mu), dtype=np.int64),
+                converged=np.ones(len(mu), dtype=bool))
+
+
+# log tau and its derivatives for the cross model; parameters are
+# [log mu_0, k_0, k_inf, log g_c, log a]
+def _cross(theta, gamma):
+    log_mu, k_0, k_inf, log_gc, log_a = (theta[:, i, None] for i in range(5))
+    a = np.exp(log_a)
+    L = np.log(gamma / 100)
+    ratio = np.log(gamma) - log_gc
+    q = np.exp(a * ratio)
+    D = 1 + q
+    k = k_inf + (k_0 - k_inf) / D
+    value = log_mu + (k - 1) * L + np.log(gamma)
+    spread = L * (k_0 - k_inf) * a * q / D ** 2
+    jacobian = np.stack(np.broadcast_arrays(np.ones_like(value), L / D, L * q / D, spread, -spread * ratio), axis=-1)
+    return value, jacobian
+
+
+# log tau and its derivatives for Carreau-Yasuda; parameters are
+# [log eta_0, log eta_inf, log lam, n, log a]
+def _carreau_yasuda(theta, gamma):
+    log_eta0, log_etainf, log_lam, n, log_a = (theta[:, i, None] for i in range(5))
+    eta_0, eta_inf, a = np.exp(log_eta0), np.exp(log_etainf), np.exp(log_a)
+    ratio = log_lam + np.log(gamma)
+    q = np.exp(a * ratio)
+    B = 1 + q
+    log_B = np.log1p(q)
+    E = np.exp((n - 1) / a * log_B)
+    delta = eta_0 - eta_inf
+    eta = eta_inf + delta * E
+    value = np.log(eta * gamma)
+    jacobian = np.stack(np.broadcast_arrays(eta_0 * E, eta_inf * (1 - E), delta * E * (n - 1) * q / B,
+                                            delta * E * log_B / a,
+                                            delta * E * (n - 1) * (q * ratio / B - log_B / a)), axis=-1) / eta[..., None]
+    return value, jacobian
+
+
+# Starting points from straight-line fits of log viscosity over the lower and
+# upper halves of each curve
+def _cross_start(gamma, tau, valid):
+    log_eta = np.log(np.where(valid, tau / gamma, 1.0))
+    L = np.log(np.where(valid, gamma, 1.0) / 100)
+    log_mu, slope = _line(L, log_eta, valid.astype(float))
+    middle = np.nanmedian(np.where(valid, np.log(gamma), np.nan), axis=1)
+    low = valid & (np.log(gamma) <= middle[:, None])
+    high = valid & (np.log(gamma) >= middle[:, None])
+    slope_low = _line(L, log_eta, low.astype(float))[1]
+    slope_high = _line(L, log_eta, high.astype(float))[1]
+    slope_low = np.where(np.isfinite(slope_low), slope_low, slope + 0.05)
+    slope_high = np.where(np.isfinite(slope_high), slope_high, slope - 0.05)
+    return np.stack([log_mu, slope_low + 1, slope_high + 1, middle, np.zeros_like(middle)], axis=1)
+
+
+def _carreau_yasuda_start(gamma, tau, valid):
+    log_eta = np.where(valid, np.log(np.where(valid, tau / gamma, 1.0)), np.nan)
+    top, bottom = np.nanmax(log_eta, axis=1), np.nanmin(log_eta, axis=1)
+    # lam from the shear rate where the viscosity is halfway (in log) between its extremes
+    halfway = np.nanargmin(np.abs(log_eta - (top + bottom)[:, None] / 2), axis=1)
+    log_lam = -np.log(gamma[np.arange(len(gamma)), halfway])
+    return np.stack([top + 0.05, bottom - np.log(2), log_lam, np.full_like(top, 0.3), np.full_like(top, np.log(2))],
+                    axis=1)
+
+
+def _cross_params(theta):
+    return {"mu_0": np.exp(theta[:, 0]), "k_0": theta[:, 1], "k_inf": theta[:, 2], "g_c": np.exp(theta[:, 3]),
+            "a": np.exp(theta[:, 4])}
+
+
+def _carreau_yasuda_params(theta):
+    return {"eta_0": np.exp(theta[:, 0]), "eta_inf": np.exp(theta[:, 1]), "lam": np.exp(theta[:, 2]),
+            "n": theta[:, 3], "a": np.exp(theta[:, 4])}
+
+
+LOG_MODELS = {
+    "cross": (_cross, _cross_start, _cross_params),
+    "carreau_yasuda": (_carreau_yasuda, _carreau_yasuda_start, _carreau_yasuda_params),
+}
+
+
+# Batched Levenberg-Marquardt on residual(theta) = model - target over the
+# valid points of each curve. Returns theta, the residuals and per-curve
+# iteration counts and convergence flags.
+def levenberg_marquardt(model, theta, gamma, target, valid, max_iter=200, ftol=1e-12, xtol=1e-10, max_step=1.0):
+    theta = theta.copy()
+    size, k = theta.shape
+    w = valid.astype(float)
+    damping = np.full(size, 1e-3)
+    iterations = np.zeros(size, dtype=np.int64)
+    converged = np.zeros(size, dtype=bool)
+    value, jacobian = model(theta, gamma)
+    residual = np.where(valid, value - target, 0.0)
+    cost = (residual ** 2).sum(axis=1)
+    active = np.arange(size)
+
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        J = jacobian[active] * w[active, :, None]
+        A = np.einsum("cpi,cpj->cij", J, J)
+        b = np.einsum("cpi,cp->ci", J, residual[active])
+        scale = np.diagonal(A, axis1=1, axis2=2) + 1e-12
+        A_damped = A + damping[active, None, None] * scale[:, None, :] * np.eye(k)
+        step = -np.linalg.solve(A_damped, b[..., None])[..., 0]
+        # no parameter moves by more than max_step at once (a factor e^max_step
+        # for the logarithmic ones)
+        step *= np.minimum(1, max_step / np.abs(step).max(axis=1))[:, None]
+
+        trial = theta[active] + step
+        with np.errstate(all="ignore"):
+            trial_value, trial_jacobian = model(trial, gamma[active])
+            trial_residual = np.where(valid[active], trial_value - target[active], 0.0)
+            trial_cost = (trial_residual ** 2).sum(axis=1)
+        accept = np.isfinite(trial_cost) & np.isfinite(trial_jacobian).all(axis=(1, 2)) & (trial_cost <= cost[active])
+        iterations[active] += 1
+
+        done = accept & ((cost[active] - trial_cost <= ftol * np.maximum(cost[active], 1e-300))
+                         | (np.abs(step).max(axis=1) <= xtol * (1 + np.abs(theta[active]).max(axis=1))))
+        taken = active[accept]
+        theta[taken] = trial[accept]
+        value[taken], jacobian[taken] = trial_value[accept], trial_jacobian[accept]
+        residual[taken], cost[taken] = trial_residual[accept], trial_cost[accept]
+        damping[active] = np.where(accept, np.maximum(damping[active] / 3, 1e-12), damping[active] * 4)
+        # a curve whose damping blows up cannot improve any more
+        stalled = ~accept & (damping[active] > 1e12)
+        converged[active[done | stalled]] = True
+        active = active[~(done | stalled)]
+    return theta, residual, iterations, converged
+
+
+def fit_viscosity(model, gamma, tau, max_iter=200):
+    if model not in LOG_MODELS:
+        raise ValueError(f"unknown model {model!r}, expected one of {sorted(LOG_MODELS)}")
+    residual_model, start, params = LOG_MODELS[model]
+    gamma, tau, valid = _prepare(gamma, tau)
+    gamma = np.where(valid, gamma, 1.0)
+    target = np.log(np.where(valid, tau, 1.0))
+    theta, residual, iterations, converged = levenberg_marquardt(residual_model, start(gamma, tau, valid), gamma,
+                                                                 target, valid, max_iter)
+    fit = _summary(residual, target, valid)
+    return dict(fit, params=params(theta), iterations=iterations, converged=converged)
+
+
+FITS = {"power_law": fit_power_law, "bingham": fit_bingham}
+
+
+# Fits model to every curve; returns {"params": {name: (curves,)}, "rss",
+# "r2", "points", "iterations", "converged"}, with rss and r2 in log tau for
+# the viscosity models. A curve that does not pin down all constants (say a
+# cross curve that never reaches g_c) drifts along a flat valley and comes
+# back with converged False after max_iter iterations.
+def fit_curves(model, gamma, tau, max_iter=200):
+    size = np.atleast_2d(tau).shape[0]
+    with stage("fitting", size):
+        if model in FITS:
+            fit = FITS[model](gamma, tau)
+        else:
+            fit = fit_viscosity(model, gamma, tau, max_iter)
+    return dict(fit, model=model)
+
+
+# Fitted constants the WSS expressions of rheology.py read, per model
+TABLE_COLUMNS = {"power_law": ("m", "n"), "bingham": ("ys",)}
+
+
+# A power-law or Bingham fit as a cohort.py table (one row per curve),
+# optionally with curve ids
+def parameter_table(fit, ids=None):
+    if fit["model"] not in TABLE_COLUMNS:
+        raise ValueError(f"{fit['model']} constants do not enter any WSS model of rheology.py; "
+                         f"tables can be made from {sorted(TABLE_COLUMNS)} fits")
+    table = {} if ids is None else {ID_COLUMN: np.asarray(ids)}
+    table.update({name: fit["params"][name] for name in TABLE_COLUMNS[fit["model"]]})
+    return table
@@ -0,0 +1,311 @@
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+
+import kernels
+from profiling import count, stage
+
+# 1D blood flow model from Test.py: velocity u and pressure p on N + 1 nodes
+# over a domain of length L, with a velocity-dependent vessel radius, a Cross
+# model for the power-law index and a Carreau-Yasuda style viscosity.
+#
+# Test.py mixes node arrays (u, p, r, Q) with face arrays (gamma, dpdx) of one
+# element less and reuses p both as the Cross model exponent and as the
+# pressure array, so it stops with a broadcasting error. Here everything that
+# enters the viscosity lives on the N faces between nodes (r is evaluated from
+# the face-averaged |u|), and the face forcing is averaged back onto interior
+# nodes.
+#
+# The radius law has a singular power at u = 0, floored with EPS the way
+# Test.py already guards Q. Beyond that TEST_PY keeps Test.py's equations as
+# written, and from rest they cannot be integrated: the viscosity is infinite
+# at gamma = 0 and the u-p coupling amplifies grid-scale oscillations at any
+# time step. Two regularizations are opt-in through the constants: gamma_min
+# replaces |gamma| by sqrt(gamma^2 + gamma_min^2) in the viscosity and nu adds
+# a numerical diffusivity to u and p. REGULARIZED turns both on. They are
+# numerical, not physical (nu = 1e-3 m^2/s is about 300 times the kinematic
+# viscosity of blood and gamma_min = 1/s changes the viscosity wherever
+# |gamma| is below a few 1/s), so results computed with them differ from
+# Test.py's model there. With nu > 0 explicit stepping is stable below
+# dt = dx^2 / (2 nu); solve() integrates with an implicit adaptive-step
+# method instead.
+
+# Constants from Test.py
+TEST_PY = {
+    "rho": 1060.0,  # Blood density
+    "mu_0": 0.0035,  # Reference viscosity
+    "tau_0": 0.015,  # Yield stress
+    "k_0": 0.1,  # Power-law index: low shear rates
+    "k_inf": 0.01,  # Power-law index: high shear rates
+    "g_c": 100,  # Characteristic shear rate
+    "a": 1.0,  # Cross model exponent (p in Test.py)
+    "g": 9.81,  # g
+    "r_0": 0.005,  # Reference vessel radius
+    "Q_0": 0.00001,  # Reference flow rate
+    "L": 0.02,  # Domain
+    "gamma_min": 0.0,  # Regularization shear rate for the viscosity (1/s), off
+    "nu": 0.0,  # Numerical diffusivity (m^2/s), off
+}
+
+# TEST_PY with both regularizations on, which integrates from rest
+REGULARIZED = dict(TEST_PY, gamma_min=1.0, nu=1e-3)
+
+EPS = 1e-12
+
+
+def vessel_radius(u, c=TEST_PY):
+    k_0 = c["k_0"]
+    base = 1 + (k_0 - 1) * ((np.abs(u) + EPS) / c["tau_0"]) ** (k_0 - 1)
+    return c["r_0"] * np.maximum(base, EPS) ** (1 / (k_0 - 1) + EPS)
+
+
+def flow_rate(r, c=TEST_PY):
+    return c["Q_0"] * (r / c["r_0"]) ** 4 + EPS
+
+
+# Cross model for the power-law index
+def cross_index(gamma, c=TEST_PY):
+    return c["k_inf"] + (c["k_0"] - c["k_inf"]) / (1 + (np.abs(gamma) / c["g_c"]) ** c["a"])
+
+
+# Carreau-Yasuda style viscosity
+def viscosity(r, gamma, k, c=TEST_PY):
+    shear = np.sqrt(gamma ** 2 + c["gamma_min"] ** 2)
+    return c["mu_0"] * (c["r_0"] / r) ** 4 * (shear / 100) ** (k - 1)
+
+
+# Shear rate, pressure gradient, flow rate and viscosity on the N faces
+def face_terms(u, p, dx, c=TEST_PY):
+    gamma = (u[1:] - u[:-1]) / dx
+    dpdx = (p[1:] - p[:-1]) / dx
+    r = vessel_radius(0.5 * (np.abs(u[1:]) + np.abs(u[:-1])), c)
+    Q = flow_rate(r, c)
+    mu = viscosity(r, gamma, cross_index(gamma, c), c)
+    return gamma, dpdx, Q, mu
+
+
+# Time derivatives of u and p; boundary nodes are held at zero. The numba
+# backend wins on small grids like Test.py's (about 4x at N = 100) but its
+# scalar pow calls lose to numpy's vectorized ones beyond a few thousand nodes.
+def rates(u, p, dx, c=TEST_PY, backend="numpy"):
+    if kernels.resolve_backend(backend) == "numba":
+        dudt = np.empty_like(u)
+        dpdt = np.empty_like(p)
+        kernels.flow_rates(u, p, dx, c["rho"], c["mu_0"], c["tau_0"], c["k_0"], c["k_inf"], c["g_c"],
+                           c["a"], c["g"], c["r_0"], c["Q_0"], c["gamma_min"], c["nu"], EPS, dudt, dpdt)
+        return dudt, dpdt
+
+    gamma, dpdx, Q, mu = face_terms(u, p, dx, c)
+    force = -1 / c["rho"] * (dpdx + 2 * mu * gamma / Q) + c["g"]
+    dudt = np.zeros_like(u)
+    dpdt = np.zeros_like(p)
+    dudt[1:-1] = 0.5 * (force[1:] + force[:-1]) + c["nu"] * (gamma[1:] - gamma[:-1]) / dx
+    dpdt[1:-1] = -c["rho"] * 0.5 * (gamma[1:] + gamma[:-1]) * u[1:-1] + c["nu"] * (dpdx[1:] - dpdx[:-1]) / dx
+    return dudt, dpdt
+
+
+# Wall shear stress mu * gamma on the faces
+def shear_stress(u, p, dx, c=TEST_PY):
+    gamma, _, _, mu = face_terms(u, p, dx, c)
+    return mu * gamma
+
+
+# Largest explicit Euler step the numerical diffusion allows, times safety
+def stable_dt(N, c=TEST_PY, safety=0.5):
+    if c["nu"] <= 0:
+        raise ValueError("explicit stepping needs a numerical diffusivity nu > 0")
+    dx = c["L"] / N
+    return safety * dx ** 2 / (2 * c["nu"])
+
+
+def initial_state(N):
+    return np.zeros(N + 1), np.zeros(N + 1)
+
+
+# Test.py's explicit Euler time loop restructured around preallocated work
+# buffers. Every face and node quantity has its own array, created once, and
+# each step is a fixed sequence of ufunc calls with out= arguments on views
+# that are also created once, so steady-state stepping allocates nothing.
+# Only stable for dt < dx^2 / (2 nu).
+class FlowStepper:
+    def __init__(self, N=100, dt=0.00001, c=TEST_PY, backend="numpy"):
+        self.N = N
+        self.dt = dt
+        self.c = c
+        self.dx = c["L"] / N
+        self.backend = kernels.resolve_backend(backend)
+        self.t = 0.0
+
+        self.u, self.p = initial_state(N)
+        self.dudt = np.zeros(N + 1)
+        self.dpdt = np.zeros(N + 1)
+        self.speed = np.zeros(N + 1)
+
+        # face buffers
+        self.gamma = np.zeros(N)
+        self.dpdx = np.zeros(N)
+        self.r = np.zeros(N)
+        self.Q = np.zeros(N)
+        self.k = np.zeros(N)
+        self.mu = np.zeros(N)
+        self.force = np.zeros(N)
+        self.work = np.zeros(N)
+        self.tau = np.zeros(N)
+
+        # views reused every step
+        self._u_right, self._u_left, self._u_inner = self.u[1:], self.u[:-1], self.u[1:-1]
+        self._p_right, self._p_left = self.p[1:], self.p[:-1]
+        self._speed_right, self._speed_left = self.speed[1:], self.speed[:-1]
+        self._dudt_inner, self._dpdt_inner = self.dudt[1:-1], self.dpdt[1:-1]
+        self._work_inner = self.work[:-1]
+
+    # dudt and dpdt for the current state, written into self.dudt / self.dpdt
+    def rates(self):
+        c, dx = self.c, self.dx
+        if self.backend == "numba":
+            kernels.flow_rates(self.u, self.p, dx, c["rho"], c["mu_0"], c["tau_0"], c["k_0"], c["k_inf"],
+                               c["g_c"], c["a"], c["g"], c["r_0"], c["Q_0"], c["gamma_min"], c["nu"], EPS,
+                               self.dudt, self.dpdt)
+            return self.dudt, self.dpdt
+
+        self._face_terms()
+        gamma, dpdx, work, force = self.gamma, self.dpdx, self._work_inner, self.force
+
+        # force = -1/rho * (dpdx + 2 mu gamma / Q) + g
+        np.multiply(self.mu, gamma, out=force)
+        force *= 2
+        force /= self.Q
+        force += dpdx
+        force *= -1 / c["rho"]
+        force += c["g"]
+
+        # node average of the face force plus numerical diffusion of u
+        np.add(force[1:], force[:-1], out=self._dudt_inner)
+        self._dudt_inner *= 0.5
+        np.subtract(gamma[1:], gamma[:-1], out=work)
+        work *= c["nu"] / dx
+        self._dudt_inner += work
+
+        # -rho * (node averaged gamma) * u plus numerical diffusion of p
+        np.add(gamma[1:], gamma[:-1], out=self._dpdt_inner)
+        self._dpdt_inner *= -c["rho"] * 0.5
+        self._dpdt_inner *= self._u_inner
+        np.subtract(dpdx[1:], dpdx[:-1], out=work)
+        work *= c["nu"] / dx
+        self._dpdt_inner += work
+        return self.dudt, self.dpdt
+
+    # gamma, dpdx, r, Q and mu on the faces, the in-place form of face_terms()
+    def _face_terms(self):
+        c, dx = self.c, self.dx
+        k_0 = c["k_0"]
+        gamma, r, k, mu, work = self.gamma, self.r, self.k, self.mu, self.work
+
+        np.subtract(self._u_right, self._u_left, out=gamma)
+        gamma /= dx
+        np.subtract(self._p_right, self._p_left, out=self.dpdx)
+        self.dpdx /= dx
+
+        # vessel_radius of the face-averaged |u|
+        np.abs(self.u, out=self.speed)
+        np.add(self._speed_right, self._speed_left, out=r)
+        r *= 0.5
+        r += EPS
+        r /= c["tau_0"]
+        np.power(r, k_0 - 1, out=r)
+        r *= k_0 - 1
+        r += 1
+        np.maximum(r, EPS, out=r)
+        np.power(r, 1 / (k_0 - 1) + EPS, out=r)
+        r *= c["r_0"]
+
+        # flow_rate
+        np.divide(r, c["r_0"], out=self.Q)
+        np.power(self.Q, 4, out=self.Q)
+        self.Q *= c["Q_0"]
+        self.Q += EPS
+
+        # cross_index, stored as k - 1 for the viscosity exponent
+        np.abs(gamma, out=k)
+        k /= c["g_c"]
+        np.power(k, c["a"], out=k)
+        k += 1
+        np.divide(k_0 - c["k_inf"], k, out=k)
+        k += c["k_inf"] - 1
+
+        # viscosity
+        np.multiply(gamma, gamma, out=work)
+        work += c["gamma_min"] ** 2
+        np.sqrt(work, out=work)
+        work /= 100
+        np.power(work, k, out=mu)
+        np.divide(c["r_0"], r, out=work)
+        np.power(work, 4, out=work)
+        mu *= work
+        mu *= c["mu_0"]
+
+    def step(self, steps=1):
+        for _ in range(steps):
+            self.rates()
+            self.dudt *= self.dt
+            self.dpdt *= self.dt
+            self.u += self.dudt
+            self.p += self.dpdt
+            self.t += self.dt
+        return self.u, self.p
+
+    # Wall shear stress mu * gamma on the faces, written into self.tau
+    def shear_stress(self):
+        self._face_terms()
+        np.multiply(self.mu, self.gamma, out=self.tau)
+        return self.tau
+
+
+# Test.py's explicit Euler stepping; only stable for dt < dx^2 / (2 nu)
+def explicit_euler(N=100, dt=0.00001, steps=100000, c=TEST_PY, backend="numpy"):
+    stepper = FlowStepper(N, dt, c, backend)
+    with stage("stepping", steps):
+        stepper.step(steps)
+    return stepper.u, stepper.p
+
+
+# Sparsity of d(rates)/d(state) for the state vector [u, p]: every node only
+# sees itself and its two neighbours in u and p
+def jacobian_sparsity(N):
+    band = sparse.diags([1, 1, 1], [-1, 0, 1], shape=(N + 1, N + 1), dtype=np.int8)
+    return sparse.bmat([[band, band], [band, band]], format="csr")
+
+
+# Integrates to t_end with an implicit adaptive-step scheme (BDF by default)
+# using a sparse finite-difference Jacobian; returns u, p and run statistics
+def solve(N=100, t_end=1.0, c=TEST_PY, method="BDF", rtol=1e-6, atol=1e-9, backend="numpy"):
+    dx = c["L"] / N
+
+    def fun(t, y):
+        dudt, dpdt = rates(y[:N + 1], y[N + 1:], dx, c, backend)
+        return np.concatenate([dudt, dpdt])
+
+    u, p = initial_state(N)
+    start = time.perf_counter()
+    with stage("stepping"):
+        sol = solve_ivp(fun, (0, t_end), np.concatenate([u, p]), method=method, rtol=rtol, atol=atol,
+                        jac_sparsity=jacobian_sparsity(N) if method in ("BDF", "Radau") else None)
+        count(sol.nfev)
+    elapsed = time.perf_counter() - start
+    if not sol.success:
+        raise RuntimeError(f"flow solver failed: {sol.message}")
+
+    u, p = sol.y[:N + 1, -1], sol.y[N + 1:, -1]
+    return {
+        "x": np.linspace(0, c["L"], N + 1),
+        "u": u,
+        "p": p,
+        "tau": shear_stress(u, p, dx, c),
+        "steps": len(sol.t) - 1,
+        "nfev": sol.nfev,
+        "njev": sol.njev,
+        "wall_time": elapsed,
+        "wall_per_sim_second": elapsed / t_end,
+    }
@@ -0,0 +1,66 @@
+import numpy as np
+
+import kernels
+
+# Broadcast (g x gamma) versions of the Bingham plastic and power law surfaces
+# from Test2.py. Rows are gravity values, columns are shear rates, and the
+# arithmetic is done in the same order as the original loops so float64
+# results match them to rounding.
+
+
+# Gravity contribution g * sin(theta) * r * rho as a column vector
+def gravity_term(g, sintheta, r, rho, dtype=np.float64):
+    g = np.asarray(g, dtype=dtype).reshape(-1, 1)
+    return g * sintheta * r * rho
+
+
+# Bingham plastic surface: yield branch above the gravity-shifted critical shear rate
+def bingham_block(grav, gamma, tau_yield, mu_bp, mu):
+    threshold = tau_yield / mu_bp + grav / mu
+    yielded = tau_yield + mu_bp * (gamma - tau_yield / mu_bp) + grav
+    unyielded = mu_bp * gamma + grav
+    return np.where(gamma > threshold, yielded, unyielded)
+
+
+# Power law surface, with the gamma-only factors precomputed once per call
+def power_law_block(grav, gamma_pow, gamma_pow1, k, mu, r, l):
+    return k * gamma_pow + grav / (2 * mu) * gamma_pow1 * r ** 2 / l
+
+
+# Rows of g handled per block so each temporary stays around chunk_bytes
+def default_chunk_rows(n_gamma, dtype=np.float64, chunk_bytes=64 * 2**20):
+    itemsize = np.dtype(dtype).itemsize
+    return max(1, int(chunk_bytes // (itemsize * max(n_gamma, 1))))
+
+
+# Returns (tau_bp, tau_pl), each of shape (len(g), len(gamma)). The numba
+# backend fills both surfaces in one fused loop and ignores chunk_rows.
+def shear_surfaces(g, gamma, tau_yield, mu_bp, k, n_pl, mu, r, sintheta, l, rho,
+                   dtype=np.float64, chunk_rows=None, backend="auto"):
+    g = np.asarray(g, dtype=dtype).ravel()
+    gamma = np.asarray(gamma, dtype=dtype).ravel()
+
+    if kernels.resolve_backend(backend) == "numba":
+        tau_bp = np.empty((len(g), len(gamma)), dtype=dtype)
+        tau_pl = np.empty((len(g), len(gamma)), dtype=dtype)
+        kernels.shear_surfaces(g, gamma, tau_yield, mu_bp, k, n_pl, mu, r, sintheta, l, rho, tau_bp, tau_pl)
+        return tau_bp, tau_pl
+
+    if chunk_rows is None:
+        chunk_rows = default_chunk_rows(len(gamma), dtype)
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1")
+
+    tau_bp = np.empty((len(g), len(gamma)), dtype=dtype)
+    tau_pl = np.empty((len(g), len(gamma)), dtype=dtype)
+
+    gamma_pow = gamma ** n_pl
+    gamma_pow1 = gamma ** (n_pl + 1)
+
+    for start in range(0, len(g), chunk_rows):
+        stop = min(start + chunk_rows, len(g))
+        grav = gravity_term(g[start:stop], sintheta, r, rho, dtype)
+        tau_bp[start:stop] = bingham_block(grav, gamma, tau_yield, mu_bp, mu)
+        tau_pl[start:stop] = power_law_block(grav, gamma_pow, gamma_pow1, k, mu, r, l)
+
+    return tau_bp, tau_pl
@@ -0,0 +1,109 @@
+import numpy as np
+
+from rheology import get_model
+
+# Inverse of rheology.wall_shear_stress: the gravity, angle or radius at which
+# the wall shear stress reaches a threshold (e.g. the 0.6 Pa atherosclerosis
+# line of model.py and Project2_Code.py), for whole arrays of parameter sets
+# at once. Every model is a monotone function of the gradient stress
+#   base = |(p/l) - g*rho*sin(theta)| * r/2
+# so the threshold fixes base; known models are inverted in closed form and
+# anything else in rheology.MODELS by vectorized bisection. The geometry side
+# is then solved exactly. Because of the absolute value, WSS is V-shaped in g
+# and theta, with two crossings either side of the point where gravity cancels
+# the pressure gradient; those functions return both, NaN where a crossing
+# does not exist.
+
+
+def _power_law_base(tau, params):
+    return (np.divide(tau, params["m"])) ** (1 / params["n"])
+
+
+def _newtonian_base(tau, params):
+    return np.multiply(tau, params["scale"])
+
+
+def _bingham_base(tau, params):
+    return np.where(np.greater_equal(tau, params["ys"]), np.subtract(tau, params["ys"]) * params["scale"], np.nan)
+
+
+INVERSES = {"power_law": _power_law_base, "newtonian": _newtonian_base, "bingham": _bingham_base}
+
+
+# Vectorized bisection for increasing f with f(lo) <= 0 <= f(hi) elementwise;
+# entries with no sign change come back NaN
+def bisect(f, lo, hi, xtol=0.0, rtol=1e-13, max_iter=200):
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=float), np.asarray(hi, dtype=float))
+    lo, hi = lo.copy(), hi.copy()
+    valid = (f(lo) <= 0) & (f(hi) >= 0)
+    for _ in range(max_iter):
+        mid = 0.5 * (lo + hi)
+        below = f(mid) < 0
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+        if np.all(hi - lo <= xtol + rtol * np.abs(hi)):
+            break
+    return np.where(valid, 0.5 * (lo + hi), np.nan)
+
+
+# Gradient stress at which model reaches tau
+def inverse_base(model, tau, params):
+    if model in INVERSES:
+        return INVERSES[model](tau, params)
+
+    fn = get_model(model)
+    tau = np.asarray(tau, dtype=float)
+    hi = np.ones_like(tau)
+    # grow the bracket until every reachable threshold is inside it
+    for _ in range(1100):
+        short = fn(hi, params) < tau
+        if not short.any():
+            break
+        hi = np.where(short, hi * 2, hi)
+    return bisect(lambda base: fn(base, params) - tau, np.zeros_like(tau), hi)
+
+
+# Pressure gradients (p/l - g*rho*sin(theta)) at which WSS equals tau, as
+# (negative, positive) pairs
+def _critical_gradients(model, tau, r, params):
+    gradient = 2 * inverse_base(model, tau, params) / np.asarray(r)
+    return -gradient, gradient
+
+
+# Both g values where WSS crosses tau, stacked on a last axis of length 2 in
+# increasing order; NaN where sin(theta) == 0
+def crossings_g(model, tau, theta, r, p, l, params):
+    low, high = _critical_gradients(model, tau, r, params)
+    slope = np.multiply(params["rho"], np.sin(np.radians(theta)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roots = np.stack(np.broadcast_arrays((np.divide(p, l) - low) / slope, (np.divide(p, l) - high) / slope), axis=-1)
+    roots[~np.isfinite(roots)] = np.nan
+    return np.sort(roots, axis=-1)
+
+
+# Smallest g >= g_min at which WSS reaches tau, NaN if it never does
+def critical_g(model, tau, theta, r, p, l, params, g_min=0.0):
+    roots = crossings_g(model, tau, theta, r, p, l, params)
+    roots = np.where(roots >= g_min, roots, np.inf)
+    first = roots.min(axis=-1)
+    return np.where(np.isinf(first), np.nan, first)
+
+
+# Both angles (degrees, within [-90, 90]) where WSS crosses tau, in
+# increasing order; NaN where the crossing lies outside that range
+def crossings_theta(model, tau, g, r, p, l, params):
+    low, high = _critical_gradients(model, tau, r, params)
+    scale = np.multiply(g, params["rho"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sines = np.stack(np.broadcast_arrays((np.divide(p, l) - low) / scale, (np.divide(p, l) - high) / scale), axis=-1)
+    sines[(np.abs(sines) > 1) | ~np.isfinite(sines)] = np.nan
+    return np.sort(np.degrees(np.arcsin(sines)), axis=-1)
+
+
+# Radius at which WSS reaches tau; WSS grows linearly in base with r, so
+# there is exactly one (inf where gravity cancels the pressure gradient)
+def critical_r(model, tau, g, theta, p, l, params):
+    base = inverse_base(model, tau, params)
+    gradient = np.abs(np.divide(p, l) - np.multiply(np.multiply(g, params["rho"]), np.sin(np.radians(theta))))
+    with np.errstate(divide="ignore"):
+        return 2 * base / gradient
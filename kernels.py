@@ -0,0 +1,135 @@
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional Numba-compiled kernels for the interpreter-bound hot spots: the
+# per-step rate evaluation of the Test.py flow model (flow1d.rates), the
+# (g x gamma) Bingham plastic / power law surfaces of Test2.py
+# (grid_engine.shear_surfaces) and the table lookups of lookup.py. Each kernel
+# fuses the whole computation into a single loop that writes straight into
+# caller-provided output arrays, so no grid-sized temporaries are allocated.
+# Callers pick a backend with resolve_backend(); "auto" uses Numba when it is
+# installed and falls back to NumPy otherwise.
+
+HAVE_NUMBA = numba is not None
+
+prange = numba.prange if HAVE_NUMBA else range
+
+BACKENDS = ("auto", "numpy", "numba")
+
+
+def resolve_backend(backend="auto"):
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "auto":
+        return "numba" if HAVE_NUMBA else "numpy"
+    if backend == "numba" and not HAVE_NUMBA:
+        raise ImportError("the numba backend was requested but numba is not installed")
+    return backend
+
+
+def _flow_rates(u, p, dx, rho, mu_0, tau_0, k_0, k_inf, g_c, a, g, r_0, Q_0, gamma_min, nu, eps,
+                dudt, dpdt):
+    n = u.shape[0]
+    dudt[0] = 0.0
+    dudt[n - 1] = 0.0
+    dpdt[0] = 0.0
+    dpdt[n - 1] = 0.0
+
+    prev_force = 0.0
+    prev_gamma = 0.0
+    prev_dpdx = 0.0
+    for i in range(n - 1):
+        gamma = (u[i + 1] - u[i]) / dx
+        dpdx = (p[i + 1] - p[i]) / dx
+
+        speed = 0.5 * (abs(u[i + 1]) + abs(u[i]))
+        base = 1 + (k_0 - 1) * ((speed + eps) / tau_0) ** (k_0 - 1)
+        r = r_0 * max(base, eps) ** (1 / (k_0 - 1) + eps)
+        Q = Q_0 * (r / r_0) ** 4 + eps
+        k = k_inf + (k_0 - k_inf) / (1 + (abs(gamma) / g_c) ** a)
+        shear = math.sqrt(gamma ** 2 + gamma_min ** 2)
+        mu = mu_0 * (r_0 / r) ** 4 * (shear / 100) ** (k - 1)
+        force = -1 / rho * (dpdx + 2 * mu * gamma / Q) + g
+
+        if i > 0:
+            dudt[i] = 0.5 * (force + prev_force) + nu * (gamma - prev_gamma) / dx
+            dpdt[i] = -rho * 0.5 * (gamma + prev_gamma) * u[i] + nu * (dpdx - prev_dpdx) / dx
+        prev_force = force
+        prev_gamma = gamma
+        prev_dpdx = dpdx
+
+
+def _shear_surfaces(g, gamma, tau_yield, mu_bp, k, n_pl, mu, r, sintheta, l, rho, tau_bp, tau_pl):
+    # the gamma powers only depend on the column, so they are taken once per
+    # column rather than once per grid point
+    pl_base = np.empty(gamma.shape[0])
+    pl_slope = np.empty(gamma.shape[0])
+    for j in range(gamma.shape[0]):
+        pl_base[j] = k * gamma[j] ** n_pl
+        pl_slope[j] = gamma[j] ** (n_pl + 1)
+
+    for i in prange(g.shape[0]):
+        grav = g[i] * sintheta * r * rho
+        threshold = tau_yield / mu_bp + grav / mu
+        for j in range(gamma.shape[0]):
+            if gamma[j] > threshold:
+                tau_bp[i, j] = tau_yield + mu_bp * (gamma[j] - tau_yield / mu_bp) + grav
+            else:
+                tau_bp[i, j] = mu_bp * gamma[j] + grav
+            tau_pl[i, j] = pl_base[j] + grav / (2 * mu) * pl_slope[j] * r ** 2 / l
+
+
+# Cell index and offset of x along a uniform axis of n points, or (-1, 0)
+# outside it
+def _cell(x, lo, step, n):
+    u = (x - lo) / step
+    if not (-1e-9 <= u <= n - 1 + 1e-9):
+        return -1, 0.0
+    i = min(max(int(math.floor(u)), 0), n - 2)
+    return i, u - i
+
+
+# Multilinear interpolation of a (g, theta, r, p) lookup table at one point
+# (lookup.LookupTable); NaN outside the table
+def _lookup_one(values, lo, step, g, theta, r, p):
+    i0, t0 = _cell(g, lo[0], step[0], values.shape[0])
+    i1, t1 = _cell(theta, lo[1], step[1], values.shape[1])
+    i2, t2 = _cell(r, lo[2], step[2], values.shape[2])
+    i3, t3 = _cell(p, lo[3], step[3], values.shape[3])
+    if i0 < 0 or i1 < 0 or i2 < 0 or i3 < 0:
+        return math.nan
+    result = 0.0
+    for b0 in range(2):
+        w0 = t0 if b0 else 1 - t0
+        for b1 in range(2):
+            w1 = w0 * (t1 if b1 else 1 - t1)
+            for b2 in range(2):
+                w2 = w1 * (t2 if b2 else 1 - t2)
+                for b3 in range(2):
+                    w3 = w2 * (t3 if b3 else 1 - t3)
+                    result += w3 * values[i0 + b0, i1 + b1, i2 + b2, i3 + b3]
+    return result
+
+
+def _lookup_linear(values, lo, step, g, theta, r, p, out):
+    for q in prange(out.shape[0]):
+        out[q] = _lookup_one(values, lo, step, g[q], theta[q], r[q], p[q])
+
+
+if HAVE_NUMBA:
+    flow_rates = numba.njit(cache=True)(_flow_rates)
+    shear_surfaces = numba.njit(cache=True, parallel=True)(_shear_surfaces)
+    _cell = numba.njit(cache=True)(_cell)
+    _lookup_one = lookup_one = numba.njit(cache=True)(_lookup_one)
+    lookup_linear = numba.njit(cache=True, parallel=True)(_lookup_linear)
+else:
+    flow_rates = None
+    shear_surfaces = None
+    lookup_one = None
+    lookup_linear = None
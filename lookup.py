@@ -0,0 +1,187 @@
+import itertools
+import json
+import os
+
+import numpy as np
+
+import kernels
+from profiling import stage
+from results_store import ResultsStore, write_sweep
+from rheology import CORONARY, MODEL_PY_PARAMS, MODELS, wall_shear_stress
+from sweep import DEFAULT_CHUNK_SIZE, DEFAULT_FIXED
+
+# Precomputed WSS tables for low-latency queries. A table holds each model's
+# WSS on a uniform (g, theta, r, p) grid at fixed length l and rheology
+# constants. It is a results_store directory written in one chunk per model, so
+# a reader memory-maps each model as a single 4-d array, plus lookup.json with
+# the grid ranges and the interpolation error measured when it was built.
+#
+# Queries are batched: any broadcastable g, theta, r, p arrays, interpolated
+#   linear   multilinear over the 16 corners of the enclosing cell
+#   cubic    tensor-product Catmull-Rom over the surrounding 4^4 nodes
+#            (clamped at the grid edges)
+# and NaN outside the grid. Linear queries run in a compiled kernel when
+# Numba is available; query_one() answers a single point in about a
+# microsecond with it.
+#
+# The error report holds, per model and method, the largest absolute and
+# relative error against rheology.wall_shear_stress over `samples` random
+# points of the grid, and for linear also the bound sum_i h_i^2/8 max|f_ii|
+# with the second derivatives estimated by second differences of the table.
+# WSS has a kink where the pressure gradient changes sign, which no smooth
+# interpolant follows; the default p range starts above it (p/l > g rho for
+# every g of the table).
+
+LOOKUP = "lookup.json"
+AXES = ("g", "theta", "r", "p")
+METHODS = ("linear", "cubic")
+
+# (start, stop, points) for each axis
+DEFAULT_RANGES = {"g": (0.0, 30.0, 31), "theta": (-90.0, 90.0, 37), "r": (.0005, .004, 36), "p": (2000.0, 20000.0, 37)}
+
+
+def _axes(ranges):
+    return [(name, np.linspace(*ranges[name])) for name in AXES]
+
+
+# Catmull-Rom weights of the nodes i - 1, i, i + 1, i + 2 at offset t
+def _cubic_weights(t):
+    t2, t3 = t * t, t * t * t
+    return ((-t3 + 2 * t2 - t) / 2, (3 * t3 - 5 * t2 + 2) / 2, (-3 * t3 + 4 * t2 + t) / 2, (t3 - t2) / 2)
+
+
+# Outside the grid the node beyond an edge is extrapolated linearly,
+# f(-1) = 2 f(0) - f(1), so edge cells keep second-order accuracy
+def _edge_weights(weights, i, n):
+    before, w0, w1, after = weights
+    before = np.where(i == 0, before, 0)
+    after = np.where(i + 2 > n - 1, after, 0)
+    return weights[0] - before, w0 + 2 * before - after, w1 - before + 2 * after, weights[3] - after
+
+
+class LookupTable:
+    def __init__(self, path, backend="auto"):
+        self.path = path
+        self.store = ResultsStore(path)
+        if self.store.axes != list(AXES):
+            raise ValueError(f"{path} is not a lookup table: axes {self.store.axes}, expected {list(AXES)}")
+        self.shape = self.store.shape
+        axes = [self.store.axis(name) for name in AXES]
+        self.lo = np.array([values[0] for values in axes])
+        self.step = np.array([(values[-1] - values[0]) / (len(values) - 1) for values in axes])
+        self.models = self.store.columns
+        self.params = self.store.manifest["metadata"]["params"]
+        self.l = self.store.manifest["metadata"]["fixed"]["l"]
+        self.backend = kernels.resolve_backend(backend)
+        self._values = {}
+        try:
+            with open(os.path.join(path, LOOKUP)) as f:
+                self.errors = json.load(f)["errors"]
+        except FileNotFoundError:
+            self.errors = {}
+
+    # The model's table as a (g, theta, r, p) array over the memory map
+    def values(self, model):
+        if model not in self._values:
+            if model not in self.models:
+                raise ValueError(f"unknown model {model!r}, table has {self.models}")
+            if not self.store.complete(model):
+                raise ValueError(f"table {self.path} is incomplete for {model}")
+            self._values[model] = np.asarray(self.store.read_flat(model)).reshape(self.shape)
+        return self._values[model]
+
+    def _cells(self, points):
+        cells, offsets, inside = [], [], True
+        for x, lo, step, n in zip(points, self.lo, self.step, self.shape):
+            u = (x - lo) / step
+            inside = inside & (u >= -1e-9) & (u <= n - 1 + 1e-9)
+            i = np.clip(np.floor(u).astype(np.int64), 0, n - 2)
+            cells.append(i)
+            offsets.append(u - i)
+        return cells, offsets, inside
+
+    def _linear(self, flat, points):
+        cells, offsets, inside = self._cells(points)
+        strides = np.cumprod((1,) + self.shape[:0:-1])[::-1]
+        base = sum(i * stride for i, stride in zip(cells, strides))
+        out = np.zeros(len(base))
+        for corner in itertools.product((0, 1), repeat=len(AXES)):
+            weight = np.prod([t if bit else 1 - t for bit, t in zip(corner, offsets)], axis=0)
+            out += weight * flat.take(base + int(np.dot(corner, strides)))
+        return np.where(inside, out, np.nan)
+
+    def _cubic(self, flat, points):
+        cells, offsets, inside = self._cells(points)
+        strides = np.cumprod((1,) + self.shape[:0:-1])[::-1]
+        nodes = [[np.clip(i + shift, 0, n - 1) * stride for shift in (-1, 0, 1, 2)]
+                 for i, n, stride in zip(cells, self.shape, strides)]
+        weights = [_edge_weights(_cubic_weights(t), i, n) for t, i, n in zip(offsets, cells, self.shape)]
+        out = np.zeros(len(cells[0]))
+        for corner in itertools.product(range(4), repeat=len(AXES)):
+            index = sum(nodes[axis][k] for axis, k in enumerate(corner))
+            weight = np.prod([weights[axis][k] for axis, k in enumerate(corner)], axis=0)
+            out += weight * flat.take(index)
+        return np.where(inside, out, np.nan)
+
+    # WSS of model at broadcast (g, theta, r, p), interpolated with method
+    def query(self, model, g, theta, r, p, method="linear"):
+        if method not in METHODS:
+            raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+        values = self.values(model)
+        points = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (g, theta, r, p)))
+        shape = points[0].shape
+        points = [np.ascontiguousarray(x).ravel() for x in points]
+        with stage("lookup", len(points[0])):
+            if method == "linear" and self.backend == "numba":
+                out = np.empty(len(points[0]))
+                kernels.lookup_linear(values, self.lo, self.step, *points, out)
+            elif method == "linear":
+                out = self._linear(values.reshape(-1), points)
+            else:
+                out = self._cubic(values.reshape(-1), points)
+        return out.reshape(shape)
+
+    # Single-point linear query with no array overhead (needs Numba)
+    def query_one(self, model, g, theta, r, p):
+        if self.backend != "numba":
+            return float(self.query(model, g, theta, r, p))
+        return kernels.lookup_one(self.values(model), self.lo, self.step, g, theta, r, p)
+
+    # Exact WSS, from the constants the table was built with
+    def exact(self, model, g, theta, r, p):
+        return wall_shear_stress(model, g, theta, r, p, self.l, self.params)
+
+    # Interpolation error against the exact formula at `samples` random points
+    # of the grid, plus the a-priori estimate for linear
+    def validate(self, model, samples=10**5, seed=0):
+        rng = np.random.default_rng(seed)
+        hi = self.lo + self.step * (np.array(self.shape) - 1)
+        points = [rng.uniform(lo, top, samples) for lo, top in zip(self.lo, hi)]
+        exact = self.exact(model, *points)
+        scale = np.maximum(np.abs(exact), np.finfo(float).tiny)
+        report = {}
+        for method in METHODS:
+            error = np.abs(self.query(model, *points, method=method) - exact)
+            report[method] = {"max_abs": float(error.max()), "max_rel": float((error / scale).max()),
+                              "rms": float(np.sqrt(np.mean(error ** 2)))}
+        values = self.values(model)
+        curvature = [float(np.abs(np.diff(values, 2, axis=axis)).max()) / 8 if n > 2 else 0.0
+                     for axis, n in enumerate(self.shape)]
+        report["linear"]["bound"] = sum(curvature)
+        return report
+
+
+# Builds a table of each model over ranges ({axis: (start, stop, points)})
+# at path, measures its error and returns it opened
+def build_table(path, models=tuple(MODELS), ranges=DEFAULT_RANGES, params=MODEL_PY_PARAMS, l=CORONARY["l"],
+                samples=10**5, seed=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    ranges = {name: tuple(ranges[name]) for name in AXES}
+    size = int(np.prod([points for _, _, points in ranges.values()]))
+    write_sweep(path, models, _axes(ranges), params, dict(DEFAULT_FIXED, l=l), chunk_rows=size,
+                chunk_size=chunk_size)
+    table = LookupTable(path)
+    with stage("validation"):
+        errors = {model: table.validate(model, samples, seed) for model in models}
+    with open(os.path.join(path, LOOKUP), "w") as f:
+        json.dump({"ranges": ranges, "samples": samples, "errors": errors}, f, indent=1)
+    return LookupTable(path)
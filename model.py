@@ -1,10 +1,9 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 
+from plotting import FONT_FAMILY, render_batch
+
 #Constants
-plt.rcParams["font.family"] = "Times New Roman"
-# plt.rcParams.update({'font.size': 16})
 
 # m constant for blood as a power law fluid (Pa*s^n / m^2)
 m = 0.01615
@@ -57,20 +56,20 @@ tau_nog = np.repeat(tau_nog, 1000)
 
 lowbound_athero = np.repeat(0.6, 1000)
 
-#Plotting
-fig, ax = plt.subplots()
-plt.xlabel("Acceleration due to Gravity (m/s^2)")
-plt.ylabel("Vessel Wall Shear Stress (Pa)")
-plt.title("Gravity-Induced Changes in Wall Shear Stress in Generalized Coronary Artery")
-ax.plot(g, tau_PL, linewidth=2.0, color='r', label='Shear-Thinning Fluid (with Gravity Component)')
-ax.plot(g, tau_NW, linewidth=2.0, color='g', label='Newtonian Fluid (with Gravity Component)')
-# ax.plot(g, tau_BP, linewidth=2.0, color='b', label='Bingham Plastic Fluid')
-ax.plot(g, tau_nog, linewidth=2.0, color='y', label='Shear-Thinning Fluid  (no Gravity Component)')
-ax.plot(g, lowbound_athero, linewidth=1.0, linestyle='dashed', color='k', label='Upper Boundary for Atherosclerosis development')
-
-ax.legend(loc='center right')
-
-plt.show()
+#Plotting: figures are rendered headless into figures/ (see plotting.py)
+figures = {}
+figures["model_gravity.png"] = {"font_family": FONT_FAMILY, "panels": [{
+    "title": "Gravity-Induced Changes in Wall Shear Stress in Generalized Coronary Artery",
+    "xlabel": "Acceleration due to Gravity (m/s^2)", "ylabel": "Vessel Wall Shear Stress (Pa)",
+    "grid": False, "legend": "center right",
+    "series": [
+        {"x": g, "y": tau_PL, "color": 'r', "label": 'Shear-Thinning Fluid (with Gravity Component)'},
+        {"x": g, "y": tau_NW, "color": 'g', "label": 'Newtonian Fluid (with Gravity Component)'},
+        # {"x": g, "y": tau_BP, "color": 'b', "label": 'Bingham Plastic Fluid'},
+        {"x": g, "y": tau_nog, "color": 'y', "label": 'Shear-Thinning Fluid  (no Gravity Component)'},
+        {"x": g, "y": lowbound_athero, "linewidth": 1.0, "linestyle": 'dashed', "color": 'k',
+         "label": 'Upper Boundary for Atherosclerosis development'},
+    ]}]}
 
 # Coronary arteries length (m)
 l = .030 
@@ -91,17 +90,13 @@ tau_earth = m * np.abs(((p/l) - np.multiply(np.multiply(g_earth,rho), sintheta))
 tau_takeoff = m * np.abs(((p/l) - np.multiply(np.multiply(g_takeoff,rho), sintheta)) * (r_variable / 2 * mu)) ** n
 tau_space = m * np.abs(((p/l) - np.multiply(np.multiply(g_space,rho), sintheta)) * (r_variable / 2 * mu)) ** n
 
-fig, ax = plt.subplots()
-plt.xlabel("Radius (m)")
-plt.ylabel("Shear Stress (dyne)")
-plt.title("Variable radius")
-    
-ax.plot(r_variable, tau_earth, linewidth=2.0, color= 'r', label='earth, g=9.8')
-ax.plot(r_variable, tau_takeoff, linewidth=2.0, color='g', label='takeoff, g=9.8 * 4')
-ax.plot(r_variable, tau_space, linewidth=2.0, color='b', label='space, g=9.8/1000000')
-plt.legend()
-
-plt.show()
+figures["model_radius.png"] = {"font_family": FONT_FAMILY, "panels": [{
+    "title": "Variable radius", "xlabel": "Radius (m)", "ylabel": "Shear Stress (dyne)", "grid": False, "legend": True,
+    "series": [
+        {"x": r_variable, "y": tau_earth, "color": 'r', "label": 'earth, g=9.8'},
+        {"x": r_variable, "y": tau_takeoff, "color": 'g', "label": 'takeoff, g=9.8 * 4'},
+        {"x": r_variable, "y": tau_space, "color": 'b', "label": 'space, g=9.8/1000000'},
+    ]}]}
 
 # Variable angles coronary arteries (m)
 theta_start = -90
@@ -118,13 +113,14 @@ tau_takeoff = m * np.abs(((p/l) - np.multiply(np.multiply(g_takeoff,rho), sinthe
 tau_space = m * np.abs(((p/l) - np.multiply(np.multiply(g_space,rho), sintheta_variable)) * (r / 2 * mu)) ** n
 
 
-fig, ax = plt.subplots()
-plt.xlabel("Angle with horizontal(degrees)")
-plt.ylabel("Shear Stress (dyne)")
-plt.title("Variable radius")
-    
-ax.plot(theta_variable, tau_earth, linewidth=2.0, color= 'r', label='earth, ge=9.8')
-ax.plot(theta_variable, tau_takeoff, linewidth=2.0, color='g', label='takeoff, g=4*ge')
-ax.plot(theta_variable, tau_space, linewidth=2.0, color='b', label='space, g=ge/100000')
-plt.legend()
-plt.show()
+figures["model_angle.png"] = {"font_family": FONT_FAMILY, "panels": [{
+    "title": "Variable radius", "xlabel": "Angle with horizontal(degrees)", "ylabel": "Shear Stress (dyne)",
+    "grid": False, "legend": True,
+    "series": [
+        {"x": theta_variable, "y": tau_earth, "color": 'r', "label": 'earth, ge=9.8'},
+        {"x": theta_variable, "y": tau_takeoff, "color": 'g', "label": 'takeoff, g=4*ge'},
+        {"x": theta_variable, "y": tau_space, "color": 'b', "label": 'space, g=ge/100000'},
+    ]}]}
+
+for path, rendered in render_batch(figures, "figures").items():
+    print(f"wrote {path}" if rendered else f"{path} is up to date")
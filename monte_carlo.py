@@ -0,0 +1,235 @@
+import numpy as np
+
+from parallel import map_partitions
+from rheology import CORONARY, MODEL_PY_PARAMS
+from sensitivity import evaluate_samples
+
+# Monte Carlo uncertainty propagation for the wall shear stress models. The
+# literature constants from model.py are drawn from configurable distributions
+# in blocks, each block is evaluated across the g range in one call, and the
+# results are folded into streaming accumulators, so memory depends on the
+# block size and the number of g values only, never on the sample count.
+#
+# Distributions are (kind, a, b) tuples:
+#   ("lognormal", median, sigma)  sigma of log(x)
+#   ("normal", mean, sd)
+#   ("uniform", low, high)
+# A plain number fixes the parameter.
+
+# Scenario from model.py (generalized coronary artery, p = 16000 Pa)
+BASE = dict(MODEL_PY_PARAMS, **CORONARY)
+
+# Illustrative spread: log-normal around the model.py values with roughly 10%
+# coefficient of variation, which keeps every draw positive
+DEFAULT_DISTRIBUTIONS = {
+    "m": ("lognormal", 0.01615, 0.1),
+    "n": ("lognormal", .708, 0.1),
+    "rho": ("lognormal", 1060, 0.1),
+    "ys": ("lognormal", 0.0144, 0.1),
+    # none of the three wall shear expressions use mu, but it is drawn so
+    # custom models fed through the same parameter dict see it
+    "mu": ("lognormal", .0035, 0.1),
+}
+
+# Upper boundary for atherosclerosis development drawn in model.py and Project2_Code.py
+ATHERO_THRESHOLD = 0.6
+
+DEFAULT_BLOCK_SIZE = 4096
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def draw(spec, rng, size):
+    if np.isscalar(spec):
+        return np.full(size, float(spec))
+    kind, a, b = spec
+    if kind == "lognormal":
+        return a * np.exp(b * rng.standard_normal(size))
+    if kind == "normal":
+        return a + b * rng.standard_normal(size)
+    if kind == "uniform":
+        return rng.uniform(a, b, size)
+    raise ValueError(f"unknown distribution {kind!r}")
+
+
+def sample_block(distributions, rng, size):
+    names = list(distributions)
+    return names, np.column_stack([draw(distributions[name], rng, size) for name in names])
+
+
+# Per-column mean and variance, merged block by block with Chan et al.'s
+# parallel form of Welford's update
+class StreamingMoments:
+    def __init__(self, width):
+        self.n = 0
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def update(self, values):
+        count = len(values)
+        mean = values.mean(0)
+        m2 = ((values - mean) ** 2).sum(0)
+        self._combine(count, mean, m2)
+
+    def merge(self, other):
+        self._combine(other.n, other.mean, other.m2)
+
+    def _combine(self, count, mean, m2):
+        total = self.n + count
+        if total == 0:
+            return
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.n * count / total)
+        self.n = total
+
+    def result(self):
+        var = self.m2 / (self.n - 1) if self.n > 1 else np.full_like(self.m2, np.nan)
+        return {"n": self.n, "mean": self.mean, "var": var, "std": np.sqrt(var)}
+
+
+# Per-column quantiles from fixed log-spaced histograms. Bins are set once
+# (from a pilot block) so partial histograms from different workers can be
+# added; the relative error of a quantile is bounded by one bin width, unless
+# it falls among the samples outside the range, which are only counted.
+# Values <= 0 have no place on the log scale and go to the underflow bin. NaN
+# samples are counted apart and left out of the quantiles and min / max.
+class StreamingQuantiles:
+    def __init__(self, width, low, high, bins=4096):
+        self.width = width
+        self.bins = bins
+        self.log_low = np.log(low)
+        self.log_step = (np.log(high) - self.log_low) / bins
+        # column-major counts with an underflow and an overflow bin at each end
+        self.counts = np.zeros((width, bins + 2), dtype=np.int64)
+        self.min = np.full(width, np.inf)
+        self.max = np.full(width, -np.inf)
+        self.nan = np.zeros(width, dtype=np.int64)
+
+    def update(self, values):
+        positive = values > 0
+        with np.errstate(invalid="ignore"):
+            position = (np.log(np.where(positive, values, 1.0)) - self.log_low) / self.log_step
+        index = np.where(positive, np.clip(np.floor(position), -1, self.bins), -1).astype(np.int64) + 1
+        index += np.arange(self.width) * (self.bins + 2)
+        nan = np.isnan(values)
+        self.nan += nan.sum(0)
+        self.counts += np.bincount(index[~nan], minlength=self.counts.size).reshape(self.counts.shape)
+        self.min = np.fmin(self.min, np.fmin.reduce(values, axis=0))
+        self.max = np.fmax(self.max, np.fmax.reduce(values, axis=0))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.nan += other.nan
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    # Per column: the bin holding the q quantile, the rank it needs and the
+    # count before that bin
+    def _locate(self, q):
+        cumulative = np.cumsum(self.counts, axis=1)
+        target = q * cumulative[:, -1]
+        index = np.argmax(cumulative >= target[:, None], axis=1)
+        before = np.where(index > 0, cumulative[np.arange(self.width), index - 1], 0)
+        return index, target, before
+
+    def quantile(self, q):
+        index, target, before = self._locate(q)
+        inside = self.counts[np.arange(self.width), index]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = np.where(inside > 0, (target - before) / inside, 0.5)
+        estimate = np.exp(self.log_low + (index - 1 + fraction) * self.log_step)
+        estimate = np.where(index == 0, self.min, estimate)
+        estimate = np.where(index == self.bins + 1, self.max, estimate)
+        return np.clip(estimate, self.min, self.max)
+
+    # Samples per column that fell below or above the histogram range
+    def out_of_range(self):
+        return self.counts[:, 0] + self.counts[:, -1]
+
+    # Relative error bound of the q quantile per column: one bin width, or NaN
+    # (no bound) where it lies among the out-of-range samples
+    def relative_error(self, q):
+        index, _, _ = self._locate(q)
+        outside = ((index == 0) | (index == self.bins + 1)) & (self.counts[np.arange(self.width), index] > 0)
+        return np.where(outside, np.nan, np.expm1(self.log_step))
+
+
+class ThresholdProbability:
+    def __init__(self, width, threshold=ATHERO_THRESHOLD):
+        self.threshold = threshold
+        self.n = 0
+        self.below = np.zeros(width, dtype=np.int64)
+
+    def update(self, values):
+        self.n += len(values)
+        self.below += np.count_nonzero(values < self.threshold, axis=0)
+
+    def merge(self, other):
+        self.n += other.n
+        self.below += other.below
+
+    def result(self):
+        return self.below / self.n if self.n else np.full(self.below.shape, np.nan)
+
+
+def _accumulators(width, low, high, bins, threshold):
+    return [StreamingMoments(width), StreamingQuantiles(width, low, high, bins),
+            ThresholdProbability(width, threshold)]
+
+
+def _run_blocks(model, g, distributions, base, seed, block_size, n_samples, low, high, bins,
+                threshold, start, stop):
+    accumulators = _accumulators(len(g), low, high, bins, threshold)
+    for block in range(start, stop):
+        size = min(block_size, n_samples - block * block_size)
+        rng = np.random.default_rng([seed, block])
+        names, samples = sample_block(distributions, rng, size)
+        tau = evaluate_samples(model, names, samples, g, base)
+        for accumulator in accumulators:
+            accumulator.update(tau)
+    return accumulators
+
+
+# Mean, variance, quantiles and P(WSS < threshold) of wall shear stress at
+# each g, from n_samples draws of the uncertain constants. Each quantile
+# comes with its relative error bound per g (NaN where it is not bounded),
+# and out_of_range counts the draws outside the histogram range (including
+# any WSS <= 0); nan counts draws whose WSS is undefined.
+def monte_carlo(model, g, n_samples=10**6, distributions=DEFAULT_DISTRIBUTIONS, base=BASE,
+                threshold=ATHERO_THRESHOLD, quantiles=DEFAULT_QUANTILES, bins=4096,
+                block_size=DEFAULT_BLOCK_SIZE, seed=0, workers=1):
+    if n_samples < 1:
+        raise ValueError("n_samples must be at least 1")
+    g = np.asarray(g, dtype=float)
+    n_blocks = -(-n_samples // block_size)
+
+    # pilot block (seeded apart from the sample blocks) fixes the histogram
+    # range, padded a decade either side
+    names, pilot = sample_block(distributions, np.random.default_rng([seed, n_blocks]), min(block_size, 1024))
+    pilot_tau = evaluate_samples(model, names, pilot, g, base)
+    positive = pilot_tau[(pilot_tau > 0) & np.isfinite(pilot_tau)]
+    low = positive.min() / 10 if positive.size else 1e-12
+    high = max(positive.max() * 10 if positive.size else 0, low * 100)
+
+    parts = map_partitions(_run_blocks, (model, g, distributions, base, seed, block_size, n_samples,
+                                         low, high, bins, threshold), n_blocks, workers)
+    totals = parts[0]
+    for part in parts[1:]:
+        for total, accumulator in zip(totals, part):
+            total.merge(accumulator)
+
+    moments, histogram, probability = totals
+    result = moments.result()
+    result.update({
+        "g": g,
+        "model": model,
+        "quantiles": {q: histogram.quantile(q) for q in quantiles},
+        "quantile_relative_error": {q: histogram.relative_error(q) for q in quantiles},
+        "out_of_range": histogram.out_of_range(),
+        "nan": histogram.nan,
+        "min": histogram.min,
+        "max": histogram.max,
+        "threshold": threshold,
+        "p_below": probability.result(),
+    })
+    return result
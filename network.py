@@ -0,0 +1,159 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from profiling import stage
+from rheology import MODEL_PY_PARAMS, MODELS, wall_shear_stress
+
+# Branching arterial networks. A network is a set of straight segments, each
+# running from a tail node to a head node with its own radius r, length l and
+# inclination theta (degrees, the angle of model.py). It is held in array
+# form: the node/segment incidence matrix in CSR (+1 at a segment's tail, -1
+# at its head) and per-segment arrays.
+#
+# Flow follows the power-law tube law
+#   Q = pi n / (3n + 1) * (G / (2 m))^(1/n) * r^(3 + 1/n),
+#   G = (P_tail - P_head) / l - g * rho * sin(theta)
+# i.e. the same gravity-modified pressure gradient rheology.py uses. Given
+# the pressure at the boundary nodes (inlet and outlets), the pressures at
+# the inner nodes follow from mass conservation, solved by damped Newton
+# iterations on the sparse weighted graph Laplacian, starting from the linear
+# (n = 1) solution. The pressure drop of every segment then goes through
+# rheology.wall_shear_stress in one call for all segments.
+
+
+class VesselNetwork:
+    def __init__(self, tail, head, r, l, theta, n_nodes=None):
+        self.tail = np.asarray(tail, dtype=np.int64)
+        self.head = np.asarray(head, dtype=np.int64)
+        size = len(self.tail)
+        self.r = np.broadcast_to(np.asarray(r, dtype=float), (size,)).copy()
+        self.l = np.broadcast_to(np.asarray(l, dtype=float), (size,)).copy()
+        self.theta = np.broadcast_to(np.asarray(theta, dtype=float), (size,)).copy()
+        self.n_nodes = int(max(self.tail.max(), self.head.max()) + 1) if n_nodes is None else n_nodes
+        segments = np.arange(size)
+        self.incidence = sparse.csr_matrix(
+            (np.r_[np.ones(size), -np.ones(size)], (np.r_[self.tail, self.head], np.r_[segments, segments])),
+            shape=(self.n_nodes, size))
+
+    @property
+    def n_segments(self):
+        return len(self.tail)
+
+    # Tree from a parent array: node i > 0 hangs off parent[i] through
+    # segment i - 1, so node 0 is the root
+    @classmethod
+    def from_parents(cls, parent, r, l, theta):
+        parent = np.asarray(parent, dtype=np.int64)
+        return cls(parent[1:], np.arange(1, len(parent)), r, l, theta, n_nodes=len(parent))
+
+    # Symmetric-ish bifurcating tree of `depth` generations. Radii follow
+    # Murray's law (r_child = r_parent / 2^(1/3)), lengths shrink by
+    # length_ratio and each child turns by a random angle up to spread
+    # degrees from its parent's inclination.
+    @classmethod
+    def bifurcating(cls, depth, r_root=.0015, l_root=.03, theta_root=-45.0, length_ratio=0.8, spread=30.0,
+                    seed=0):
+        rng = np.random.default_rng(seed)
+        n_nodes = 2 ** (depth + 1)
+        # node 1 is the root segment's head; node k has children 2k, 2k + 1
+        parent = np.arange(n_nodes) // 2
+        generation = np.floor(np.log2(np.maximum(np.arange(n_nodes), 1))).astype(np.int64)
+        r = r_root * 2.0 ** (-generation[1:] / 3)
+        l = l_root * length_ratio ** generation[1:]
+        turn = rng.uniform(-spread, spread, n_nodes)
+        turn[1] = 0
+        theta = np.empty(n_nodes)
+        theta[1] = theta_root
+        for level in range(1, depth + 1):
+            nodes = np.arange(2 ** level, 2 ** (level + 1))
+            theta[nodes] = theta[parent[nodes]] + turn[nodes]
+        return cls.from_parents(parent, r, l, np.clip(theta[1:], -90, 90))
+
+    # Node adjacency (symmetric, CSR)
+    def adjacency(self):
+        data = np.ones(2 * self.n_segments, dtype=np.int8)
+        rows = np.r_[self.tail, self.head]
+        cols = np.r_[self.head, self.tail]
+        return sparse.csr_matrix((data, (rows, cols)), shape=(self.n_nodes, self.n_nodes))
+
+    # Nodes with one segment: the inlet and the outlets of a tree
+    def terminals(self):
+        degree = np.diff(self.incidence.indptr)
+        return np.flatnonzero(degree == 1)
+
+    # Boundary pressures for solve(): p_in at the inlet, p_out at every other
+    # terminal node
+    def terminal_pressures(self, p_in, p_out, inlet=0):
+        boundary = {int(node): p_out for node in self.terminals()}
+        boundary[inlet] = p_in
+        return boundary
+
+    # Conductance C with Q = C * sign(G) |G l|^(1/n) for effective drop G l
+    def conductance(self, m, n):
+        return np.pi * n / (3 * n + 1) * (1 / (2 * m * self.l)) ** (1 / n) * self.r ** (3 + 1 / n)
+
+    def gravity_head(self, g, rho):
+        return g * rho * self.l * np.sin(np.radians(self.theta))
+
+    # Pressure at every node and flow in every segment for boundary pressures
+    # {node: pressure}
+    def solve(self, boundary, params=MODEL_PY_PARAMS, g=9.8, rtol=1e-10, max_iter=100):
+        fixed = np.fromiter(boundary, dtype=np.int64)
+        free = np.setdiff1d(np.arange(self.n_nodes), fixed)
+        pressure = np.zeros(self.n_nodes)
+        pressure[fixed] = [boundary[node] for node in fixed]
+        A_free = self.incidence[free]
+        head = self.gravity_head(g, params["rho"])
+        m, n = params["m"], params["n"]
+
+        with stage("network solve"):
+            # linear start: power law with n = 1
+            C1 = self.conductance(m, 1.0)
+            if len(free):
+                rhs = -(A_free @ (C1 * (self.incidence[fixed].T @ pressure[fixed] - head)))
+                pressure[free] = spsolve((A_free @ sparse.diags(C1) @ A_free.T).tocsc(), rhs)
+
+            C = self.conductance(m, n)
+            for iteration in range(max_iter):
+                if not len(free):
+                    break
+                drop = self.incidence.T @ pressure - head
+                flow, slope = _tube_flow(drop, C, n)
+                residual = A_free @ flow
+                scale = np.abs(flow).max() or 1.0
+                if np.abs(residual).max() <= rtol * scale:
+                    break
+                jacobian = (A_free @ sparse.diags(slope) @ A_free.T).tocsc()
+                step = spsolve(jacobian, -residual)
+                # halve the step until the residual drops
+                norm = np.abs(residual).max()
+                for _ in range(30):
+                    trial = pressure.copy()
+                    trial[free] += step
+                    trial_flow, _ = _tube_flow(self.incidence.T @ trial - head, C, n)
+                    if np.abs(A_free @ trial_flow).max() < norm:
+                        break
+                    step *= 0.5
+                pressure = trial
+            else:
+                raise RuntimeError(f"network flow did not converge in {max_iter} iterations")
+
+        drop = self.incidence.T @ pressure
+        flow, _ = _tube_flow(drop - head, C, n)
+        return {"pressure": pressure, "drop": drop, "flow": flow, "iterations": iteration}
+
+    # WSS of every segment for each model, from the pressure drops of solve()
+    def wall_shear_stress(self, drop, models=tuple(MODELS), params=MODEL_PY_PARAMS, g=9.8):
+        with stage("evaluation", self.n_segments * len(models)):
+            return {model: wall_shear_stress(model, g, self.theta, self.r, drop, self.l, params) for model in models}
+
+
+# Power-law flow for effective pressure drops and its derivative; the slope is
+# floored so Newton steps stay defined where a segment carries no flow
+def _tube_flow(drop, C, n):
+    magnitude = np.abs(drop)
+    flow = C * np.sign(drop) * magnitude ** (1 / n)
+    floor = 1e-9 * max(magnitude.max(), 1.0)
+    slope = C / n * np.maximum(magnitude, floor) ** (1 / n - 1)
+    return flow, slope
@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from rheology import MODEL_PY_PARAMS
+from sweep import DEFAULT_CHUNK_SIZE, DEFAULT_FIXED, evaluate_block, grid_shape, iter_blocks, normalize_axes
+
+# Process-pool backend for sweep.py. The flat grid is cut into contiguous
+# partitions (a few per worker for load balancing); workers write their
+# partition straight into a shared memory block or a memory-mapped .npy file,
+# so results land in grid order no matter which worker finishes first.
+# Reductions are computed per partition and merged in partition order, which
+# keeps ties (e.g. the first argmin) identical to a serial run. Workers are
+# never forked from the caller, which may already be running threads (the
+# parallel Numba kernels) that a plain fork would copy mid-lock; they come
+# from a forkserver where the platform has one and are spawned elsewhere
+# (Windows).
+
+PARTITIONS_PER_WORKER = 4
+
+
+# Start method for worker pools, looked up when a pool is created so that
+# importing this module has no side effects
+def pool_context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def resolve_workers(workers):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    return workers
+
+
+def partitions(size, workers, per_worker=PARTITIONS_PER_WORKER):
+    count = max(1, min(size, workers * per_worker))
+    bounds = np.linspace(0, size, count + 1).astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+# Runs fn(*args, start, stop) for each partition and returns results in partition order
+def map_partitions(fn, args, size, workers=None):
+    workers = resolve_workers(workers)
+    parts = partitions(size, workers)
+    if workers == 1:
+        return [fn(*args, start, stop) for start, stop in parts]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+        futures = [pool.submit(fn, *args, start, stop) for start, stop in parts]
+        return [future.result() for future in futures]
+
+
+def _fill(out, model, axes, params, fixed, chunk_size, start, stop):
+    flat = out.reshape(-1)
+    for a, b in iter_blocks(stop - start, chunk_size):
+        flat[start + a:start + b] = evaluate_block(model, axes, start + a, start + b, params, fixed)
+
+
+def _fill_shared(name, shape, dtype, model, axes, params, fixed, chunk_size, start, stop):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        _fill(out, model, axes, params, fixed, chunk_size, start, stop)
+        del out
+    finally:
+        shm.close()
+
+
+def _fill_npy(path, model, axes, params, fixed, chunk_size, start, stop):
+    out = np.load(path, mmap_mode="r+")
+    _fill(out, model, axes, params, fixed, chunk_size, start, stop)
+    out.flush()
+
+
+# Full grid of wall shear stress evaluated across worker processes. With
+# out=None the grid is assembled in shared memory and returned as an ndarray;
+# with out=<path> it is written to a .npy file and returned as a memory map.
+def parallel_sweep(model, axes, params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED, workers=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64, out=None):
+    axes = normalize_axes(axes)
+    shape = grid_shape(axes)
+    size = int(np.prod(shape))
+    workers = resolve_workers(workers)
+
+    if out is not None:
+        np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=shape).flush()
+        map_partitions(_fill_npy, (out, model, axes, params, fixed, chunk_size), size, workers)
+        return np.load(out, mmap_mode="r")
+
+    if workers == 1:
+        result = np.empty(shape, dtype=dtype)
+        _fill(result, model, axes, params, fixed, chunk_size, 0, size)
+        return result
+
+    nbytes = max(1, size * np.dtype(dtype).itemsize)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        map_partitions(_fill_shared, (shm.name, shape, dtype, model, axes, params, fixed, chunk_size),
+                       size, workers)
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _reduce(model, axes, params, fixed, chunk_size, make_sinks, start, stop):
+    sinks = make_sinks()
+    for a, b in iter_blocks(stop - start, chunk_size):
+        tau = evaluate_block(model, axes, start + a, start + b, params, fixed)
+        for sink in sinks:
+            sink.update(start + a, start + b, tau)
+    return sinks
+
+
+# Parallel counterpart of sweep.run_sweep for reducers. make_sinks must be a
+# picklable callable returning a fresh list of sinks that implement merge().
+def parallel_reduce(model, axes, make_sinks, params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED,
+                    workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    axes = normalize_axes(axes)
+    size = int(np.prod(grid_shape(axes)))
+    per_partition = map_partitions(_reduce, (model, axes, params, fixed, chunk_size, make_sinks),
+                                   size, workers)
+    if not per_partition:
+        return [sink.result() for sink in make_sinks()]
+    merged = per_partition[0]
+    for sinks in per_partition[1:]:
+        for total, part in zip(merged, sinks):
+            total.merge(part)
+    return [sink.result() for sink in merged]
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import fontManager
+
+from profiling import stage
+
+# Headless figure rendering for batch jobs. Figures are described by plain
+# spec dicts and drawn on the Agg canvas directly (pyplot is never touched, so
+# no GUI backend is loaded and nothing blocks). Families of curves sharing an
+# x axis go into a single LineCollection instead of one Line2D per curve, and
+# every curve is reduced to at most two points per horizontal pixel before
+# drawing. Each output file gets a .sha256 sidecar holding the hash of the
+# spec and data it was drawn from; rendering is skipped when it still matches.
+#
+# Figure spec:
+#   {"panels": [panel, ...], "nrows": 1, "ncols": 1, "figsize": (6.4, 4.8), "dpi": 100, "suptitle": None,
+#    "font_family": None, "font_size": None}
+# Panel spec:
+#   {"cell", "title", "xlabel", "ylabel", "xscale", "yscale", "grid", "legend",
+#    "series": [{"x", "y", "label", "color", "linewidth", "linestyle", "cmap"}],
+#    "hlines": [{"y", "color", "linestyle", "label"}]}
+# Panels fill the nrows x ncols grid in order unless they name a cell, a
+# 1-based grid index or a (first, last) pair of indices the panel spans.
+# A series whose y is 2D (n_curves, len(x)) is drawn as a LineCollection
+# coloured through cmap. Figures use matplotlib's default font unless the spec
+# names a font_family (a family or a list in order of preference, e.g.
+# FONT_FAMILY for the Times New Roman of the original scripts); families that
+# are not installed are dropped, so a missing font falls back quietly.
+
+# Bump when rendering changes so cached figures are redrawn
+RENDER_VERSION = 2
+
+FONT_FAMILY = ["Times New Roman", "serif"]
+
+GENERIC_FAMILIES = {"serif", "sans-serif", "cursive", "fantasy", "monospace"}
+
+
+def _array_digest(value, digest):
+    array = np.ascontiguousarray(value)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(array.tobytes())
+
+
+def _hash_value(value, digest):
+    if isinstance(value, np.ndarray):
+        _array_digest(value, digest)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(json.dumps(key).encode())
+            _hash_value(value[key], digest)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _hash_value(item, digest)
+        digest.update(b"]")
+    else:
+        digest.update(json.dumps(value, default=str).encode())
+
+
+def spec_hash(spec):
+    digest = hashlib.sha256(f"render-v{RENDER_VERSION}".encode())
+    _hash_value(spec, digest)
+    return digest.hexdigest()
+
+
+# Min/max decimation: keeps the extremes of every curve within each of
+# `pixels` columns of the x axis (log-spaced when xscale is "log"), which is
+# visually lossless at that width. Each column contributes its minimum and
+# maximum at their own x, in the order they occur, so slopes are kept on
+# non-uniform x too. x must be sorted; y is (len(x),) or (n_curves, len(x)),
+# and x comes back with the shape of y since the kept points differ by curve.
+def downsample(x, y, pixels, xscale="linear"):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= 2 * pixels:
+        return x, y
+
+    position = np.log10(x) if xscale == "log" and x[0] > 0 else x.astype(float)
+    span = position[-1] - position[0]
+    column = np.floor((position - position[0]) * (pixels / span)) if span > 0 else np.zeros(len(x))
+    column = np.minimum(column, pixels - 1)
+    starts = np.flatnonzero(np.diff(column, prepend=-1))
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(x))))
+
+    index = np.arange(len(x))
+    low = np.fmin.reduceat(y, starts, axis=-1)
+    high = np.fmax.reduceat(y, starts, axis=-1)
+    first_low = np.minimum.reduceat(np.where(y == low[..., bucket], index, len(x)), starts, axis=-1)
+    first_high = np.minimum.reduceat(np.where(y == high[..., bucket], index, len(x)), starts, axis=-1)
+    # columns that are all NaN keep their first point
+    first_low = np.where(first_low < len(x), first_low, starts)
+    first_high = np.where(first_high < len(x), first_high, starts)
+    order = np.sort(np.stack([first_low, first_high], axis=-1), axis=-1).reshape(y.shape[:-1] + (-1,))
+    return x[order], np.take_along_axis(y, order, axis=-1)
+
+
+def _draw_series(ax, series, pixels, xscale):
+    x, y = downsample(series["x"], series["y"], pixels, xscale)
+    style = {"linewidth": series.get("linewidth", 2.0), "linestyle": series.get("linestyle", "solid")}
+
+    if y.ndim == 1:
+        ax.plot(x, y, color=series.get("color"), label=series.get("label"), **style)
+        return
+
+    segments = np.empty(y.shape + (2,))
+    segments[:, :, 0] = x
+    segments[:, :, 1] = y
+    lines = LineCollection(segments, cmap=series.get("cmap", "viridis"), label=series.get("label"), **style)
+    if series.get("color") is not None:
+        lines.set_color(series["color"])
+    else:
+        lines.set_array(np.arange(len(y)))
+    ax.add_collection(lines)
+    ax.autoscale_view()
+
+
+def _draw_panel(ax, panel, pixels):
+    for series in panel.get("series", []):
+        _draw_series(ax, series, pixels, panel.get("xscale", "linear"))
+    for line in panel.get("hlines", []):
+        ax.axhline(y=line["y"], color=line.get("color", "k"), linestyle=line.get("linestyle", "--"),
+                   label=line.get("label"))
+
+    ax.set_title(panel.get("title", ""))
+    ax.set_xlabel(panel.get("xlabel", ""))
+    ax.set_ylabel(panel.get("ylabel", ""))
+    ax.set_xscale(panel.get("xscale", "linear"))
+    ax.set_yscale(panel.get("yscale", "linear"))
+    if panel.get("grid", True):
+        ax.grid()
+    if panel.get("legend"):
+        ax.legend(loc=panel["legend"] if isinstance(panel["legend"], str) else "best")
+
+
+def build_figure(spec):
+    figsize = spec.get("figsize", (6.4, 4.8))
+    dpi = spec.get("dpi", 100)
+    nrows, ncols = spec.get("nrows", 1), spec.get("ncols", 1)
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    for i, panel in enumerate(spec["panels"]):
+        ax = fig.add_subplot(nrows, ncols, panel.get("cell", i + 1))
+        columns = len(ax.get_subplotspec().colspan)
+        _draw_panel(ax, panel, max(1, int(figsize[0] * dpi * columns / ncols)))
+    if spec.get("suptitle"):
+        fig.suptitle(spec["suptitle"])
+    fig.tight_layout()
+    return fig
+
+
+def _sidecar(path):
+    return path + ".sha256"
+
+
+def is_current(spec, path):
+    try:
+        with open(_sidecar(path)) as f:
+            stored = f.read().strip()
+    except OSError:
+        return False
+    return os.path.exists(path) and stored == spec_hash(spec)
+
+
+# rcParams for the spec's font_size and font_family: the requested families
+# that are installed or generic, or none (matplotlib's default) if none of
+# them is
+def _font_rc(spec):
+    rc = {"font.size": spec["font_size"]} if spec.get("font_size") else {}
+    families = spec.get("font_family")
+    if families is None:
+        return rc
+    families = [families] if isinstance(families, str) else list(families)
+    installed = {font.name for font in fontManager.ttflist}
+    available = [family for family in families if family in installed or family in GENERIC_FAMILIES]
+    if available:
+        rc["font.family"] = available
+    return rc
+
+
+# Renders spec to path unless the file is already up to date; returns True
+# when the figure was drawn
+def render_figure(spec, path, force=False):
+    if not force and is_current(spec, path):
+        return False
+
+    with stage("plotting"), matplotlib.rc_context(_font_rc(spec)):
+        fig = build_figure(spec)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fig.savefig(path)
+    with open(_sidecar(path), "w") as f:
+        f.write(spec_hash(spec) + "\n")
+    return True
+
+
+# Renders {filename: spec} into out_dir; returns {path: rendered}
+def render_batch(specs, out_dir, force=False):
+    return {os.path.join(out_dir, name): render_figure(spec, os.path.join(out_dir, name), force)
+            for name, spec in specs.items()}
@@ -0,0 +1,82 @@
+import numpy as np
+
+from profiling import stage
+from rheology import MODEL_PY_PARAMS, pressure_gradient
+
+# Radial velocity, shear-rate and stress profiles of steady tube flow under
+# the gravity-modified pressure gradient G = (p/l) - g*rho*sin(theta). The
+# momentum balance fixes the shear stress at radius s to G*s/2 for every
+# fluid (so the wall value is rheology.gradient_stress); the constitutive law
+# then gives the shear rate, and its closed-form integral the velocity and
+# flow rate:
+#   power law   tau = m * gamma^n             (m, n)
+#   newtonian   tau = mu * gamma              (mu)
+#   bingham     tau = ys + mu * gamma         (ys, mu as plastic viscosity),
+#               with a rigid plug core of radius 2*ys/|G|
+# Every scenario argument broadcasts like rheology.wall_shear_stress; profiles
+# are sampled on a shared grid of `points` radii from the axis to the wall
+# (s = xi * r, xi in [0, 1]) and come back with shape (*scenarios, points).
+# Velocities and flow rates carry the sign of G.
+
+
+def _grid(points):
+    return np.linspace(0.0, 1.0, points)
+
+
+def _power_law(G, s, R, params):
+    m, n = np.asarray(params["m"])[..., None], np.asarray(params["n"])[..., None]
+    k = (np.abs(G) / (2 * m)) ** (1 / n)
+    gamma = k * s ** (1 / n)
+    u = n / (n + 1) * k * (R ** (1 + 1 / n) - s ** (1 + 1 / n))
+    Q = np.pi * n / (3 * n + 1) * k * R ** (3 + 1 / n)
+    return u, gamma, Q[..., 0], None
+
+
+def _newtonian(G, s, R, params):
+    mu = np.asarray(params["mu"])[..., None]
+    gamma = np.abs(G) * s / (2 * mu)
+    u = np.abs(G) / (4 * mu) * (R ** 2 - s ** 2)
+    Q = np.pi * np.abs(G) * R ** 4 / (8 * mu)
+    return u, gamma, Q[..., 0], None
+
+
+def _bingham(G, s, R, params):
+    ys, mu = np.asarray(params["ys"])[..., None], np.asarray(params["mu"])[..., None]
+    with np.errstate(divide="ignore"):
+        plug = np.minimum(2 * ys / np.abs(G), R)
+    sheared = np.maximum(s, plug)
+    gamma = np.where(s > plug, (np.abs(G) * s / 2 - ys) / mu, 0.0)
+    # velocity at max(s, plug): constant across the plug
+    u = (np.abs(G) / 4 * (R ** 2 - sheared ** 2) - ys * (R - sheared)) / mu
+    phi = plug / R
+    Q = np.pi * R ** 4 * np.abs(G) / (8 * mu) * (1 - 4 / 3 * phi + phi ** 4 / 3)
+    return u, gamma, Q[..., 0], plug[..., 0]
+
+
+PROFILES = {"power_law": _power_law, "newtonian": _newtonian, "bingham": _bingham}
+
+
+def radial_profiles(model, g, theta, r, p, l, params=MODEL_PY_PARAMS, points=64):
+    if model not in PROFILES:
+        raise ValueError(f"unknown model {model!r}, expected one of {sorted(PROFILES)}")
+    G = pressure_gradient(g, theta, p, l, params["rho"])
+    G, R = np.broadcast_arrays(G, np.asarray(r, dtype=float))
+    shape = np.broadcast_shapes(G.shape, *(np.shape(params[name]) for name in ("m", "n", "mu", "ys")))
+    G, R = np.broadcast_to(G, shape)[..., None], np.broadcast_to(R, shape)[..., None]
+    s = R * _grid(points)
+
+    with stage("evaluation", int(np.prod(shape)) * points):
+        u, gamma, Q, plug = PROFILES[model](G, s, R, params)
+        sign = np.sign(G)
+        result = {
+            "s": s,
+            "u": sign * u,
+            "shear_rate": gamma,
+            "stress": G * s / 2,
+            "flow_rate": sign[..., 0] * Q,
+            "mean_velocity": sign[..., 0] * Q / (np.pi * R[..., 0] ** 2),
+            "wall_shear": np.abs(G[..., 0]) * R[..., 0] / 2,
+        }
+    if plug is not None:
+        result["plug_radius"] = plug
+    return result
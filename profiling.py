@@ -0,0 +1,199 @@
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import platform
+import pstats
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Stage timers for the analysis pipelines. A Profiler used as a context
+# manager becomes the active one, and the library marks its stages with
+# profiling.stage(...) (parameter setup, evaluation, reduction, plotting, io),
+# which costs nothing when no profiler is active. Stages nest; nested stages
+# are reported as "outer/inner". Optionally the whole run is profiled with
+# cProfile and memory is traced with tracemalloc (peak per stage as well as
+# overall, at a sizeable slowdown). report() gives wall time, peak memory and
+# evaluations per second as a JSON-ready dict.
+#
+#   with Profiler("gravity sweep", trace_memory=True) as prof:
+#       with stage("setup"):
+#           axes = ...
+#       run_sweep(...)
+#   prof.write("report.json")
+#
+# Only the calling process is measured; work done in parallel.py's worker
+# processes shows up as time spent in the stage that waits for them.
+
+_active = []
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+class Profiler:
+    def __init__(self, name="run", cprofile=False, trace_memory=False):
+        self.name = name
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._stack = []
+        # highest traced memory seen by each open stage and by the whole run;
+        # tracemalloc keeps a single peak, which every stage resets
+        self._peaks = []
+        self._run_peak = 0
+        self._profile = None
+        self._started_tracing = False
+        self.wall_time = None
+        self.peak_memory = None
+
+    def __enter__(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            self._run_peak = 0
+        if self.cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        _active.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_time = time.perf_counter() - self._start
+        _active.remove(self)
+        if self._profile is not None:
+            self._profile.disable()
+        if self.trace_memory:
+            self._fold_peak()
+            self.peak_memory = self._run_peak
+            if self._started_tracing:
+                tracemalloc.stop()
+        return False
+
+    # Folds tracemalloc's peak into every open stage and the run before it is reset
+    def _fold_peak(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peaks = [max(value, peak) for value in self._peaks]
+        self._run_peak = max(self._run_peak, peak)
+
+    def _entry(self, key):
+        return self.stages.setdefault(key, {"calls": 0, "seconds": 0.0, "evaluations": 0, "peak_memory": None})
+
+    # Times the enclosed block under name; evaluations counts the model
+    # evaluations it performs (also settable later through count())
+    @contextlib.contextmanager
+    def stage(self, name, evaluations=0):
+        self._stack.append(name)
+        key = "/".join(self._stack)
+        if self.trace_memory:
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            self._peaks.append(before)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = self._entry(key)
+            entry["calls"] += 1
+            entry["seconds"] += elapsed
+            entry["evaluations"] += evaluations
+            if self.trace_memory:
+                self._fold_peak()
+                peak = self._peaks.pop() - before
+                entry["peak_memory"] = max(entry["peak_memory"] or 0, peak)
+            self._stack.pop()
+
+    # Adds evaluations to the innermost open stage
+    def count(self, evaluations):
+        if self._stack:
+            self._entry("/".join(self._stack))["evaluations"] += evaluations
+
+    def timed(self, name=None):
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or fn.__name__):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _profile_rows(self, limit):
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({"function": f"{filename}:{line}({function})", "calls": calls,
+                         "tottime": tottime, "cumtime": cumtime})
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:limit]
+
+    def report(self, profile_rows=30):
+        stages = {}
+        for key, entry in self.stages.items():
+            stages[key] = dict(entry)
+            if entry["evaluations"] and entry["seconds"] > 0:
+                stages[key]["evaluations_per_second"] = entry["evaluations"] / entry["seconds"]
+        report = {"name": self.name, "wall_time": self.wall_time, "peak_rss": _peak_rss(),
+                  "peak_traced_memory": self.peak_memory, "stages": stages}
+        if self._profile is not None:
+            report["profile"] = self._profile_rows(profile_rows)
+        return report
+
+    def write(self, path, profile_rows=30):
+        with open(path, "w") as f:
+            json.dump(self.report(profile_rows), f, indent=1)
+        if self._profile is not None:
+            self._profile.dump_stats(path.rsplit(".", 1)[0] + ".prof")
+
+    def summary(self):
+        lines = [f"{self.name}: {self.wall_time:.3f} s"]
+        for key, entry in self.stages.items():
+            line = f"  {key}: {entry['seconds']:.3f} s in {entry['calls']} calls"
+            if entry["evaluations"]:
+                line += f", {entry['evaluations'] / max(entry['seconds'], 1e-12):.3g} evaluations/s"
+            if entry["peak_memory"] is not None:
+                line += f", peak {entry['peak_memory'] / 2**20:.1f} MiB"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def active():
+    return _active[-1] if _active else None
+
+
+# Stage of the active profiler, or a no-op outside of one
+def stage(name, evaluations=0):
+    if not _active:
+        return contextlib.nullcontext()
+    return _active[-1].stage(name, evaluations)
+
+
+def count(evaluations):
+    if _active:
+        _active[-1].count(evaluations)
+
+
+# Decorator timing every call of the function as a stage of the active profiler
+def timed(name=None):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
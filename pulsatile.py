@@ -0,0 +1,104 @@
+import numpy as np
+from scipy.special import jve
+
+from profiling import stage
+from rheology import CORONARY, MODEL_PY_PARAMS, get_model
+
+# Wall shear stress under a periodic pressure drop dP(t) instead of the
+# constant p of the scripts. One period of dP(t), sampled uniformly, is split
+# into harmonics with an FFT; each harmonic k of angular frequency
+# w_k = 2 pi k / period drives an oscillatory flow whose wall stress follows
+# Womersley's solution for a rigid tube,
+#   tau_k = (dP_k / l) * (r / 2) * F(alpha_k),   F = 2 J1(L) / (L J0(L)),
+#   alpha_k = r sqrt(w_k rho / mu),   L = i^(3/2) alpha_k,
+# so F -> 1 (the steady r/2 law) as alpha -> 0 and the stress amplitude drops
+# and shifts phase as the harmonic gets faster. Gravity is steady and only
+# enters the mean (k = 0) term, as -g*rho*sin(theta). All harmonics of all
+# scenarios are evaluated in one array expression and summed back into one
+# cycle with an inverse FFT, so no time marching is needed.
+#
+# The result is the signed Womersley wall stress over the cycle. For a model
+# other than None it is passed through that model of rheology.py at each
+# instant (quasi-steady, keeping the sign), which reproduces
+# rheology.wall_shear_stress exactly for a constant dP. From the cycle come
+# the time-averaged WSS, mean(|tau|), and the oscillatory shear index,
+# OSI = (1 - |mean(tau)| / mean(|tau|)) / 2, from 0 (one-way shear) to 0.5
+# (purely oscillating).
+
+# Heart rate of 72 beats per minute
+PERIOD = 60 / 72
+
+# Harmonics of a coronary-like dP(t) as (amplitude relative to the mean,
+# phase in radians)
+CORONARY_HARMONICS = ((0.55, -1.2), (0.35, -2.1), (0.18, -2.9), (0.08, 2.6), (0.04, 1.8))
+
+
+# One period of dP(t) at `samples` points from its mean and harmonics
+def fourier_waveform(mean=CORONARY["p"], harmonics=CORONARY_HARMONICS, samples=256):
+    t = np.arange(samples) / samples
+    waveform = np.full(samples, float(mean))
+    for k, (amplitude, phase) in enumerate(harmonics, start=1):
+        waveform += mean * amplitude * np.cos(2 * np.pi * k * t + phase)
+    return waveform
+
+
+def womersley_number(r, omega, rho, mu):
+    return np.multiply(r, np.sqrt(np.multiply(omega, rho) / mu))
+
+
+# F(alpha) = 2 J1(L) / (L J0(L)); the exponentially scaled Bessel functions
+# keep the ratio finite for large alpha
+def womersley_factor(alpha):
+    alpha = np.asarray(alpha, dtype=float)
+    L = np.exp(0.75j * np.pi) * np.where(alpha > 0, alpha, 1.0)
+    return np.where(alpha > 0, 2 * jve(1, L) / (L * jve(0, L)), 1.0)
+
+
+# Complex amplitudes c_k of dP(t) = sum_k Re(c_k exp(i w_k t)), k = 0..K
+def harmonics(waveform, n_harmonics=None):
+    waveform = np.asarray(waveform, dtype=float)
+    samples = waveform.shape[-1]
+    coefficients = np.fft.rfft(waveform, axis=-1) / samples
+    coefficients[..., 1:] *= 2
+    if samples % 2 == 0:
+        coefficients[..., -1] /= 2
+    return coefficients if n_harmonics is None else coefficients[..., :n_harmonics + 1]
+
+
+# Wall shear stress over one cycle of dP(t) for every scenario. waveform has
+# the samples of one period on its last axis; its other axes, g, theta, r and
+# l broadcast together into the scenario shape. Returns the cycle t (samples,)
+# and tau (*scenarios, samples) plus the per-scenario mean, tawss and osi.
+def pulsatile_wss(waveform, g, theta=CORONARY["theta"], r=CORONARY["r"], l=CORONARY["l"], params=MODEL_PY_PARAMS,
+                  model=None, period=PERIOD, n_harmonics=None, samples=None):
+    c = harmonics(waveform, n_harmonics)
+    samples = np.shape(waveform)[-1] if samples is None else samples
+    omega = 2 * np.pi / period * np.arange(c.shape[-1])
+    rho, mu = params["rho"], params["mu"]
+    g, theta, r, l = (np.asarray(value, dtype=float)[..., None] for value in (g, theta, r, l))
+
+    with stage("evaluation", int(np.prod(np.broadcast_shapes(c.shape, g.shape, theta.shape, r.shape, l.shape)))):
+        gradient = c / l - g * rho * np.sin(np.radians(theta)) * (omega == 0)
+        amplitude = gradient * (r / 2) * womersley_factor(womersley_number(r, omega, rho, mu))
+        # back to the time domain: undo the one-sided scaling of harmonics()
+        spectrum = amplitude * samples / 2
+        spectrum[..., 0] *= 2
+        size = samples // 2 + 1
+        if spectrum.shape[-1] < size:
+            spectrum = np.concatenate([spectrum, np.zeros(spectrum.shape[:-1] + (size - spectrum.shape[-1],))],
+                                      axis=-1)
+        spectrum = spectrum[..., :size]
+        if samples % 2 == 0:
+            spectrum[..., -1] *= 2
+        tau = np.fft.irfft(spectrum, n=samples, axis=-1)
+
+        if model is not None:
+            tau = np.sign(tau) * get_model(model)(np.abs(tau), params)
+
+    with stage("reduction"):
+        mean = tau.mean(axis=-1)
+        tawss = np.abs(tau).mean(axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            osi = np.where(tawss > 0, 0.5 * (1 - np.abs(mean) / tawss), 0.0)
+    return {"t": np.arange(samples) * period / samples, "tau": tau, "harmonics": amplitude, "mean": mean,
+            "tawss": tawss, "osi": osi}
@@ -0,0 +1,273 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+from parallel import pool_context, resolve_workers
+from plotting import render_figure
+from profiling import Profiler, stage
+from result_cache import digest
+from rheology import PROJECT2_PARAMS, wall_shear_stress
+from sensitivity import factor_bounds, sobol_indices
+
+# Headless batch runner for the studies of Project2_Code.py and
+# sensitivity_analysis.py:
+#
+#   python qphys.py list
+#   python qphys.py run gravity radius --config cfg.toml --out results --jobs 4
+#   python qphys.py run all --out results
+#
+# Each study writes <out>/<study>.npz (the arrays), <out>/<study>.png (the
+# figure, drawn on the Agg canvas) and <out>/<study>.json (a stamp with the
+# hash of the study's configuration). A study whose stamp still matches its
+# configuration and whose outputs all exist is skipped unless --force is
+# given. Studies run in separate processes, --jobs at a time.
+#
+# The config file is TOML. [params] overrides the rheology constants and
+# [geometry] the fixed vessel geometry for every study; a table named after a
+# study overrides that study's own settings, e.g.
+#
+#   [params]
+#   scale = 500
+#
+#   [gravity]
+#   g_stop = 20.0
+#   models = ["power_law", "newtonian", "bingham"]
+
+# Bump when a study's computation changes so existing outputs are redone
+STUDY_VERSION = 2
+
+# Project2_Code.py's generalized coronary artery
+GEOMETRY = {"theta": -45, "r": .0015, "p": 10000, "l": .03}
+
+GRAVITIES = [9.8e-6, 3.3, 6.6, 9.8]
+COLORS = ["r", "b", "g", "y", "m", "c"]
+
+DEFAULTS = {
+    "params": PROJECT2_PARAMS,
+    "geometry": GEOMETRY,
+    "threshold": 0.6,
+    "gravity": {"g_start": 0.0, "g_stop": 9.8, "g_step": .01, "models": ["power_law", "newtonian"]},
+    "radius": {"r_start": .0005, "r_stop": .0035, "r_step": .00001, "gravities": GRAVITIES, "model": "power_law"},
+    "angle": {"theta_start": -90.0, "theta_stop": 90.0, "theta_step": 1.0, "gravities": GRAVITIES,
+              "model": "power_law"},
+    "control": {"g_start": 10.0, "g_stop": 20.0, "g_step": .01, "models": ["power_law", "newtonian"]},
+    "sensitivity": {"g_start": 0.0, "g_stop": 10.0, "g_step": .01, "n_samples": 2**14, "workers": 1,
+                    "factors": {"power_law": ["m", "n", "rho", "p", "l"], "bingham": ["ys", "rho", "p", "l"]}},
+}
+
+LABELS = {"power_law": "Power Law Fluid (Shear Thinning)", "newtonian": "Newtonian Fluid",
+          "bingham": "Bingham Plastic Fluid"}
+
+
+def _threshold_line(config):
+    return [{"y": config["threshold"], "color": "k", "linestyle": "--"}]
+
+
+# WSS against g for each model (Project2_Code.py's first panel and its
+# control analysis)
+def _gravity_curves(config, section, title):
+    settings = config[section]
+    g = np.arange(settings["g_start"], settings["g_stop"], settings["g_step"])
+    geometry = config["geometry"]
+    arrays = {"g": g}
+    series = []
+    for i, model in enumerate(settings["models"]):
+        with stage("evaluation", len(g)):
+            arrays[model] = wall_shear_stress(model, g, geometry["theta"], geometry["r"], geometry["p"],
+                                              geometry["l"], config["params"])
+        series.append({"x": g, "y": arrays[model], "color": COLORS[i % len(COLORS)], "label": LABELS.get(model, model)})
+    panel = {"title": title, "xlabel": "Acceleration due to Gravity (m/s^2)", "ylabel": "Wall Shear Stress (Pa)",
+             "series": series, "hlines": _threshold_line(config), "legend": "lower right"}
+    return arrays, {"figsize": (8, 5), "panels": [panel]}
+
+
+def gravity_study(config):
+    return _gravity_curves(config, "gravity", "Gravity-Induced Changes in Wall Shear Stress in Generalized Coronary Artery")
+
+
+def control_study(config):
+    return _gravity_curves(config, "control", "Gravity-Induced Changes in Wall Shear Stress: Control Analysis")
+
+
+# WSS against one geometry axis at several gravities
+def _axis_curves(config, section, axis, values, x, xlabel, title):
+    settings = config[section]
+    geometry = dict(config["geometry"])
+    gravities = np.asarray(settings["gravities"], dtype=float)
+    geometry[axis] = values[None, :]
+    with stage("evaluation", gravities.size * values.size):
+        tau = wall_shear_stress(settings["model"], gravities[:, None], geometry["theta"], geometry["r"],
+                                geometry["p"], geometry["l"], config["params"])
+    series = [{"x": x, "y": tau[i], "color": COLORS[i % len(COLORS)], "label": f"g = {g} m/s^2"}
+              for i, g in enumerate(gravities)]
+    panel = {"title": title, "xlabel": xlabel, "ylabel": "Wall Shear Stress (Pa)", "series": series,
+             "hlines": _threshold_line(config), "legend": "best"}
+    return {axis: values, "gravities": gravities, settings["model"]: tau}, {"figsize": (8, 5), "panels": [panel]}
+
+
+def radius_study(config):
+    settings = config["radius"]
+    r = np.arange(settings["r_start"], settings["r_stop"], settings["r_step"])
+    return _axis_curves(config, "radius", "r", r, r * 1000, "Vessel Radius (mm)",
+                        "Gravity-Induced Changes in Wall Shear Stress along Vessel Radius")
+
+
+def angle_study(config):
+    settings = config["angle"]
+    theta = np.arange(settings["theta_start"], settings["theta_stop"], settings["theta_step"])
+    return _axis_curves(config, "angle", "theta", theta, theta, "Angle ϴ (degrees)",
+                        "Gravity-Induced Changes in Wall Shear Stress at Different Angles")
+
+
+# Sobol indices of sensitivity_analysis.py, one panel per model, around the
+# same constants and geometry as the other studies
+def sensitivity_study(config):
+    settings = config["sensitivity"]
+    g = np.arange(settings["g_start"], settings["g_stop"], settings["g_step"])
+    base = dict(config["params"], **config["geometry"])
+    arrays = {"g": g}
+    panels = []
+    for model, names in settings["factors"].items():
+        sobol = sobol_indices(model, factor_bounds(names, base), g, n_samples=settings["n_samples"], base=base,
+                              workers=settings["workers"])
+        arrays[model + "_S1"] = sobol["S1"]
+        arrays[model + "_ST"] = sobol["ST"]
+        series = []
+        for i, name in enumerate(names):
+            color = COLORS[i % len(COLORS)]
+            series.append({"x": g, "y": sobol["ST"][i], "color": color, "label": f"{name} (total)"})
+            series.append({"x": g, "y": sobol["S1"][i], "color": color, "linewidth": 1.0, "linestyle": "dashed",
+                           "label": f"{name} (first order)"})
+        panels.append({"title": f"Sobol Indices, {model.replace('_', ' ').title()}", "series": series,
+                       "xlabel": "Acceleration due to Gravity (m/s^2)", "ylabel": "Sobol Index", "legend": "best"})
+    return arrays, {"ncols": len(panels), "figsize": (6 * len(panels), 5), "panels": panels}
+
+
+STUDIES = {
+    "gravity": gravity_study,
+    "radius": radius_study,
+    "angle": angle_study,
+    "control": control_study,
+    "sensitivity": sensitivity_study,
+}
+
+
+# Defaults overlaid with the tables of a TOML config file
+def load_config(path=None):
+    config = copy.deepcopy(DEFAULTS)
+    if path is None:
+        return config
+    with open(path, "rb") as f:
+        overrides = tomllib.load(f)
+
+    unknown = set(overrides) - set(config)
+    if unknown:
+        raise ValueError(f"unknown config sections {sorted(unknown)} in {path}")
+    for key, value in overrides.items():
+        if isinstance(config[key], dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+    return config
+
+
+# The part of the configuration a study depends on
+def study_config(config, name):
+    shared = {key: config[key] for key in ("params", "geometry", "threshold")}
+    return dict(shared, **{name: config[name]})
+
+
+def outputs(out_dir, name):
+    return {kind: os.path.join(out_dir, f"{name}.{kind}") for kind in ("npz", "png", "json")}
+
+
+def is_up_to_date(config, name, out_dir):
+    paths = outputs(out_dir, name)
+    try:
+        with open(paths["json"]) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return stamp.get("key") == study_key(config, name) and all(os.path.exists(path) for path in paths.values())
+
+
+def study_key(config, name):
+    return digest({"version": STUDY_VERSION, "study": name, "config": study_config(config, name)})
+
+
+# Runs one study and writes its outputs; returns (name, status, seconds)
+def run_study(name, config, out_dir, force=False, profile=False):
+    if not force and is_up_to_date(config, name, out_dir):
+        return name, "up to date", 0.0
+
+    paths = outputs(out_dir, name)
+    start = time.perf_counter()
+    with Profiler(name, trace_memory=profile) as prof:
+        with stage("setup"):
+            settings = study_config(config, name)
+        arrays, figure = STUDIES[name](settings)
+        with stage("io"):
+            np.savez(paths["npz"], **arrays)
+        render_figure(figure, paths["png"], force=True)
+    elapsed = time.perf_counter() - start
+
+    if profile:
+        prof.write(os.path.join(out_dir, f"{name}.profile.json"))
+    with open(paths["json"], "w") as f:
+        json.dump({"key": study_key(config, name), "study": name, "wall_time": elapsed,
+                   "outputs": [paths["npz"], paths["png"]]}, f, indent=1)
+    return name, "done", elapsed
+
+
+def run(names, config, out_dir, jobs=1, force=False, profile=False):
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = min(resolve_workers(jobs), len(names))
+    if jobs == 1:
+        return [run_study(name, config, out_dir, force, profile) for name in names]
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=pool_context()) as pool:
+        futures = [pool.submit(run_study, name, config, out_dir, force, profile) for name in names]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="qphys", description="Run the wall shear stress studies headless.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the available studies")
+    runner = commands.add_parser("run", help="run studies")
+    runner.add_argument("studies", nargs="+", help=f"study names or 'all' ({', '.join(STUDIES)})")
+    runner.add_argument("--config", help="TOML file overriding the default settings")
+    runner.add_argument("--out", default="results", help="output directory")
+    runner.add_argument("--jobs", type=int, default=1, help="studies run at once (0 for one per CPU)")
+    runner.add_argument("--force", action="store_true", help="rerun studies that are up to date")
+    runner.add_argument("--profile", action="store_true", help="write a <study>.profile.json timing report")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name in STUDIES:
+            print(name)
+        return 0
+
+    names = list(STUDIES) if "all" in args.studies else args.studies
+    unknown = [name for name in names if name not in STUDIES]
+    if unknown:
+        parser.error(f"unknown studies {unknown}, expected one of {list(STUDIES)}")
+
+    config = load_config(args.config)
+    for name, status, seconds in run(names, config, args.out, args.jobs or None, args.force, args.profile):
+        print(f"{name}: {status}" + (f" in {seconds:.2f} s" if status == "done" else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
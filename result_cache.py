@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from rheology import MODEL_PY_PARAMS
+from sweep import DEFAULT_CHUNK_SIZE, DEFAULT_FIXED, NpyWriter, grid_shape, normalize_axes, run_sweep
+
+# On-disk, content-addressed cache for sweep results. A sweep is identified by
+# its model, parameter values, fixed geometry and every axis except the first
+# (the "primary" axis, e.g. g for the gravity sweeps). Each stored entry holds
+# a block of primary-axis values and the results for them as two .npy files
+# named by the hash of their content, and is read back memory-mapped. A new
+# request only evaluates the primary-axis values no entry covers yet, so
+# repeated sweeps return from disk and overlapping ones compute only the
+# missing slices. Entries are evicted least recently used first once the
+# cache grows past max_bytes.
+
+# Bump when the models change so stale entries are never matched
+CACHE_VERSION = 1
+
+INDEX_FILE = "index.json"
+
+# Primary-axis values this close count as the same grid point, so grids built
+# by different np.arange calls still overlap despite last-bit differences
+MATCH_RTOL = 1e-12
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(key): _canonical(value[key]) for key in sorted(value)}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return {"dtype": value.dtype.str, "shape": list(value.shape),
+                "sha256": hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    return value
+
+
+def digest(value):
+    return hashlib.sha256(json.dumps(_canonical(value), sort_keys=True).encode()).hexdigest()
+
+
+def sweep_key(model, axes, params, fixed):
+    axes = normalize_axes(axes)
+    return digest({"version": CACHE_VERSION, "model": model, "params": params, "fixed": fixed,
+                   "primary": axes[0][0], "rest": [[name, values] for name, values in axes[1:]]})
+
+
+# For each query value, the row of x holding the same value (within
+# MATCH_RTOL) and whether there is one
+def nearest_rows(x, query):
+    order = np.argsort(x)
+    right = np.clip(np.searchsorted(x, query, sorter=order), 0, len(x) - 1)
+    left = np.clip(right - 1, 0, len(x) - 1)
+    closer = np.abs(x[order[left]] - query) < np.abs(x[order[right]] - query)
+    row = order[np.where(closer, left, right)]
+    match = np.abs(x[row] - query) <= MATCH_RTOL * np.maximum(np.abs(query), 1e-300)
+    return row, match
+
+
+class ResultCache:
+    def __init__(self, directory, max_bytes=2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_index()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load_index(self):
+        try:
+            with open(self._path(INDEX_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"clock": 0, "sweeps": {}}
+
+    def _save_index(self):
+        tmp = self._path(INDEX_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self._path(INDEX_FILE))
+
+    def _touch(self, entry):
+        self.index["clock"] += 1
+        entry["last_used"] = self.index["clock"]
+
+    def total_bytes(self):
+        return sum(entry["bytes"] for entries in self.index["sweeps"].values() for entry in entries)
+
+    def _evict(self):
+        entries = [(entry["last_used"], key, entry)
+                   for key, sweep_entries in self.index["sweeps"].items() for entry in sweep_entries]
+        entries.sort(key=lambda item: item[0])
+        total = self.total_bytes()
+        for _, key, entry in entries:
+            if total <= self.max_bytes:
+                break
+            for name in (entry["x"], entry["data"]):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self.index["sweeps"][key].remove(entry)
+            if not self.index["sweeps"][key]:
+                del self.index["sweeps"][key]
+            total -= entry["bytes"]
+
+    # Wall shear stress over the full grid of axes, of shape grid_shape(axes)
+    def sweep(self, model, axes, params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED, chunk_size=DEFAULT_CHUNK_SIZE):
+        axes = normalize_axes(axes)
+        key = sweep_key(model, axes, params, fixed)
+        primary_name, query = axes[0]
+        rest = axes[1:]
+        result = np.empty(grid_shape(axes))
+        filled = np.zeros(len(query), dtype=bool)
+
+        for entry in self.index["sweeps"].get(key, []):
+            x = np.load(self._path(entry["x"]))
+            row, match = nearest_rows(x, query)
+            match &= ~filled
+            if match.any():
+                data = np.load(self._path(entry["data"]), mmap_mode="r")
+                result[match] = data[row[match]]
+                filled |= match
+                self._touch(entry)
+
+        missing = np.unique(query[~filled])
+        self.hits += int(filled.sum())
+        self.misses += len(missing)
+        if len(missing):
+            entry = self._compute(key, model, [(primary_name, missing)] + rest, params, fixed, chunk_size)
+            data = np.load(self._path(entry["data"]), mmap_mode="r")
+            position = np.searchsorted(missing, query[~filled])
+            result[~filled] = data[position]
+
+        self._evict()
+        self._save_index()
+        return result
+
+    # Evaluates and stores a new entry for the primary-axis values of axes
+    def _compute(self, key, model, axes, params, fixed, chunk_size):
+        name = digest({"sweep": key, "x": axes[0][1]})
+        entry = {"x": name + ".x.npy", "data": name + ".npy"}
+        np.save(self._path(entry["x"]), axes[0][1])
+        run_sweep(model, axes, NpyWriter(self._path(entry["data"]), grid_shape(axes)), params, fixed, chunk_size)
+        entry["bytes"] = os.path.getsize(self._path(entry["x"])) + os.path.getsize(self._path(entry["data"]))
+        self._touch(entry)
+        self.index["sweeps"].setdefault(key, []).append(entry)
+        return entry
+
+    def clear(self):
+        for entries in self.index["sweeps"].values():
+            for entry in entries:
+                for name in (entry["x"], entry["data"]):
+                    if os.path.exists(self._path(name)):
+                        os.remove(self._path(name))
+        self.index = {"clock": 0, "sweeps": {}}
+        self._save_index()
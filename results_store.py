@@ -0,0 +1,182 @@
+import json
+import os
+
+import numpy as np
+
+from rheology import MODEL_PY_PARAMS
+from sweep import DEFAULT_CHUNK_SIZE, DEFAULT_FIXED, grid_shape, normalize_axes, run_sweep
+
+# Chunked, memory-mapped columnar store for sweep results. A store is a
+# directory holding
+#   manifest.json              shape, axes, columns, chunk size, progress
+#   axes/<name>.npy            values along each grid axis
+#   columns/<column>/<i>.npy   flat rows [i * chunk_rows, (i + 1) * chunk_rows)
+# A sweep writes it incrementally through ColumnSink (a sweep.run_sweep sink)
+# and the manifest is rewritten as chunks fill up, so a partially written
+# store can already be read. Readers memory-map only the chunks a selection
+# touches; a flat slice inside one chunk comes back as a zero-copy view.
+
+MANIFEST = "manifest.json"
+STORE_VERSION = 1
+DEFAULT_CHUNK_ROWS = 2**22
+
+
+def _write_manifest(path, manifest):
+    tmp = os.path.join(path, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+
+def _chunk_file(path, column, chunk):
+    return os.path.join(path, "columns", column, f"{chunk:06d}.npy")
+
+
+class StoreWriter:
+    def __init__(self, path, axes, columns, chunk_rows=DEFAULT_CHUNK_ROWS, dtype=np.float64, metadata=None):
+        axes = normalize_axes(axes)
+        self.path = path
+        self.shape = grid_shape(axes)
+        self.size = int(np.prod(self.shape))
+        self.chunk_rows = chunk_rows
+        self.dtype = np.dtype(dtype)
+
+        os.makedirs(os.path.join(path, "axes"), exist_ok=True)
+        for name, values in axes:
+            np.save(os.path.join(path, "axes", name + ".npy"), values)
+        for column in columns:
+            os.makedirs(os.path.join(path, "columns", column), exist_ok=True)
+
+        self.manifest = {
+            "version": STORE_VERSION,
+            "shape": list(self.shape),
+            "axes": [name for name, _ in axes],
+            "chunk_rows": chunk_rows,
+            "columns": {column: {"dtype": self.dtype.str, "rows_written": 0} for column in columns},
+            "metadata": metadata or {},
+        }
+        self._open = {}
+        _write_manifest(path, self.manifest)
+
+    def n_chunks(self):
+        return -(-self.size // self.chunk_rows)
+
+    def _chunk(self, column, chunk):
+        key = (column, chunk)
+        if key not in self._open:
+            rows = min(self.chunk_rows, self.size - chunk * self.chunk_rows)
+            self._open[key] = np.lib.format.open_memmap(_chunk_file(self.path, column, chunk), mode="w+",
+                                                        dtype=self.dtype, shape=(rows,))
+        return self._open[key]
+
+    # Writes flat rows [start, stop) of a column, closing chunks once full
+    def write(self, column, start, stop, values):
+        values = np.broadcast_to(values, (stop - start,))
+        position = start
+        while position < stop:
+            chunk = position // self.chunk_rows
+            offset = position - chunk * self.chunk_rows
+            end = min(stop, (chunk + 1) * self.chunk_rows)
+            array = self._chunk(column, chunk)
+            array[offset:offset + end - position] = values[position - start:end - start]
+            position = end
+            if end == chunk * self.chunk_rows + len(array):
+                array.flush()
+                del self._open[(column, chunk)]
+                self.manifest["columns"][column]["rows_written"] = max(
+                    self.manifest["columns"][column]["rows_written"], end)
+                _write_manifest(self.path, self.manifest)
+
+    def sink(self, column):
+        return ColumnSink(self, column)
+
+    def close(self):
+        for array in self._open.values():
+            array.flush()
+        self._open.clear()
+        _write_manifest(self.path, self.manifest)
+
+
+# sweep.run_sweep sink writing one column of a store
+class ColumnSink:
+    stage = "io"
+
+    def __init__(self, writer, column):
+        self.writer = writer
+        self.column = column
+
+    def update(self, start, stop, values):
+        self.writer.write(self.column, start, stop, values)
+
+    def result(self):
+        self.writer.close()
+        return self.writer.path
+
+
+# Evaluates each model over axes into one column per model
+def write_sweep(path, models, axes, params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED, chunk_rows=DEFAULT_CHUNK_ROWS,
+                chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float64):
+    writer = StoreWriter(path, axes, models, chunk_rows, dtype, metadata={"params": params, "fixed": fixed})
+    for model in models:
+        run_sweep(model, axes, writer.sink(model), params, fixed, chunk_size)
+    return ResultsStore(path)
+
+
+class ResultsStore:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.shape = tuple(self.manifest["shape"])
+        self.size = int(np.prod(self.shape))
+        self.chunk_rows = self.manifest["chunk_rows"]
+        self.columns = list(self.manifest["columns"])
+        self.axes = self.manifest["axes"]
+        self._chunks = {}
+
+    def axis(self, name):
+        return np.load(os.path.join(self.path, "axes", name + ".npy"))
+
+    def complete(self, column):
+        return self.manifest["columns"][column]["rows_written"] >= self.size
+
+    def _chunk(self, column, chunk):
+        key = (column, chunk)
+        if key not in self._chunks:
+            self._chunks[key] = np.load(_chunk_file(self.path, column, chunk), mmap_mode="r")
+        return self._chunks[key]
+
+    # Flat rows [start, stop); a view when the range sits inside one chunk
+    def read_flat(self, column, start=0, stop=None):
+        stop = self.size if stop is None else min(stop, self.size)
+        first, last = start // self.chunk_rows, max(start, stop - 1) // self.chunk_rows
+        if first == last:
+            offset = first * self.chunk_rows
+            return self._chunk(column, first)[start - offset:stop - offset]
+        parts = []
+        for chunk in range(first, last + 1):
+            offset = chunk * self.chunk_rows
+            parts.append(self._chunk(column, chunk)[max(start, offset) - offset:min(stop, offset + self.chunk_rows) - offset])
+        return np.concatenate(parts)
+
+    # Grid selection by axis, e.g. read("power_law", g=slice(0, 100), theta=45);
+    # axes that are not named are taken whole
+    def read(self, column, **selection):
+        unknown = set(selection) - set(self.axes)
+        if unknown:
+            raise ValueError(f"unknown axes {sorted(unknown)}, store has {self.axes}")
+
+        index, shape = [], []
+        for name, length in zip(self.axes, self.shape):
+            chosen = np.arange(length)[selection.get(name, slice(None))]
+            if np.ndim(chosen):
+                shape.append(len(chosen))
+            index.append(np.atleast_1d(chosen))
+        flat = np.ravel_multi_index(np.ix_(*index), self.shape).ravel()
+
+        out = np.empty(len(flat), dtype=self.manifest["columns"][column]["dtype"])
+        chunk_of = flat // self.chunk_rows
+        for chunk in np.unique(chunk_of):
+            mask = chunk_of == chunk
+            out[mask] = self._chunk(column, int(chunk))[flat[mask] - chunk * self.chunk_rows]
+        return out.reshape(shape)
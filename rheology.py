@@ -0,0 +1,56 @@
+import numpy as np
+
+# Side-effect-free wall shear stress expressions shared by model.py,
+# Project2_Code.py and sensitivity_analysis.py. Every argument may be a scalar
+# or an array; arrays broadcast against each other with the usual numpy rules.
+
+# Rheology constants from model.py
+# m (Pa*s^n / m^2) and n (no unit) for blood as a power law fluid, density rho (kg/m^3),
+# yield stress ys (Pa), viscosity mu (Pa*s) and the empirical divisor the scripts
+# apply to the Newtonian and Bingham plastic expressions
+MODEL_PY_PARAMS = {"m": 0.01615, "n": 0.708, "rho": 1060, "ys": 0.0144, "mu": 0.0035, "scale": 500}
+
+# Project2_Code.py uses the same constants but divides the Newtonian expression by 280
+PROJECT2_PARAMS = dict(MODEL_PY_PARAMS, scale=280)
+
+# Generalized coronary artery from model.py: angle (degrees), radius (m),
+# pressure drop (Pa) and length (m)
+CORONARY = {"theta": -45, "r": 0.0015, "p": 16000, "l": 0.03}
+
+
+# Gravity-modified pressure gradient (p/l) - g*rho*sin(theta), theta in degrees
+def pressure_gradient(g, theta, p, l, rho):
+    return np.divide(p, l) - np.multiply(np.multiply(g, rho), np.sin(np.radians(theta)))
+
+
+# |((p/l) - g*rho*sin(theta)) * (r/2)|, the common core of all three models
+def gradient_stress(g, theta, r, p, l, rho):
+    return np.abs(pressure_gradient(g, theta, p, l, rho) * np.divide(r, 2))
+
+
+def power_law(base, params):
+    return params["m"] * base ** params["n"]
+
+
+def newtonian(base, params):
+    return base / params["scale"]
+
+
+def bingham(base, params):
+    return base / params["scale"] + params["ys"]
+
+
+MODELS = {"power_law": power_law, "newtonian": newtonian, "bingham": bingham}
+
+
+def get_model(model):
+    try:
+        return MODELS[model]
+    except KeyError:
+        raise ValueError(f"unknown model {model!r}, expected one of {sorted(MODELS)}") from None
+
+
+# Wall shear stress (Pa) for model in MODELS
+def wall_shear_stress(model, g, theta, r, p, l, params):
+    fn = get_model(model)
+    return fn(gradient_stress(g, theta, r, p, l, params["rho"]), params)
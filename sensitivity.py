@@ -0,0 +1,137 @@
+import numpy as np
+
+from parallel import map_partitions
+from profiling import stage
+from rheology import MODEL_PY_PARAMS, wall_shear_stress
+from sweep import GEOMETRY
+
+# Global sensitivity analysis of the wall shear stress models: variance-based
+# Sobol indices from Saltelli sampling and Morris elementary effects. Samples
+# are generated and evaluated in vectorized blocks; every block evaluates the
+# base matrices A and B once and reuses them for all d resampled matrices AB_i.
+# The model output is wall shear stress at each value of g, so every index is
+# returned per g (shape (d, len(g))).
+
+# Scenario studied by sensitivity_analysis.py
+BASE = dict(MODEL_PY_PARAMS, theta=-45, r=.0015, p=10000, l=.03)
+
+DEFAULT_BLOCK_SIZE = 1024
+
+
+# Bounds spanning the factors sensitivity_analysis.py used (0.25x to 3.25x)
+def factor_bounds(names, base=BASE, low=0.25, high=3.25):
+    return {name: (base[name] * low, base[name] * high) for name in names}
+
+
+# Wall shear stress for an (N, d) sample matrix, one row per sample and one
+# column per g value
+def evaluate_samples(model, names, samples, g, base=BASE):
+    if "g" in names:
+        raise ValueError("g is the output axis and cannot be sampled")
+    values = dict(base)
+    values.update({name: samples[:, i][:, None] for i, name in enumerate(names)})
+    geometry = [values[name] if name != "g" else np.asarray(g)[None, :] for name in GEOMETRY]
+    with stage("evaluation", len(samples) * len(g)):
+        return np.broadcast_to(wall_shear_stress(model, *geometry, values), (len(samples), len(g)))
+
+
+def scale(unit, bounds, names):
+    low = np.array([bounds[name][0] for name in names])
+    high = np.array([bounds[name][1] for name in names])
+    return low + unit * (high - low)
+
+
+# Saltelli blocks [start, stop): returns, per block, the sums the Sobol
+# estimators need. Blocks are summed in order by the caller so the result
+# does not depend on how blocks were split across workers.
+def _sobol_blocks(model, names, bounds, g, base, seed, block_size, start, stop):
+    d = len(names)
+    parts = []
+    for block in range(start, stop):
+        rng = np.random.default_rng([seed, block])
+        A = scale(rng.random((block_size, d)), bounds, names)
+        B = scale(rng.random((block_size, d)), bounds, names)
+        AB = np.repeat(A[None], d, axis=0)
+        AB[np.arange(d), :, np.arange(d)] = B.T
+
+        f = evaluate_samples(model, names, np.concatenate([A, B, AB.reshape(-1, d)]), g, base)
+        fA, fB = f[:block_size], f[block_size:2 * block_size]
+        fAB = f[2 * block_size:].reshape(d, block_size, -1)
+
+        parts.append({
+            "n": block_size,
+            "sum": fA.sum(0) + fB.sum(0),
+            "sumsq": (fA ** 2).sum(0) + (fB ** 2).sum(0),
+            # Saltelli (2010) first order and Jansen total order numerators
+            "first": (fB[None] * (fAB - fA[None])).sum(1),
+            "total": ((fA[None] - fAB) ** 2).sum(1),
+        })
+    return parts
+
+
+# First (S1) and total (ST) order Sobol indices from n_samples Saltelli
+# samples (rounded up to whole blocks), each of shape (len(names), len(g))
+def sobol_indices(model, bounds, g, n_samples=2**14, base=BASE, seed=0,
+                  block_size=DEFAULT_BLOCK_SIZE, workers=1):
+    if n_samples < 1:
+        raise ValueError("n_samples must be at least 1")
+    names = list(bounds)
+    n_blocks = -(-n_samples // block_size)
+    parts = map_partitions(_sobol_blocks, (model, names, bounds, np.asarray(g), base, seed, block_size),
+                           n_blocks, workers)
+    parts = [part for partition in parts for part in partition]
+    sums = parts[0]
+    for part in parts[1:]:
+        sums = {key: sums[key] + part[key] for key in sums}
+
+    n = sums["n"]
+    mean = sums["sum"] / (2 * n)
+    var = sums["sumsq"] / (2 * n) - mean ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        S1 = sums["first"] / n / var
+        ST = sums["total"] / (2 * n) / var
+    return {"names": names, "g": np.asarray(g), "n_samples": n, "S1": S1, "ST": ST,
+            "mean": mean, "var": var}
+
+
+# Morris trajectories in the unit cube, shape (n_trajectories, d + 1, d)
+def morris_trajectories(n_trajectories, d, levels=4, seed=0):
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels // 2) / (levels - 1)
+    start = rng.choice(grid, size=(n_trajectories, 1, d))
+    order = np.argsort(rng.random((n_trajectories, d)), axis=1)
+    sign = rng.choice([-1, 1], size=(n_trajectories, d))
+    # steps are taken upward from the lower half of the grid; flip the start
+    # where the step is downward so the point stays inside [0, 1]
+    start = np.where(sign[:, None, :] < 0, start + delta, start)
+
+    steps = np.zeros((n_trajectories, d + 1, d))
+    rows = np.arange(n_trajectories)[:, None]
+    steps[rows, np.arange(1, d + 1)[None, :], order] = (sign * delta)[rows, order]
+    return start + np.cumsum(steps, axis=1), order, sign * delta
+
+
+# Morris elementary effects: mu, mu* (mean absolute effect) and sigma per
+# parameter and g, with effects measured per unit of the scaled [0, 1] range
+def morris_indices(model, bounds, g, n_trajectories=1000, levels=4, base=BASE, seed=0):
+    names = list(bounds)
+    d = len(names)
+    unit, order, delta = morris_trajectories(n_trajectories, d, levels, seed)
+
+    f = evaluate_samples(model, names, scale(unit.reshape(-1, d), bounds, names), g, base)
+    f = f.reshape(n_trajectories, d + 1, -1)
+    effects = np.empty((n_trajectories, d, f.shape[-1]))
+    rows = np.arange(n_trajectories)[:, None]
+    effects[rows, order] = np.diff(f, axis=1) / delta[rows, order][..., None]
+
+    return {"names": names, "g": np.asarray(g), "n_trajectories": n_trajectories,
+            "mu": effects.mean(0), "mu_star": np.abs(effects).mean(0), "sigma": effects.std(0, ddof=1)}
+
+
+# Plain-text table of one index set at a single g column
+def format_table(result, keys, column=0):
+    lines = ["parameter " + " ".join(f"{key:>10}" for key in keys)]
+    for i, name in enumerate(result["names"]):
+        lines.append(f"{name:<9} " + " ".join(f"{result[key][i, column]:>10.4f}" for key in keys))
+    return "\n".join(lines)
@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import collections
+import json
+import sys
+import time
+
+import numpy as np
+
+from profiling import stage
+from rheology import CORONARY, MODEL_PY_PARAMS, get_model, wall_shear_stress
+
+# Local WSS query service. Tools POST the geometry they need evaluated and get
+# the stress back, instead of importing and re-running the scripts:
+#
+#   python service.py serve --port 8642                  (or --unix /tmp/wss.sock)
+#   curl -d '{"model": "power_law", "g": [0, 9.8]}' localhost:8642/wss
+#     -> {"tau": [..., ...]}
+#   curl localhost:8642/metrics
+#   python service.py load --port 8642 --clients 64 --requests 20000
+#
+# A /wss request names a model of rheology.py and gives g and optionally
+# theta, r, p, l (model.py's coronary artery by default), each a number or a
+# list; they broadcast to one flat list of points. Requests arriving within
+# `window` seconds of each other are coalesced per model and evaluated in a
+# single wall_shear_stress call (sooner once max_batch points are waiting),
+# then split back to their callers. The server speaks just enough HTTP/1.1
+# (keep-alive, Content-Length bodies) for curl and the load generator here,
+# over TCP or a Unix socket, with only the standard library.
+
+DEFAULT_PORT = 8642
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 2**16
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+GEOMETRY = ("g", "theta", "r", "p", "l")
+
+
+# Flat float arrays of one request's geometry, broadcast together
+def request_points(request):
+    if "g" not in request:
+        raise ValueError("request needs g")
+    unknown = set(request) - set(GEOMETRY) - {"model"}
+    if unknown:
+        raise ValueError(f"unknown fields {sorted(unknown)}, expected model and any of {GEOMETRY}")
+    values = [np.asarray(request.get(name, CORONARY.get(name)), dtype=float) for name in GEOMETRY]
+    return [np.ravel(value) for value in np.broadcast_arrays(*values)]
+
+
+class ServiceMetrics:
+    def __init__(self, keep=100000):
+        self.start = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.points = 0
+        self.largest_batch = 0
+        # latencies (s) of the most recent requests
+        self.latency = collections.deque(maxlen=keep)
+
+    def batch(self, requests, points):
+        self.batches += 1
+        self.requests += requests
+        self.points += points
+        self.largest_batch = max(self.largest_batch, requests)
+
+    def result(self):
+        elapsed = time.perf_counter() - self.start
+        latency = np.array(self.latency) * 1e3
+        percentiles = np.percentile(latency, [50, 95, 99]) if len(latency) else [np.nan] * 3
+        return {
+            "uptime": elapsed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "points": self.points,
+            "batches": self.batches,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "requests_per_second": self.requests / elapsed,
+            "points_per_second": self.points / elapsed,
+            "latency_ms": dict(zip(("p50", "p95", "p99"), map(float, percentiles)),
+                               max=float(latency.max()) if len(latency) else np.nan),
+        }
+
+
+# Coalesces concurrent evaluations: submit() queues a request's points and
+# returns once the batch holding them has been evaluated
+class MicroBatcher:
+    def __init__(self, params=MODEL_PY_PARAMS, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH, metrics=None):
+        self.params = params
+        self.window = window
+        self.max_batch = max_batch
+        self.metrics = ServiceMetrics() if metrics is None else metrics
+        # model -> [(points, future)], and the number of points queued
+        self.pending = collections.defaultdict(list)
+        self.queued = collections.Counter()
+        self.timers = {}
+
+    async def submit(self, model, points):
+        get_model(model)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[model].append((points, future))
+        self.queued[model] += len(points[0])
+        if self.queued[model] >= self.max_batch:
+            self.flush(model)
+        elif model not in self.timers:
+            self.timers[model] = asyncio.get_running_loop().call_later(self.window, self.flush, model)
+        return await future
+
+    def flush(self, model):
+        timer = self.timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(model, [])
+        self.queued.pop(model, None)
+        if not batch:
+            return
+        sizes = [len(points[0]) for points, _ in batch]
+        columns = [np.concatenate(column) for column in zip(*(points for points, _ in batch))]
+        try:
+            with stage("evaluation", len(columns[0])):
+                tau = np.broadcast_to(wall_shear_stress(model, *columns, self.params), columns[0].shape)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.metrics.batch(len(batch), len(tau))
+        for (_, future), part in zip(batch, np.split(tau, np.cumsum(sizes)[:-1])):
+            if not future.done():
+                future.set_result(part)
+
+
+class WssService:
+    def __init__(self, params=MODEL_PY_PARAMS, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(params, window, max_batch, self.metrics)
+        self.server = None
+        # open connections and the tasks serving them
+        self.connections = {}
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, unix=None):
+        if unix is not None:
+            self.server = await asyncio.start_unix_server(self._connection, path=unix)
+        else:
+            self.server = await asyncio.start_server(self._connection, host, port)
+        return self.server
+
+    # Bound TCP port (useful with port=0)
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        for writer in self.connections:
+            writer.close()
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle(self, method, path, body):
+        if path == "/metrics":
+            return (200, self.metrics.result()) if method == "GET" else (405, {"error": "use GET"})
+        if path != "/wss":
+            return 404, {"error": f"no route {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        start = time.perf_counter()
+        try:
+            request = json.loads(body)
+            tau = await self.batcher.submit(request.get("model", "power_law"), request_points(request))
+        except (ValueError, TypeError, AttributeError) as error:
+            self.metrics.errors += 1
+            return 400, {"error": str(error)}
+        self.metrics.latency.append(time.perf_counter() - start)
+        return 200, {"tau": tau.tolist()}
+
+    async def _connection(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request = await read_message(reader)
+                if request is None:
+                    break
+                start_line, headers, body = request
+                method, path, _ = start_line.split(" ", 2)
+                status, payload = await self.handle(method, path, body)
+                write_message(writer, f"HTTP/1.1 {status} {REASONS[status]}", payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+
+# One HTTP message as (start line, headers, body), or None at end of stream
+async def read_message(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return line.decode("latin-1").rstrip("\r\n"), headers, body
+
+
+def write_message(writer, start_line, payload):
+    data = json.dumps(payload).encode()
+    writer.write(f"{start_line}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                 + data)
+
+
+async def connect(host="127.0.0.1", port=DEFAULT_PORT, unix=None):
+    if unix is not None:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, port)
+
+
+# Client side of one request on an open connection; returns (status, payload)
+async def call(reader, writer, method, path, payload=None):
+    data = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    start_line, _, body = await read_message(reader)
+    return int(start_line.split(" ", 2)[1]), json.loads(body)
+
+
+# Load generator: `clients` keep-alive connections, each sending its share of
+# `requests` /wss requests of `points` random g values back to back. Returns
+# client-side throughput and latency plus the server's metrics.
+async def load_test(host="127.0.0.1", port=DEFAULT_PORT, unix=None, clients=32, requests=10000, points=1,
+                    model="power_law", seed=0):
+    rng = np.random.default_rng(seed)
+    latencies = []
+
+    async def client(count):
+        reader, writer = await connect(host, port, unix)
+        try:
+            for _ in range(count):
+                payload = {"model": model, "g": rng.uniform(0, 20, points).tolist()}
+                start = time.perf_counter()
+                status, reply = await call(reader, writer, "POST", "/wss", payload)
+                latencies.append(time.perf_counter() - start)
+                if status != 200 or len(reply["tau"]) != points:
+                    raise RuntimeError(f"bad reply {status}: {reply}")
+        finally:
+            writer.close()
+
+    shares = [requests // clients + (i < requests % clients) for i in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(count) for count in shares if count))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await connect(host, port, unix)
+    try:
+        _, server = await call(reader, writer, "GET", "/metrics")
+    finally:
+        writer.close()
+    latency = np.array(latencies) * 1e3
+    return {
+        "requests": requests,
+        "clients": clients,
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed,
+        "latency_ms": dict(zip(("p50", "p95", "p99"), map(float, np.percentile(latency, [50, 95, 99]))),
+                           max=float(latency.max())),
+        "server": server,
+    }
+
+
+async def serve(host, port, unix, window, max_batch):
+    service = WssService(window=window, max_batch=max_batch)
+    server = await service.start(host, port, unix)
+    print(f"serving WSS on {unix or f'{host}:{service.port}'}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="service", description="Micro-batching wall shear stress service.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("serve", "run the service"), ("load", "load-test a running service")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+        command.add_argument("--unix", help="Unix socket path instead of TCP")
+    serve_args = commands.choices["serve"]
+    serve_args.add_argument("--window", type=float, default=DEFAULT_WINDOW, help="batching window (s)")
+    serve_args.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="points that force a flush")
+    load_args = commands.choices["load"]
+    load_args.add_argument("--clients", type=int, default=32)
+    load_args.add_argument("--requests", type=int, default=10000)
+    load_args.add_argument("--points", type=int, default=1, help="g values per request")
+    load_args.add_argument("--model", default="power_law")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.unix, args.window, args.max_batch))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    result = asyncio.run(load_test(args.host, args.port, args.unix, args.clients, args.requests, args.points,
+                                   args.model))
+    print(json.dumps(result, indent=1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import numpy as np
+
+from profiling import stage
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+
+# Cartesian parameter sweeps over any of g, theta, r, p, l and the rheology
+# constants (m, n, rho, ys, scale). Axes are given as an ordered list of
+# (name, values) pairs (or a dict); the grid is walked in C order in fixed-size
+# blocks of flat indices, so memory use depends on chunk_size, not grid size.
+# Each block is handed to one or more sinks, which either write it to disk or
+# reduce it.
+
+GEOMETRY = ("g", "theta", "r", "p", "l")
+
+# Values for geometry that is not swept: model.py's coronary artery on earth
+DEFAULT_FIXED = dict(CORONARY, g=9.8)
+
+DEFAULT_CHUNK_SIZE = 2**20
+
+
+def normalize_axes(axes):
+    if isinstance(axes, dict):
+        axes = axes.items()
+    axes = [(name, np.asarray(values, dtype=float).ravel()) for name, values in axes]
+    names = [name for name, _ in axes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate sweep axes in {names}")
+    return axes
+
+
+def grid_shape(axes):
+    return tuple(len(values) for _, values in normalize_axes(axes))
+
+
+def iter_blocks(size, chunk_size=DEFAULT_CHUNK_SIZE):
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    for start in range(0, size, chunk_size):
+        yield start, min(start + chunk_size, size)
+
+
+# Axis values at flat grid indices [start, stop)
+def block_values(axes, start, stop):
+    axes = normalize_axes(axes)
+    shape = tuple(len(values) for _, values in axes)
+    index = np.unravel_index(np.arange(start, stop), shape)
+    return {name: values[i] for (name, values), i in zip(axes, index)}
+
+
+# Wall shear stress at flat grid indices [start, stop)
+def evaluate_block(model, axes, start, stop, params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED):
+    values = block_values(axes, start, stop)
+    geometry = {name: values.get(name, fixed.get(name)) for name in GEOMETRY}
+    constants = dict(params)
+    constants.update({name: v for name, v in values.items() if name not in GEOMETRY})
+    return wall_shear_stress(model, geometry["g"], geometry["theta"], geometry["r"],
+                             geometry["p"], geometry["l"], constants)
+
+
+# Evaluates the whole grid block by block and feeds every sink; returns the
+# sink's result (or a list of results when several sinks are given)
+def run_sweep(model, axes, sinks, params=MODEL_PY_PARAMS, fixed=DEFAULT_FIXED,
+              chunk_size=DEFAULT_CHUNK_SIZE):
+    axes = normalize_axes(axes)
+    single = not isinstance(sinks, (list, tuple))
+    if single:
+        sinks = [sinks]
+
+    size = int(np.prod(grid_shape(axes)))
+    for start, stop in iter_blocks(size, chunk_size):
+        with stage("evaluation", stop - start):
+            tau = evaluate_block(model, axes, start, stop, params, fixed)
+        for sink in sinks:
+            with stage(getattr(sink, "stage", "reduction")):
+                sink.update(start, stop, tau)
+
+    results = [sink.result() for sink in sinks]
+    return results[0] if single else results
+
+
+# Writes the full grid to a .npy file through a memory map
+class NpyWriter:
+    stage = "io"
+
+    def __init__(self, path, shape, dtype=np.float64):
+        self.path = path
+        self.array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=tuple(shape))
+
+    def update(self, start, stop, values):
+        self.array.reshape(-1)[start:stop] = values
+
+    def result(self):
+        self.array.flush()
+        return self.path
+
+
+# Running minimum and maximum with the flat index where they occur
+class MinMax:
+    def __init__(self):
+        self.min, self.argmin = np.inf, -1
+        self.max, self.argmax = -np.inf, -1
+
+    def update(self, start, stop, values):
+        i = int(np.argmin(values))
+        if values[i] < self.min:
+            self.min, self.argmin = float(values[i]), start + i
+        i = int(np.argmax(values))
+        if values[i] > self.max:
+            self.max, self.argmax = float(values[i]), start + i
+
+    # Combines with a MinMax over later indices; ties keep the earlier index
+    def merge(self, other):
+        if other.min < self.min:
+            self.min, self.argmin = other.min, other.argmin
+        if other.max > self.max:
+            self.max, self.argmax = other.max, other.argmax
+
+    def result(self):
+        return {"min": self.min, "argmin": self.argmin, "max": self.max, "argmax": self.argmax}
+
+
+# Number of grid points below a threshold, 0.6 Pa being the atherosclerosis
+# line drawn in model.py and Project2_Code.py
+class ThresholdCount:
+    def __init__(self, threshold=0.6):
+        self.threshold = threshold
+        self.below = 0
+        self.total = 0
+
+    def update(self, start, stop, values):
+        self.below += int(np.count_nonzero(values < self.threshold))
+        self.total += stop - start
+
+    def merge(self, other):
+        self.below += other.below
+        self.total += other.total
+
+    def result(self):
+        return {"threshold": self.threshold, "below": self.below, "total": self.total,
+                "fraction_below": self.below / self.total if self.total else float("nan")}
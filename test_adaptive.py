@@ -0,0 +1,18 @@
+import numpy as np
+
+from adaptive import adaptive_sweep, crossings
+from cases import interpolation_error
+from inverse import crossings_g
+from rheology import CORONARY, MODEL_PY_PARAMS
+
+
+# Adaptive g grids must interpolate the model to about tol everywhere, kink
+# included, and place the 0.6 Pa crossings as the inverse solver does
+def test_adaptive(tol=1e-4):
+    fixed = dict(CORONARY, g=9.8, theta=45)
+    dense = np.linspace(0, 1000, 10**6)
+    for model in ("power_law", "newtonian", "bingham"):
+        x, y = adaptive_sweep(model, "g", 0, 1000, tol=tol, fixed=fixed)
+        assert interpolation_error(model, x, y, dense, 45) <= 2 * tol
+        exact = crossings_g(model, 0.6, 45, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+        assert np.allclose(crossings(x, y, 0.6), exact[(exact >= 0) & (exact <= 1000)], atol=1e-5)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from cases import read_csv_columns, rheometer_curves
+from cohort import run_cohort
+from fitting import LOG_MODELS, fit_curves, parameter_table
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+
+
+# Every model must recover the constants of noise-free curves, treat NaN as
+# a missing point and feed its table back into the WSS models
+def test_fitting(tmp_path, n=500):
+    gamma = np.logspace(-1, 3, 40)
+    for model in ("power_law", "bingham") + tuple(LOG_MODELS):
+        true, tau = rheometer_curves(model, n, gamma)
+        fit = fit_curves(model, gamma, tau)
+        assert fit["converged"].all(), model
+        for name, value in true.items():
+            assert np.allclose(fit["params"][name], value, rtol=1e-6), (model, name)
+        assert np.all(fit["r2"] > 1 - 1e-9)
+
+        ragged = tau.copy()
+        ragged[::2, 1::2] = np.nan
+        trimmed = fit_curves(model, gamma[::2], tau[::2, ::2])
+        padded = fit_curves(model, gamma, ragged)
+        for name in true:
+            assert np.allclose(padded["params"][name][::2], trimmed["params"][name], rtol=1e-6), (model, name)
+
+    true, tau = rheometer_curves("power_law", n, gamma, noise=0.05)
+    fit = fit_curves("power_law", gamma, tau)
+    assert np.median(np.abs(fit["params"]["n"] / true["n"] - 1)) < 0.01
+
+    # power-law and Bingham tables round-trip through run_cohort
+    ids = [f"patient{i}" for i in range(n)]
+    fixed = dict(CORONARY, g=9.8)
+    out = str(tmp_path / "fits.csv")
+    for model in ("power_law", "bingham"):
+        fit = fit_curves(model, gamma, rheometer_curves(model, n, gamma, noise=0.05, seed=1)[1])
+        table = parameter_table(fit, ids=ids)
+        params = dict(MODEL_PY_PARAMS, **{name: table[name] for name in table if name != "id"})
+        expected = wall_shear_stress(model, 9.8, CORONARY["theta"], CORONARY["r"], CORONARY["p"],
+                                     CORONARY["l"], params)
+        summary = run_cohort(table, out, models=(model,), fixed=fixed)
+        written = read_csv_columns(out)
+        assert summary["segments"] == n and written["id"] == ids
+        assert np.allclose(np.array(written[model], dtype=float), expected, rtol=1e-15)
+        assert np.unique(expected).size == n
+    for model in LOG_MODELS:
+        with pytest.raises(ValueError):
+            parameter_table(fit_curves(model, gamma, rheometer_curves(model, 5, gamma)[1]))
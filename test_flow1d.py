@@ -0,0 +1,64 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from cases import flow_state
+from flow1d import REGULARIZED, TEST_PY, FlowStepper, explicit_euler, rates, solve as solve_flow, stable_dt
+from kernels import HAVE_NUMBA
+
+
+# The implicit solver must land on the state a converged explicit run reaches
+def test_flow1d():
+    u, p = explicit_euler(N=100, dt=1e-5, steps=100000, c=REGULARIZED)
+    result = solve_flow(N=100, t_end=1.0, c=REGULARIZED)
+    assert np.allclose(result["u"], u, rtol=0, atol=1e-8)
+    assert np.allclose(result["p"], p, rtol=0, atol=1e-6 * np.abs(p).max())
+
+
+# From a smooth state with no zero shear rate Test.py's unregularized scheme
+# steps stably for a while; the regularized one must converge to it as
+# gamma_min and nu go to zero
+def test_regularization_limit(N=100, dt=1e-6, steps=1000):
+    x = np.linspace(0, TEST_PY["L"], N + 1)
+
+    def run(c):
+        stepper = FlowStepper(N, dt=dt, c=c)
+        stepper.u[:] = 0.1 * np.sin(np.pi * x / TEST_PY["L"])
+        stepper.u[[0, -1]] = 0
+        return stepper.step(steps)
+
+    u, p = run(TEST_PY)
+    assert np.isfinite(u).all() and np.isfinite(p).all()
+    errors = [np.abs(run(dict(TEST_PY, gamma_min=gamma_min, nu=gamma_min * 1e-3))[0] - u).max()
+              for gamma_min in (1.0, 0.1, 0.01, 0.001)]
+    assert all(a > b for a, b in zip(errors, errors[1:])) and errors[-1] < 1e-2 * np.abs(u).max()
+    with pytest.raises(ValueError):
+        stable_dt(N, TEST_PY)
+
+
+# Steady-state stepping must not allocate: after warm-up, neither the traced
+# memory nor its peak may grow while stepping, on a grid where a single
+# temporary array would be 80 kB
+def test_stepper_allocations(N=10000, steps=200):
+    u, p = flow_state(N)
+    stepper = FlowStepper(N, dt=stable_dt(N, REGULARIZED), c=REGULARIZED)
+    stepper.u[:], stepper.p[:] = u, p
+    expected = rates(u, p, stepper.dx, REGULARIZED)
+    assert all(np.allclose(a, b, rtol=1e-12, atol=1e-12 * np.abs(b).max()) for a, b in zip(stepper.rates(), expected))
+
+    backends = ["numpy", "numba"] if HAVE_NUMBA else ["numpy"]
+    for backend in backends:
+        stepper = FlowStepper(N, dt=stable_dt(N, REGULARIZED), c=REGULARIZED, backend=backend)
+        stepper.step(5)
+        tracemalloc.start()
+        try:
+            stepper.step(5)
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            stepper.step(steps)
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert after - before <= 0, f"{backend} stepper grew by {after - before} bytes"
+        assert peak - before < 1024, f"{backend} stepper allocated {peak - before} bytes while stepping"
@@ -0,0 +1,22 @@
+import numpy as np
+
+from cases import TEST2, loop_surfaces, surface_axes
+from grid_engine import shear_surfaces
+
+
+# The vectorized engine must reproduce the loops in float64 (the Bingham
+# branches exactly, the power law to the last bit of numpy's vectorized pow)
+# and to float32 precision otherwise, whatever the chunking
+def test_grid_engine(n_g=200, n_gamma=300):
+    g, gamma = surface_axes(n_g, n_gamma)
+    ref_bp, ref_pl = loop_surfaces(g, gamma, **TEST2)
+
+    for chunk_rows in (None, 1, 7, n_g):
+        tau_bp, tau_pl = shear_surfaces(g, gamma, chunk_rows=chunk_rows, backend="numpy", **TEST2)
+        assert np.array_equal(tau_bp, ref_bp), "Bingham surface differs from loops"
+        assert np.allclose(tau_pl, ref_pl, rtol=1e-14, atol=0), "power law surface differs from loops"
+
+    tau_bp, tau_pl = shear_surfaces(g, gamma, dtype=np.float32, chunk_rows=64, backend="numpy", **TEST2)
+    assert tau_bp.dtype == np.float32 and tau_pl.dtype == np.float32
+    assert np.allclose(tau_bp, ref_bp, rtol=1e-5)
+    assert np.allclose(tau_pl, ref_pl, rtol=1e-5)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from inverse import INVERSES, bisect, critical_g, critical_r, crossings_g, crossings_theta
+from rheology import CORONARY, MODEL_PY_PARAMS, MODELS, wall_shear_stress
+
+
+# Inverted thresholds must put WSS back on the threshold, agree with bisection
+# and with the crossing found on a dense g grid
+def test_inverse(n=10**5, seed=0):
+    rng = np.random.default_rng(seed)
+    theta = rng.uniform(-90, 90, n)
+    r = rng.uniform(.001, .003, n)
+    p = rng.uniform(8000, 16000, n)
+    g = rng.uniform(0, 40, n)
+    params = dict(MODEL_PY_PARAMS, m=rng.uniform(.01, .03, n))
+    l = CORONARY["l"]
+
+    for model in ("power_law", "newtonian", "bingham"):
+        roots = crossings_g(model, 0.6, theta, r, p, l, params)
+        found = np.isfinite(roots)
+        assert found.any()
+        tau = wall_shear_stress(model, roots, theta[:, None], r[:, None], p[:, None], l, dict(params, m=params["m"][:, None]))
+        assert np.allclose(tau[found], 0.6, rtol=1e-9)
+
+        angles = crossings_theta(model, 0.6, g, r, p, l, params)
+        found = np.isfinite(angles)
+        tau = wall_shear_stress(model, g[:, None], angles, r[:, None], p[:, None], l, dict(params, m=params["m"][:, None]))
+        assert np.allclose(tau[found], 0.6, rtol=1e-9)
+
+        radius = critical_r(model, 0.6, g, theta, p, l, params)
+        assert np.allclose(wall_shear_stress(model, g, theta, radius, p, l, params), 0.6, rtol=1e-9)
+
+        bracketed = bisect(lambda base: MODELS[model](base, params) - 0.6, np.zeros(n), np.full(n, 1e6))
+        assert np.allclose(bracketed, INVERSES[model](0.6, params), rtol=1e-12)
+
+    # model.py's coronary case: first g on a .01 grid below 0.6 Pa
+    grid = np.arange(0, 2000, .01)
+    tau = wall_shear_stress("power_law", grid, 45, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+    first = grid[np.argmax(tau < 0.6)]
+    exact = critical_g("power_law", 0.6, 45, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+    assert 0 <= first - exact <= .01
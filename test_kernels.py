@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from cases import TEST2, flow_state, surface_axes
+from flow1d import rates
+from grid_engine import shear_surfaces
+from kernels import HAVE_NUMBA
+
+
+# Both backends must agree on identical inputs
+@pytest.mark.skipif(not HAVE_NUMBA, reason="numba not installed")
+def test_kernels():
+    g, gamma = surface_axes(200, 300)
+    for dtype, rtol in ((np.float64, 1e-12), (np.float32, 1e-5)):
+        expected = shear_surfaces(g, gamma, dtype=dtype, backend="numpy", **TEST2)
+        got = shear_surfaces(g, gamma, dtype=dtype, backend="numba", **TEST2)
+        for a, b in zip(got, expected):
+            assert a.dtype == dtype and np.allclose(a, b, rtol=rtol)
+
+    u, p = flow_state(1000)
+    for a, b in zip(rates(u, p, 2e-5, backend="numba"), rates(u, p, 2e-5, backend="numpy")):
+        assert np.allclose(a, b, rtol=1e-10, atol=1e-10 * np.abs(b).max())
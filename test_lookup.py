@@ -0,0 +1,33 @@
+import numpy as np
+
+from kernels import HAVE_NUMBA
+from lookup import LookupTable, build_table
+from rheology import MODELS
+
+
+# Lookup tables must hit the exact WSS at grid nodes, agree across backends,
+# stay within their reported linear bound and return NaN off the grid
+def test_lookup(tmp_path):
+    directory = str(tmp_path)
+    ranges = {"g": (0.0, 20.0, 11), "theta": (-90.0, 90.0, 19), "r": (.001, .003, 9), "p": (4000.0, 20000.0, 17)}
+    table = build_table(directory, ranges=ranges, samples=20000)
+    nodes = [np.linspace(*ranges[name])[::3] for name in ("g", "theta", "r", "p")]
+    grid = np.meshgrid(*nodes, indexing="ij")
+    rng = np.random.default_rng(2)
+    points = [rng.uniform(lo, hi, 5000) for lo, hi, _ in ranges.values()]
+    for model in MODELS:
+        exact = table.exact(model, *grid)
+        for backend in ("numpy", "numba") if HAVE_NUMBA else ("numpy",):
+            reopened = LookupTable(directory, backend=backend)
+            assert reopened.errors == table.errors
+            for method in ("linear", "cubic"):
+                assert np.allclose(reopened.query(model, *grid, method=method), exact, rtol=1e-12)
+            linear = reopened.query(model, *points)
+            assert np.isclose(reopened.query_one(model, *(x[7] for x in points)), linear[7], rtol=1e-14)
+        assert np.allclose(LookupTable(directory, backend="numpy").query(model, *points), linear, rtol=1e-12)
+
+        errors = table.errors[model]
+        assert errors["linear"]["max_abs"] <= 1.05 * errors["linear"]["bound"]
+        assert errors["cubic"]["rms"] < errors["linear"]["rms"]
+        outside = table.query(model, [25.0, 5.0], [0.0, 100.0], [.002, .002], [10000.0, 10000.0])
+        assert np.isnan(outside).all()
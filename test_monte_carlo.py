@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from monte_carlo import BASE as MC_BASE, DEFAULT_DISTRIBUTIONS, StreamingQuantiles, monte_carlo, sample_block
+from sensitivity import evaluate_samples, sobol_indices
+
+
+# Streaming statistics must match the batch statistics of the same draws
+def test_monte_carlo():
+    g = np.arange(0, 10, .5)
+    block_size = 2048
+    result = monte_carlo("power_law", g, n_samples=4 * block_size, block_size=block_size)
+
+    samples = [sample_block(DEFAULT_DISTRIBUTIONS, np.random.default_rng([0, block]), block_size)
+               for block in range(4)]
+    names = samples[0][0]
+    tau = evaluate_samples("power_law", names, np.concatenate([s for _, s in samples]), g, MC_BASE)
+
+    assert np.allclose(result["mean"], tau.mean(0), rtol=1e-12)
+    assert np.allclose(result["var"], tau.var(0, ddof=1), rtol=1e-10)
+    assert np.array_equal(result["p_below"], (tau < 0.6).mean(0))
+    assert np.array_equal(result["out_of_range"], np.zeros(len(g)))
+    for q, estimate in result["quantiles"].items():
+        assert np.allclose(estimate, np.quantile(tau, q, axis=0), rtol=2 * result["quantile_relative_error"][q])
+
+
+# Quantiles among samples outside the histogram range are reported unbounded
+@pytest.mark.parametrize("q, bounded", [(0.05, [False, True, True]), (0.5, [True, True, True]),
+                                        (0.95, [True, True, False])])
+def test_quantiles_out_of_range(q, bounded):
+    rng = np.random.default_rng(5)
+    values = rng.uniform(1, 10, (10000, 3))
+    values[:1000, 0] = 0.01
+    values[:1000, 2] = 1e4
+    histogram = StreamingQuantiles(3, 1, 10, bins=512)
+    for block in np.array_split(values, 7):
+        histogram.update(block)
+    assert np.array_equal(histogram.out_of_range(), [1000, 0, 1000])
+    error = histogram.relative_error(q)
+    assert np.array_equal(np.isfinite(error), bounded)
+    estimate = histogram.quantile(q)
+    assert np.allclose(estimate[bounded], np.quantile(values, q, axis=0)[bounded], rtol=2 * error[bounded])
+
+
+# Values <= 0 land in the underflow bin and NaN is counted apart, so draws
+# that make WSS negative still give finite statistics
+def test_nonpositive_values():
+    histogram = StreamingQuantiles(2, 1, 10, bins=64)
+    histogram.update(np.array([[np.nan, -1.], [0., 5.], [2., np.nan], [3., 4.]]))
+    assert np.array_equal(histogram.nan, [1, 1]) and np.array_equal(histogram.out_of_range(), [1, 1])
+    assert np.array_equal(histogram.min, [0, -1]) and np.array_equal(histogram.max, [3, 5])
+
+    g = np.arange(0, 10, .5)
+    result = monte_carlo("power_law", g, n_samples=8192, distributions={"m": ("normal", 0.01615, 0.02)})
+    samples = [sample_block({"m": ("normal", 0.01615, 0.02)}, np.random.default_rng([0, block]), 4096)
+               for block in range(2)]
+    tau = evaluate_samples("power_law", ["m"], np.concatenate([s for _, s in samples]), g, MC_BASE)
+    assert np.all(result["out_of_range"] >= (tau <= 0).sum(0)) and not result["nan"].any()
+    assert np.allclose(result["quantiles"][0.5], np.quantile(tau, 0.5, axis=0),
+                       rtol=2 * result["quantile_relative_error"][0.5])
+    assert np.array_equal(result["min"], tau.min(0))
+
+    with pytest.raises(ValueError):
+        monte_carlo("power_law", g, n_samples=0)
+    with pytest.raises(ValueError):
+        sobol_indices("power_law", {"m": (.01, .02)}, g, n_samples=0)
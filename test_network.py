@@ -0,0 +1,27 @@
+import math
+
+import numpy as np
+
+from network import VesselNetwork
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+
+
+# Network flow must conserve mass at every inner node, reduce to the tube law
+# for one segment and feed the per-segment WSS expressions
+def test_network():
+    single = VesselNetwork([0], [1], CORONARY["r"], CORONARY["l"], CORONARY["theta"])
+    result = single.solve({0: CORONARY["p"], 1: 0})
+    m, n, rho = MODEL_PY_PARAMS["m"], MODEL_PY_PARAMS["n"], MODEL_PY_PARAMS["rho"]
+    gradient = CORONARY["p"] / CORONARY["l"] - 9.8 * rho * math.sin(math.radians(CORONARY["theta"]))
+    expected = math.pi * n / (3 * n + 1) * (gradient / (2 * m)) ** (1 / n) * CORONARY["r"] ** (3 + 1 / n)
+    assert np.isclose(result["flow"][0], expected, rtol=1e-12)
+
+    network = VesselNetwork.bifurcating(10)
+    network.r *= np.random.default_rng(3).uniform(0.5, 1.5, network.n_segments)
+    result = network.solve(network.terminal_pressures(16000, 0))
+    inner = np.setdiff1d(np.arange(network.n_nodes), network.terminals())
+    assert np.abs((network.incidence @ result["flow"])[inner]).max() <= 1e-10 * result["flow"][0]
+    tau = network.wall_shear_stress(result["drop"])
+    assert np.allclose(tau["power_law"], [wall_shear_stress("power_law", 9.8, theta, r, p, l, MODEL_PY_PARAMS)
+                                          for theta, r, p, l in zip(network.theta, network.r, result["drop"],
+                                                                    network.l)], rtol=1e-14)
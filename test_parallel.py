@@ -0,0 +1,41 @@
+import multiprocessing
+
+import numpy as np
+
+from cases import TEST2, surface_axes, sweep_axes, sweep_reducers
+from grid_engine import shear_surfaces
+from kernels import HAVE_NUMBA
+from parallel import parallel_reduce, parallel_sweep, pool_context
+from sweep import run_sweep
+
+
+# Parallel sweeps must match the serial engine regardless of worker count
+def test_parallel(tmp_path):
+    axes = sweep_axes(50, 36, 20, 5, 4)
+    serial = run_sweep("power_law", axes, sweep_reducers(), chunk_size=4096)
+    grid = parallel_sweep("power_law", axes, workers=1)
+    path = str(tmp_path / "parallel.npy")
+    for workers in (2, 3):
+        assert np.array_equal(parallel_sweep("power_law", axes, workers=workers, chunk_size=4096), grid)
+        assert np.array_equal(parallel_sweep("power_law", axes, workers=workers, out=path), grid)
+        assert parallel_reduce("power_law", axes, sweep_reducers, workers=workers, chunk_size=4096) == serial
+
+    # an empty grid has no partitions and reduces to fresh sinks
+    empty = [("g", np.array([]))] + axes[1:]
+    assert repr(parallel_reduce("power_law", empty, sweep_reducers, workers=2)) == \
+        repr(run_sweep("power_law", empty, sweep_reducers()))
+
+    # workers must start cleanly after the threaded Numba kernels have run
+    if HAVE_NUMBA:
+        shear_surfaces(*surface_axes(20, 20), backend="numba", **TEST2)
+        assert parallel_reduce("power_law", axes, sweep_reducers, workers=2, chunk_size=4096) == serial
+
+
+# Without a forkserver (Windows) workers are spawned
+def test_pool_context(monkeypatch):
+    assert pool_context().get_start_method() in multiprocessing.get_all_start_methods()
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    assert pool_context().get_start_method() == "spawn"
+    axes = sweep_axes(10, 6, 4, 3, 2)
+    assert parallel_reduce("power_law", axes, sweep_reducers, workers=2) == run_sweep("power_law", axes,
+                                                                                      sweep_reducers())
@@ -0,0 +1,36 @@
+import numpy as np
+
+from cases import surface_figure
+from plotting import FONT_FAMILY, _font_rc, downsample, render_figure
+
+
+# Decimation keeps every curve's extremes, and unchanged figures are not redrawn
+def test_plotting(tmp_path):
+    x = np.linspace(0, 1, 10007)
+    y = np.sin(50 * x)[None, :] * np.arange(1, 4)[:, None]
+    xs, ys = downsample(x, y, 300)
+    assert xs.shape == ys.shape == (3, 600)
+    assert np.array_equal(ys.max(1), y.max(1)) and np.array_equal(ys.min(1), y.min(1))
+
+    # columns follow x, not the sample index, and keep each extreme at its own
+    # x, so a line stays a line on log-spaced samples, on either axis scale
+    x = np.logspace(-1, 3, 10000)
+    for xscale in ("linear", "log"):
+        xs, ys = downsample(x, -x, 600, xscale)
+        assert len(xs) <= 1200 and np.allclose(np.interp(x, xs, ys), -x, rtol=0, atol=1e-9)
+
+    path = str(tmp_path / "plotting.png")
+    spec = surface_figure(50, 2000)
+    assert render_figure(spec, path)
+    assert not render_figure(spec, path)
+    spec["panels"][0]["series"][0]["y"] = spec["panels"][0]["series"][0]["y"] * 2
+    assert render_figure(spec, path)
+    # missing fonts are dropped instead of logging findfont warnings
+    assert _font_rc(dict(spec, font_family=["No Such Font", "serif"])) == {"font.family": ["serif"]}
+    assert _font_rc(dict(spec, font_family="No Such Font")) == {}
+    assert render_figure(dict(spec, font_family=FONT_FAMILY), path)
+    assert _font_rc({"font_size": 9}) == {"font.size": 9}
+
+    # a panel can span grid cells
+    spanning = dict(spec, nrows=2, ncols=2, panels=spec["panels"] + [dict(spec["panels"][0], cell=(3, 4))])
+    assert render_figure(spanning, str(tmp_path / "spanning.png"))
@@ -0,0 +1,36 @@
+import numpy as np
+
+from profiles import PROFILES, radial_profiles
+from rheology import CORONARY, MODEL_PY_PARAMS, gradient_stress
+
+
+# Radial profiles must integrate to their analytic flow rate, differentiate
+# to their shear rate and reduce to the Newtonian profile for n = 1 / ys = 0
+def test_profiles(points=20001):
+    rng = np.random.default_rng(0)
+    g = rng.uniform(0, 30, 200)
+    theta = rng.uniform(-90, 90, 200)
+    r = rng.uniform(.0005, .004, 200)
+    p = rng.uniform(-20000, 20000, 200)
+    params = dict(MODEL_PY_PARAMS, ys=1.0)
+    for model in PROFILES:
+        result = radial_profiles(model, g, theta, r, p, CORONARY["l"], params, points=points)
+        s, u = result["s"], result["u"]
+        flow = np.trapezoid(2 * np.pi * s * u, s, axis=-1)
+        assert np.allclose(flow, result["flow_rate"], rtol=1e-6, atol=1e-12 * np.abs(result["flow_rate"]).max())
+        slope = -(np.abs(u[..., 2:]) - np.abs(u[..., :-2])) / (s[..., 2:] - s[..., :-2])
+        assert np.allclose(slope, result["shear_rate"][..., 1:-1], rtol=1e-3,
+                           atol=1e-3 * result["shear_rate"].max())
+        assert np.allclose(result["wall_shear"], gradient_stress(g, theta, r, p, CORONARY["l"], params["rho"]))
+        assert np.allclose(np.abs(result["stress"][..., -1]), result["wall_shear"])
+    plug = radial_profiles("bingham", g, theta, r, p, CORONARY["l"], params)["plug_radius"]
+    assert np.all((plug > 0) & (plug <= np.broadcast_to(r, plug.shape)))
+
+    newtonian = radial_profiles("newtonian", g, theta, r, p, CORONARY["l"])
+    as_power_law = radial_profiles("power_law", g, theta, r, p, CORONARY["l"],
+                                   dict(MODEL_PY_PARAMS, m=MODEL_PY_PARAMS["mu"], n=1.0))
+    as_bingham = radial_profiles("bingham", g, theta, r, p, CORONARY["l"], dict(MODEL_PY_PARAMS, ys=0.0))
+    for other in (as_power_law, as_bingham):
+        assert np.allclose(other["u"], newtonian["u"], rtol=1e-12)
+        assert np.allclose(other["flow_rate"], newtonian["flow_rate"], rtol=1e-12)
+    assert np.allclose(newtonian["u"][..., 0], 2 * newtonian["mean_velocity"])
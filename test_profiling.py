@@ -0,0 +1,43 @@
+import numpy as np
+
+from cases import sweep_axes
+from flow1d import REGULARIZED, explicit_euler
+from profiling import Profiler, stage
+from sweep import MinMax, grid_shape, run_sweep
+
+
+# Library stages must be recorded under an active profiler, nest, and count
+# evaluations; without one they must be no-ops
+def test_profiling():
+    with Profiler("check", trace_memory=True) as prof:
+        with stage("setup"):
+            axes = sweep_axes(20, 18, 10, 5, 4)
+        with stage("study"):
+            run_sweep("power_law", axes, MinMax(), chunk_size=10**4)
+        explicit_euler(N=100, steps=10, c=REGULARIZED)
+    report = prof.report()
+    stages = report["stages"]
+    assert set(stages) == {"setup", "study", "study/evaluation", "study/reduction", "stepping"}, stages
+    assert stages["study/evaluation"]["evaluations"] == int(np.prod(grid_shape(axes)))
+    assert stages["study/evaluation"]["calls"] == -(-int(np.prod(grid_shape(axes))) // 10**4)
+    assert stages["stepping"]["evaluations"] == 10
+    assert report["wall_time"] >= stages["study"]["seconds"]
+
+    # peaks of enclosing stages and of the run survive the inner stages
+    size = 64 * 2**20
+    with Profiler("memory", trace_memory=True) as prof:
+        with stage("outer"):
+            block = np.ones(size // 8)
+            with stage("inner"):
+                np.ones(size // 8)
+            del block
+            with stage("after"):
+                pass
+        np.ones(2 * size // 8)
+    report = prof.report()
+    stages = report["stages"]
+    slack = 4 * 2**20
+    assert size <= stages["outer/inner"]["peak_memory"] < size + slack
+    assert 2 * size <= stages["outer"]["peak_memory"] < 2 * size + slack
+    assert stages["outer/after"]["peak_memory"] < slack
+    assert 2 * size <= report["peak_traced_memory"] < 2 * size + slack
@@ -0,0 +1,38 @@
+import numpy as np
+
+from pulsatile import fourier_waveform, harmonics, pulsatile_wss, womersley_factor
+from rheology import CORONARY, MODEL_PY_PARAMS, MODELS, wall_shear_stress
+
+
+# A constant dP must give the steady WSS of every model, slow harmonics the
+# quasi-steady WSS, and a zero-mean sinusoid an OSI of 0.5
+def test_pulsatile():
+    g = np.linspace(0, 20, 7)[:, None]
+    theta = np.linspace(-90, 90, 5)
+    for model in MODELS:
+        steady = pulsatile_wss(np.full(32, CORONARY["p"]), g, theta, model=model)
+        expected = wall_shear_stress(model, g, theta, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+        assert np.allclose(steady["tau"], expected[..., None], rtol=1e-12)
+        assert np.allclose(steady["osi"], 0)
+
+    waveform = fourier_waveform()
+    t = np.arange(len(waveform)) / len(waveform)
+    c = harmonics(waveform)
+    assert np.allclose(sum((c[k] * np.exp(2j * np.pi * k * t)).real for k in range(len(c))), waveform)
+
+    alpha = np.array([0.0, 1e-3, 0.1])
+    assert np.allclose(womersley_factor(alpha), 1 - 1j * alpha ** 2 / 8, rtol=1e-5)
+    viscous = dict(MODEL_PY_PARAMS, mu=1e9)
+    slow = pulsatile_wss(waveform, g, theta, params=viscous, model="newtonian")
+    gradient = waveform / CORONARY["l"] - g[..., None] * MODEL_PY_PARAMS["rho"] * np.sin(np.radians(theta))[:, None]
+    quasi = np.sign(gradient) * wall_shear_stress("newtonian", g[..., None], theta[:, None], CORONARY["r"], waveform,
+                                                  CORONARY["l"], viscous)
+    assert np.allclose(slow["tau"], quasi, rtol=1e-9)
+
+    batch = pulsatile_wss(waveform, g, theta, model="power_law", samples=512)
+    for i, j in [(0, 0), (3, 2), (6, 4)]:
+        one = pulsatile_wss(waveform, g[i, 0], theta[j], model="power_law", samples=512)
+        assert np.allclose(batch["tau"][i, j], one["tau"]) and np.isclose(batch["osi"][i, j], one["osi"])
+
+    sine = pulsatile_wss(1000 * np.sin(2 * np.pi * t), 0.0)
+    assert np.isclose(sine["osi"], 0.5) and abs(sine["mean"]) < 1e-9 * sine["tawss"]
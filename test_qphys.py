@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+
+import qphys
+from rheology import MODEL_PY_PARAMS, wall_shear_stress
+from sensitivity import factor_bounds, sobol_indices
+
+
+# Studies must write their outputs once, skip while up to date, and rerun
+# when their configuration changes
+def test_qphys(tmp_path):
+    directory = str(tmp_path)
+    config = qphys.load_config()
+    config["gravity"]["g_step"] = .1
+    assert [status for _, status, _ in qphys.run(["gravity"], config, directory)] == ["done"]
+    assert [status for _, status, _ in qphys.run(["gravity"], config, directory)] == ["up to date"]
+    arrays = np.load(os.path.join(directory, "gravity.npz"))
+    assert np.allclose(arrays["power_law"], wall_shear_stress("power_law", arrays["g"], -45, .0015, 10000, .03,
+                                                              MODEL_PY_PARAMS))
+    config["params"]["m"] = .02
+    assert [status for _, status, _ in qphys.run(["gravity", "angle"], config, directory)] == ["done", "done"]
+
+
+# The sensitivity study varies its factors around the configured constants
+# and geometry, like the other studies
+def test_sensitivity_study_base():
+    config = qphys.load_config()
+    config["sensitivity"].update(g_step=1.0, n_samples=1024, factors={"power_law": ["m", "n"]})
+    config["params"]["rho"] = 1000
+    config["geometry"]["r"] = .002
+    arrays, _ = qphys.sensitivity_study(config)
+    base = dict(config["params"], **config["geometry"])
+    expected = sobol_indices("power_law", factor_bounds(["m", "n"], base), arrays["g"], n_samples=1024, base=base)
+    assert np.array_equal(arrays["power_law_S1"], expected["S1"])
@@ -0,0 +1,21 @@
+import numpy as np
+
+from result_cache import ResultCache
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+
+
+# Cached sweeps must return the computed grid, evaluate only missing g values
+# for overlapping grids, and stay under the size budget
+def test_result_cache(tmp_path):
+    theta = np.arange(-90, 90, 1.0)
+    cache = ResultCache(str(tmp_path))
+    for g in (np.arange(0, 10, .01), np.arange(0, 10, .01), np.arange(5, 15, .01)):
+        got = cache.sweep("power_law", [("g", g), ("theta", theta)])
+        expected = wall_shear_stress("power_law", g[:, None], theta[None, :], CORONARY["r"], CORONARY["p"],
+                                     CORONARY["l"], MODEL_PY_PARAMS)
+        assert np.allclose(got, expected, rtol=1e-12)
+    assert cache.misses == 1500 and cache.hits == 1500
+
+    small = ResultCache(str(tmp_path), max_bytes=cache.total_bytes() // 2)
+    small.sweep("power_law", [("g", np.arange(0, 1, .1)), ("theta", theta)], params=dict(MODEL_PY_PARAMS, m=.02))
+    assert small.total_bytes() <= small.max_bytes
@@ -0,0 +1,30 @@
+import os
+
+import numpy as np
+
+from cases import sweep_axes
+from results_store import ResultsStore, write_sweep
+from sweep import NpyWriter, grid_shape, run_sweep
+
+
+# A store written chunk by chunk must read back the broadcast grid, by flat
+# range (zero-copy inside a chunk) and by axis selection
+def test_results_store(tmp_path):
+    directory = str(tmp_path)
+    axes = sweep_axes(40, 18, 10, 5, 4)
+    expected = {}
+    for model in ("power_law", "bingham"):
+        writer = NpyWriter(os.path.join(directory, model + ".npy"), grid_shape(axes))
+        expected[model] = np.load(run_sweep(model, axes, writer))
+    store = write_sweep(os.path.join(directory, "store"), ["power_law", "bingham"], axes, chunk_rows=10007,
+                        chunk_size=4099)
+    store = ResultsStore(store.path)
+    for model, grid in expected.items():
+        assert store.complete(model)
+        assert np.array_equal(store.read_flat(model), grid.ravel())
+        view = store.read_flat(model, 10, 5000)
+        assert isinstance(view, np.memmap) and np.array_equal(view, grid.ravel()[10:5000])
+        assert np.array_equal(store.read(model), grid)
+        assert np.array_equal(store.read(model, g=slice(5, 30, 3), theta=4, p=[0, 2]),
+                              grid[5:30:3, 4][:, :, [0, 2]])
+    assert np.array_equal(store.axis("theta"), axes[1][1])
@@ -0,0 +1,24 @@
+import math
+
+import numpy as np
+
+from rheology import MODEL_PY_PARAMS, wall_shear_stress
+
+
+# wall_shear_stress must agree with the expressions written out in model.py
+def test_rheology():
+    m, n, rho, ys = 0.01615, .708, 1060, 0.0144
+    p, r, l = 16000, .0015, .03
+    sintheta = math.sin(math.radians(-45))
+    g = np.arange(0, 10, .01)
+
+    base = np.abs(((p/l) - np.multiply(np.multiply(g, rho), sintheta)) * (r / 2))
+    expected = {"power_law": m * base ** n, "newtonian": base / 500, "bingham": base / 500 + ys}
+    for model, tau in expected.items():
+        got = wall_shear_stress(model, g, -45, r, p, l, MODEL_PY_PARAMS)
+        assert np.allclose(got, tau, rtol=1e-12), f"{model} differs from model.py"
+
+    # broadcasting over independent axes gives the full outer product
+    out = wall_shear_stress("power_law", g[:, None, None], np.arange(-90, 90)[None, :, None],
+                            np.linspace(.001, .003, 7), p, l, MODEL_PY_PARAMS)
+    assert out.shape == (len(g), 180, 7)
@@ -0,0 +1,19 @@
+import numpy as np
+
+from sensitivity import factor_bounds, morris_indices, sobol_indices
+
+
+# Sanity checks with known answers: a lone parameter carries all the variance,
+# and a linear parameter has a constant Morris effect equal to its range
+def test_sensitivity():
+    g = np.array([0, 4.9, 9.8])
+    sobol = sobol_indices("power_law", {"m": (.01, .02)}, g, n_samples=2**13)
+    assert np.allclose(sobol["S1"], 1, atol=.1) and np.allclose(sobol["ST"], 1, atol=.1)
+
+    morris = morris_indices("bingham", {"ys": (.01, .02), "p": (8000, 12000)}, g, n_trajectories=20)
+    assert np.allclose(morris["mu"][0], .01) and np.allclose(morris["sigma"][0], 0, atol=1e-12)
+
+    bounds = factor_bounds(["m", "n", "p", "l"])
+    serial = sobol_indices("power_law", bounds, g, n_samples=4096, block_size=512)
+    pooled = sobol_indices("power_law", bounds, g, n_samples=4096, block_size=512, workers=2)
+    assert np.array_equal(serial["S1"], pooled["S1"]) and np.array_equal(serial["ST"], pooled["ST"])
@@ -0,0 +1,45 @@
+import asyncio
+import itertools
+
+import numpy as np
+
+from rheology import CORONARY, MODEL_PY_PARAMS, MODELS, wall_shear_stress
+from service import WssService, call, connect
+
+
+# Concurrent service requests must come back equal to direct evaluation,
+# coalesced into shared batches, with bad requests answered 400
+def test_service(clients=50):
+    async def run():
+        service = WssService(window=0.01)
+        await service.start(port=0)
+        rng = np.random.default_rng(4)
+        requests = [{"model": model, "g": rng.uniform(0, 20, size).tolist(), "theta": float(rng.uniform(-90, 90)),
+                     "r": rng.uniform(.001, .003, size).tolist()}
+                    for model, size in zip(itertools.cycle(MODELS), rng.integers(1, 50, clients))]
+
+        async def one(request):
+            reader, writer = await connect(port=service.port)
+            try:
+                return await call(reader, writer, "POST", "/wss", request)
+            finally:
+                writer.close()
+
+        try:
+            replies = await asyncio.gather(*(one(request) for request in requests))
+            for request, (status, reply) in zip(requests, replies):
+                expected = wall_shear_stress(request["model"], np.array(request["g"]), request["theta"],
+                                             np.array(request["r"]), CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+                assert status == 200 and np.allclose(reply["tau"], expected, rtol=1e-15)
+            for bad in ({"model": "carreau", "g": 1}, {"g": [1, 2], "r": [1, 2, 3]}, {"theta": 3}):
+                assert (await one(bad))[0] == 400
+            reader, writer = await connect(port=service.port)
+            _, metrics = await call(reader, writer, "GET", "/metrics")
+            writer.close()
+        finally:
+            await service.close()
+        return metrics
+
+    metrics = asyncio.run(run())
+    assert metrics["requests"] == clients and metrics["errors"] == 3
+    assert metrics["batches"] < clients
@@ -0,0 +1,24 @@
+import numpy as np
+
+from cases import sweep_axes
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+from sweep import MinMax, NpyWriter, ThresholdCount, grid_shape, run_sweep
+
+
+# Chunked sweeps must give the same grid and reductions as one broadcast call
+def test_sweep(tmp_path):
+    axes = sweep_axes()
+    g, theta, r, p, m = (values for _, values in axes)
+    params = dict(MODEL_PY_PARAMS, m=m[None, None, None, None, :])
+    expected = wall_shear_stress("power_law", g[:, None, None, None, None], theta[None, :, None, None, None],
+                                 r[None, None, :, None, None], p[None, None, None, :, None],
+                                 CORONARY["l"], params)
+
+    path = str(tmp_path / "sweep.npy")
+    for chunk_size in (997, 2**16, expected.size):
+        written, extrema, counts = run_sweep("power_law", axes,
+                                             [NpyWriter(path, grid_shape(axes)), MinMax(), ThresholdCount(0.6)],
+                                             chunk_size=chunk_size)
+        assert np.allclose(np.load(path), expected, rtol=1e-12)
+        assert extrema["argmin"] == int(np.argmin(expected)) and extrema["max"] == expected.max()
+        assert counts["below"] == int(np.count_nonzero(expected < 0.6))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+from timeseries import WssStream, iter_arrays, run_stream
+
+
+# Streaming must give the same windows, intervals and moments as evaluating
+# the whole series at once, whatever the block size
+def test_timeseries(n=100000, window=0.25):
+    rng = np.random.default_rng(1)
+    t = np.arange(n) / 1000
+    g = np.abs(9.8 * (1 + 3 * np.sin(t / 3)) + rng.normal(0, 5, n))
+    theta = 45 + 40 * np.sin(t / 7)
+    tau = wall_shear_stress("power_law", g, theta, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+    threshold = np.quantile(tau, 0.3)
+
+    ids = np.floor(t / window).astype(np.int64)
+    edges = np.diff(np.r_[0, (tau < threshold).astype(np.int8), 0])
+    expected = [(t[a], t[min(b, n - 1)], tau[a:b].min())
+                for a, b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+    for block in (777, 10000, n):
+        result = run_stream(iter_arrays(t, g, theta, block), WssStream(threshold=threshold, window=window))
+        windows = result["windows"]
+        assert len(windows) == ids[-1] + 1
+        assert np.allclose(windows["mean"], np.bincount(ids, tau) / np.bincount(ids), rtol=1e-12)
+        assert np.array_equal(windows["max"], [tau[ids == k].max() for k in range(len(windows))])
+        assert [(i["start"], i["end"], i["extreme"]) for i in result["intervals"]] == expected
+        assert np.isclose(result["mean"], tau.mean(), rtol=1e-12) and np.isclose(result["std"], tau.std(ddof=1))
+
+
+# Overlapping windows must pool every sample of their span, across block
+# boundaries and gaps in the series
+def test_rolling_windows(n=20000, window=0.25, hop=0.05):
+    rng = np.random.default_rng(2)
+    t = np.sort(rng.uniform(0, n / 1000, n))
+    t = t[(t < 5) | (t > 6.3)]
+    g = rng.uniform(0, 20, len(t))
+    tau = wall_shear_stress("power_law", g, 45, CORONARY["r"], CORONARY["p"], CORONARY["l"], MODEL_PY_PARAMS)
+
+    panes = np.floor((t - t[0]) / hop).astype(np.int64)
+    span = round(window / hop)
+    starts = [j for j in range(panes[-1] + 1) if ((panes >= j) & (panes < j + span)).any()]
+    members = [tau[(panes >= j) & (panes < j + span)] for j in starts]
+    for block in (333, 4096, n):
+        windows = run_stream(iter_arrays(t, g, 45.0, block), WssStream(window=window, hop=hop))["windows"]
+        assert np.allclose(windows["start"], t[0] + np.array(starts) * hop, rtol=1e-12)
+        assert np.array_equal(windows["count"], [len(x) for x in members])
+        assert np.allclose(windows["mean"], [x.mean() for x in members], rtol=1e-12)
+        assert np.allclose(windows["std"], [x.std(ddof=1) if len(x) > 1 else np.nan for x in members], rtol=1e-9, equal_nan=True)
+        assert np.array_equal(windows["min"], [x.min() for x in members])
+        assert np.array_equal(windows["max"], [x.max() for x in members])
+
+    with pytest.raises(ValueError):
+        WssStream(window=0.25, hop=0.1)
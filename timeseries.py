@@ -0,0 +1,278 @@
+import csv
+import itertools
+
+import numpy as np
+
+from monte_carlo import ATHERO_THRESHOLD, StreamingMoments
+from profiling import stage
+from rheology import CORONARY, MODEL_PY_PARAMS, wall_shear_stress
+
+# Wall shear stress along time series of gravity g(t) and posture angle
+# theta(t) (e.g. hours of accelerometer data at 1 kHz through launch and
+# re-entry). Series are consumed as blocks of (t, g, theta) arrays from a
+# generator, a .npy file or a CSV file; each block is evaluated in one call
+# and folded into a WssStream, which keeps
+#   - rolling statistics (mean, std, min, max) over windows of `window`
+#     seconds starting every `hop` seconds: back to back by default, or
+#     overlapping when hop is a fraction window / k,
+#   - the intervals during which WSS stays below (or above) the threshold,
+#   - moments over the whole series,
+# carrying the open window and interval over to the next block. Samples are
+# reduced once into panes of `hop` seconds, and each window merges its k
+# panes, so overlapping windows cost k merges of pane statistics rather than
+# k passes over the samples. Memory depends on the block size and k, never on
+# the length of the series. t must be non-decreasing.
+
+DEFAULT_BLOCK = 2**16
+
+
+# Blocks of in-memory (or memory-mapped) arrays; theta may be None or scalar
+def iter_arrays(t, g, theta=None, block=DEFAULT_BLOCK):
+    for start in range(0, len(t), block):
+        stop = start + block
+        yield t[start:stop], g[start:stop], theta if theta is None or np.ndim(theta) == 0 else theta[start:stop]
+
+
+# .npy file of shape (N, 2) holding t, g or (N, 3) holding t, g, theta
+def iter_npy(path, block=DEFAULT_BLOCK):
+    data = np.load(path, mmap_mode="r")
+    if data.ndim != 2 or data.shape[1] not in (2, 3):
+        raise ValueError(f"{path} must hold an (N, 2) or (N, 3) array of t, g[, theta], not {data.shape}")
+    for start in range(0, len(data), block):
+        chunk = np.asarray(data[start:start + block])
+        yield chunk[:, 0], chunk[:, 1], chunk[:, 2] if data.shape[1] == 3 else None
+
+
+# CSV file with a header naming columns t, g and optionally theta
+def iter_csv(path, block=DEFAULT_BLOCK):
+    with open(path, newline="") as f:
+        header = [name.strip() for name in next(csv.reader(f))]
+        missing = {"t", "g"} - set(header)
+        if missing:
+            raise ValueError(f"{path} has no {sorted(missing)} column")
+        names = ["t", "g"] + (["theta"] if "theta" in header else [])
+        columns = [header.index(name) for name in names]
+        while True:
+            lines = list(itertools.islice(f, block))
+            if not lines:
+                return
+            values = np.loadtxt(lines, delimiter=",", usecols=columns, ndmin=2)
+            yield values[:, 0], values[:, 1], values[:, 2] if len(names) == 3 else None
+
+
+# Synthetic launch profile at `rate` samples per second: on the pad at 1 g
+# reclined 90 degrees, ascent ramping to `peak` g, then microgravity, with
+# accelerometer noise
+def launch_profile(duration=3600.0, rate=1000.0, block=DEFAULT_BLOCK, pad=600.0, ascent=540.0, peak=4.0,
+                   noise=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(duration * rate)
+    for start in range(0, n, block):
+        t = np.arange(start, min(start + block, n)) / rate
+        into_ascent = np.clip((t - pad) / ascent, 0, 1)
+        g = np.where(t < pad, 1.0, np.where(t < pad + ascent, 1 + (peak - 1) * into_ascent, 1e-6)) * 9.8
+        g = np.abs(g + rng.normal(0, noise * 9.8, len(t)))
+        theta = np.where(t < pad + ascent, 90.0, 0.0) + rng.normal(0, 2, len(t))
+        yield t, g, theta
+
+
+class WssStream:
+    def __init__(self, model="power_law", geometry=CORONARY, params=MODEL_PY_PARAMS, threshold=ATHERO_THRESHOLD,
+                 window=1.0, hop=None, below=True, min_duration=0.0):
+        self.model = model
+        self.geometry = dict(geometry)
+        self.params = params
+        self.threshold = threshold
+        self.window = window
+        self.hop = window if hop is None else hop
+        # panes per window
+        self.span = int(round(window / self.hop))
+        if self.span < 1 or not np.isclose(self.span * self.hop, window):
+            raise ValueError(f"window ({window} s) must be a whole number of hops ({self.hop} s)")
+        self.below = below
+        self.min_duration = min_duration
+
+        self.moments = StreamingMoments(1)
+        self.t0 = None
+        # open pane: [id, count, mean, m2, min, max]
+        self.open_pane = None
+        # closed panes that windows still to come will need, as columns
+        self.panes = None
+        # first window not yet returned
+        self.next_window = 0
+        # open interval: [start time, extreme WSS]
+        self.open_interval = None
+        self.last_t = None
+
+    # Evaluates one block; returns the windows and intervals it completed
+    def update(self, t, g, theta=None):
+        t = np.asarray(t, dtype=float)
+        if not len(t):
+            return {"windows": _empty_windows(), "intervals": []}
+        if theta is None:
+            theta = self.geometry["theta"]
+        with stage("evaluation", len(t)):
+            tau = np.broadcast_to(wall_shear_stress(self.model, g, theta, self.geometry["r"], self.geometry["p"],
+                                                    self.geometry["l"], self.params), t.shape)
+        if self.t0 is None:
+            self.t0 = t[0]
+        self.moments.update(tau[:, None])
+        with stage("reduction"):
+            windows = self._windows(t, tau)
+            intervals = self._intervals(t, tau)
+        self.last_t = t[-1]
+        return {"windows": windows, "intervals": intervals}
+
+    def _windows(self, t, tau):
+        ids = np.floor((t - self.t0) / self.hop).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        counts = np.diff(np.r_[starts, len(t)])
+        means = np.add.reduceat(tau, starts) / counts
+        m2 = np.add.reduceat((tau - np.repeat(means, counts)) ** 2, starts)
+        stats = [ids[starts], counts, means, m2, np.minimum.reduceat(tau, starts), np.maximum.reduceat(tau, starts)]
+
+        if self.open_pane is not None:
+            if self.open_pane[0] == stats[0][0]:
+                merged = _merge_stats(self.open_pane, [column[0] for column in stats])
+                for column, value in zip(stats, merged):
+                    column[0] = value
+            else:
+                stats = [np.r_[previous, column] for previous, column in zip(self.open_pane, stats)]
+
+        # the last pane may continue in the next block, and so may every
+        # window that reaches it
+        self.open_pane = [column[-1] for column in stats]
+        return self._complete([column[:-1] for column in stats], self.open_pane[0] - self.span)
+
+    # Windows made of the closed panes (plus those kept from earlier blocks)
+    # that start no later than pane `last`, or all of them when last is None
+    def _complete(self, panes, last=None):
+        if self.panes is not None:
+            panes = [np.r_[kept, column] for kept, column in zip(self.panes, panes)]
+        ids = panes[0]
+        starts = np.unique(ids[:, None] - np.arange(self.span)) if len(ids) else ids
+        starts = starts[starts >= self.next_window]
+        if last is not None:
+            starts = starts[starts <= last]
+            self.next_window = max(self.next_window, last + 1)
+        keep = ids >= self.next_window
+        self.panes = [column[keep] for column in panes]
+        return _window_records(self, _combine_panes(panes, starts, self.span))
+
+    def _intervals(self, t, tau):
+        flag = (tau < self.threshold) if self.below else (tau > self.threshold)
+        was_open = self.open_interval is not None
+        edges = np.diff(np.r_[int(was_open), flag.astype(np.int8), 0])
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        # a run open at the start of the block continues the open interval
+        if was_open:
+            starts = np.r_[0, starts]
+
+        # masked so the gaps between runs never win the reduction
+        if self.below:
+            extremes = np.minimum.reduceat(np.where(flag, tau, np.inf), starts) if len(starts) else []
+        else:
+            extremes = np.maximum.reduceat(np.where(flag, tau, -np.inf), starts) if len(starts) else []
+        intervals = []
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            extreme = extremes[i]
+            begin = t[start]
+            if i == 0 and was_open:
+                begin = self.open_interval[0]
+                extreme = min(extreme, self.open_interval[1]) if self.below else max(extreme, self.open_interval[1])
+            if end == len(t):
+                self.open_interval = [begin, extreme]
+                break
+            self._close(intervals, begin, t[end], extreme)
+        else:
+            self.open_interval = None
+        return intervals
+
+    def _close(self, intervals, begin, end, extreme):
+        if end - begin >= self.min_duration:
+            intervals.append({"start": float(begin), "end": float(end), "duration": float(end - begin),
+                              "extreme": float(extreme)})
+
+    # Closes the open window and interval; returns them with series totals
+    def result(self):
+        windows = _empty_windows()
+        intervals = []
+        if self.open_pane is not None:
+            windows = self._complete([np.array([value]) for value in self.open_pane])
+            self.open_pane = None
+        self.panes = None
+        if self.open_interval is not None:
+            self._close(intervals, self.open_interval[0], self.last_t, self.open_interval[1])
+            self.open_interval = None
+        moments = self.moments.result()
+        return {"windows": windows, "intervals": intervals, "n": moments["n"], "mean": float(moments["mean"][0]),
+                "std": float(moments["std"][0])}
+
+
+# Pooled [id, count, mean, m2, min, max] of two sets of statistics; either
+# side may be empty (count 0), elementwise over arrays
+def _merge_stats(a, b):
+    _, n_a, mean_a, m2_a, min_a, max_a = a
+    _, n_b, mean_b, m2_b, min_b, max_b = b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n_a == 0, mean_b, np.where(n_b == 0, mean_a, mean_a + delta * n_b / n))
+        m2 = np.where(n_a == 0, m2_b, np.where(n_b == 0, m2_a, m2_a + m2_b + delta ** 2 * n_a * n_b / n))
+    return [a[0], n, mean, m2, np.minimum(min_a, min_b), np.maximum(max_a, max_b)]
+
+
+# Statistics of the windows starting at panes `starts`, each pooling the
+# panes starts .. starts + span - 1 that hold samples
+def _combine_panes(panes, starts, span):
+    ids = panes[0]
+    size = len(starts)
+    stats = [starts, np.zeros(size, dtype=np.int64), np.zeros(size), np.zeros(size), np.full(size, np.inf),
+             np.full(size, -np.inf)]
+    if not len(ids):
+        return stats
+    empty = (0, 0, 0.0, 0.0, np.inf, -np.inf)
+    for offset in range(span):
+        index = np.minimum(np.searchsorted(ids, starts + offset), len(ids) - 1)
+        present = ids[index] == starts + offset
+        stats = _merge_stats(stats, [np.where(present, column[index], value) for column, value in zip(panes, empty)])
+    return stats
+
+
+WINDOW_DTYPE = np.dtype([("start", "f8"), ("count", "i8"), ("mean", "f8"), ("std", "f8"), ("min", "f8"),
+                         ("max", "f8")])
+
+
+def _empty_windows():
+    return np.empty(0, dtype=WINDOW_DTYPE)
+
+
+def _window_records(stream, stats):
+    ids, counts, means, m2, mins, maxs = stats
+    records = np.empty(len(ids), dtype=WINDOW_DTYPE)
+    records["start"] = stream.t0 + ids * stream.hop
+    records["count"] = counts
+    records["mean"] = means
+    with np.errstate(invalid="ignore", divide="ignore"):
+        records["std"] = np.sqrt(np.where(counts > 1, m2 / (counts - 1), np.nan))
+    records["min"] = mins
+    records["max"] = maxs
+    return records
+
+
+# Runs a whole series through a stream; windows and intervals are collected
+# (they are small next to the series) and on_block, if given, sees each
+# block's completed windows and intervals as they are produced
+def run_stream(blocks, stream, on_block=None):
+    windows, intervals = [], []
+    for t, g, theta in blocks:
+        done = stream.update(t, g, theta)
+        if on_block is not None:
+            on_block(done)
+        windows.append(done["windows"])
+        intervals.extend(done["intervals"])
+    final = stream.result()
+    windows.append(final["windows"])
+    intervals.extend(final["intervals"])
+    return dict(final, windows=np.concatenate(windows), intervals=intervals)